@@ -0,0 +1,146 @@
+"""
+Compara as consultas do armazém de resultados (`extrator_pdf.armazem`) com a leitura do CSV inteiro.
+
+Grava --notas notas sintéticas (--fornecedores CNPJs, datas espalhadas por dois anos) no CSV de
+sucesso e no armazém, pelo `GravadorResultados`, como na linha de comando. Depois mede:
+
+- busca de uma nota por CNPJ + número: `procurar_nota` contra ler o CSV até achar a linha
+- total do valor líquido por fornecedor num mês: `totais_por_fornecedor` contra ler e somar o CSV
+- exportação incremental das últimas --novas linhas
+
+e confere que as respostas são iguais.
+
+    python benchmarks/bench_armazem.py [--notas 200000] [--fornecedores 500] [--consultas 200]
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+
+from extrator_pdf.armazem import ArmazemResultados, registro_do_resultado  # noqa: E402
+from extrator_pdf.campos import formatar_valor_csv, parse_valor  # noqa: E402
+from extrator_pdf.cli import FIELDNAMES_SUCESSO  # noqa: E402
+from extrator_pdf.consulta import exportar  # noqa: E402
+from extrator_pdf.saida import GravadorResultados, SaidaCSV  # noqa: E402
+
+def resultado_sintetico(gerador: random.Random, indice: int, fornecedores: int) -> dict:
+    fornecedor = gerador.randrange(fornecedores)
+    cnpj = f"{10000000 + fornecedor:08d}0001{fornecedor % 100:02d}"
+    emissao = (date(2024, 1, 1) + timedelta(days=gerador.randrange(730))).strftime("%d/%m/%Y")
+    valor_total = round(gerador.uniform(50, 50000), 2)
+    irrf = round(valor_total * 0.015, 2)
+    caminho = f"notas/{fornecedor}/nota_{indice:07d}.pdf"
+    dados = {"numero_nota": f"{indice:08d}", "prestador": f"FORNECEDOR {fornecedor} LTDA", "cnpj": cnpj,
+             "valor_total": valor_total, "irrf": irrf, "valor_liquido": round(valor_total - irrf, 2),
+             "data_emissao_nf": emissao}
+    linha = {"DATA EMISSÃO NF": emissao, "NOME FORNECEDOR": dados["prestador"], "NÚMERO NF": dados["numero_nota"],
+             "OPERAÇÃO": "", "VALOR": formatar_valor_csv(dados["valor_liquido"]), "FORMA PAGAMENTO": "B",
+             "OBSERVAÇÕES": "", "Caminho do Arquivo": caminho, "MÉTODO EXTRAÇÃO": "Regex"}
+    return {"destino": "sucesso", "metodo": "Regex", "tipo_documento": "NOTA_FISCAL", "dados": dados,
+            "linha": linha, "segundos": 0.05}
+
+def procurar_no_csv(caminho_csv: str, numero: str) -> list:
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        return [linha for linha in csv.DictReader(f, delimiter=";") if linha["NÚMERO NF"] == numero]
+
+def totais_no_csv(caminho_csv: str, mes: str) -> dict:
+    totais = {}
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        for linha in csv.DictReader(f, delimiter=";"):
+            if linha["DATA EMISSÃO NF"][3:] == mes:
+                fornecedor = linha["NOME FORNECEDOR"]
+                totais[fornecedor] = totais.get(fornecedor, 0.0) + parse_valor(linha["VALOR"])
+    return totais
+
+def medir(funcao, repeticoes: int) -> list:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notas", type=int, default=200000)
+    parser.add_argument("--fornecedores", type=int, default=500)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--novas", type=int, default=1000)
+    args = parser.parse_args()
+
+    gerador = random.Random(7)
+    pasta = tempfile.mkdtemp(prefix="bench_armazem_")
+    falhas = 0
+    try:
+        caminho_csv = os.path.join(pasta, "notas_fiscais_extraidas.csv")
+        armazem = ArmazemResultados(os.path.join(pasta, "resultados.sqlite3"))
+        inicio = time.perf_counter()
+        with GravadorResultados({"sucesso": [SaidaCSV(caminho_csv, FIELDNAMES_SUCESSO)]}, max_linhas=1000,
+                                intervalo=3600, armazem=armazem) as gravador:
+            for indice in range(args.notas):
+                resultado = resultado_sintetico(gerador, indice, args.fornecedores)
+                caminho = resultado["linha"]["Caminho do Arquivo"]
+                gravador.adicionar("sucesso", resultado["linha"], None, registro_do_resultado(caminho, resultado, "0" * 64))
+        print(f"{args.notas} notas gravadas no CSV e no armazém em {time.perf_counter() - inicio:.1f} s "
+              f"(CSV {os.path.getsize(caminho_csv) / 1e6:.1f} MB, armazém {os.path.getsize(armazem.caminho) / 1e6:.1f} MB)")
+
+        # Busca por CNPJ + número: o CSV é lido só algumas vezes (cada leitura percorre o arquivo todo)
+        amostra = [armazem.consultar("SELECT cnpj, numero_nota FROM documentos WHERE id = ?",
+                                     (gerador.randrange(1, args.notas + 1),))[0] for _ in range(args.consultas)]
+        tempos_armazem = []
+        for cnpj, numero in amostra:
+            inicio = time.perf_counter()
+            encontrados = armazem.procurar_nota(cnpj, numero)
+            tempos_armazem.append((time.perf_counter() - inicio) * 1000)
+            falhas += len(encontrados) != 1
+        tempos_csv = medir(lambda: procurar_no_csv(caminho_csv, f"{int(amostra[0][1]):08d}"), 3)
+        print(f"busca CNPJ + número   armazém p50 {statistics.median(tempos_armazem):8.3f} ms  "
+              f"max {max(tempos_armazem):8.3f} ms   CSV p50 {statistics.median(tempos_csv):8.1f} ms")
+
+        # Total por fornecedor num mês
+        por_armazem = {}
+        tempos_armazem = medir(lambda: por_armazem.update(
+            {linha["prestador"]: linha["valor_liquido"] for linha in armazem.totais_por_fornecedor("2025-03-01", "2025-03-31")}
+        ), 10)
+        por_csv = {}
+        tempos_csv = medir(lambda: por_csv.update(totais_no_csv(caminho_csv, "03/2025")), 3)
+        iguais = por_armazem.keys() == por_csv.keys() and all(abs(por_armazem[k] - por_csv[k]) < 0.01 for k in por_csv)
+        falhas += not iguais
+        print(f"totais do mês         armazém p50 {statistics.median(tempos_armazem):8.3f} ms  "
+              f"{'':17} CSV p50 {statistics.median(tempos_csv):8.1f} ms  ({len(por_csv)} fornecedores"
+              f"{'' if iguais else ', DIFERENTES'})")
+
+        # Exportação incremental: a primeira gera tudo, a seguinte só as linhas novas
+        pasta_exportacao = os.path.join(pasta, "exportacao")
+        inicio = time.perf_counter()
+        exportar(armazem, pasta_exportacao, ["csv"])
+        completa = time.perf_counter() - inicio
+        with GravadorResultados({"sucesso": [SaidaCSV(caminho_csv, FIELDNAMES_SUCESSO)]}, max_linhas=1000,
+                                intervalo=3600, armazem=armazem) as gravador:
+            for indice in range(args.notas, args.notas + args.novas):
+                resultado = resultado_sintetico(gerador, indice, args.fornecedores)
+                gravador.adicionar("sucesso", resultado["linha"], None,
+                                   registro_do_resultado(resultado["linha"]["Caminho do Arquivo"], resultado))
+        inicio = time.perf_counter()
+        exportar(armazem, pasta_exportacao, ["csv"])
+        incremental = time.perf_counter() - inicio
+        with open(caminho_csv, "rb") as original, open(os.path.join(pasta_exportacao, "notas_fiscais_extraidas.csv"), "rb") as exportado:
+            iguais = original.read() == exportado.read()
+        falhas += not iguais
+        print(f"exportação            completa {completa:.2f} s, incremental ({args.novas} linhas) {incremental * 1000:.1f} ms"
+              f"{'' if iguais else '  DIFERENTE DO CSV'}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
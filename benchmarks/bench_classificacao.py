@@ -0,0 +1,96 @@
+"""
+Compara `classificar_tipo_documento` + `detectar_forma_pagamento` (uma varredura compartilhada
+das palavras-chave, `categorias_palavras_chave`) com as implementações anteriores (cada função
+com sua cópia em minúsculas e um `in` por palavra-chave), reproduzidas abaixo como referência.
+
+Mede o tempo de classificar e detectar a forma de pagamento de cada nota do corpus sintético
+e confere que os resultados são os mesmos nele e em textos aleatórios montados com fragmentos
+sobrepostos das palavras-chave.
+
+    python benchmarks/bench_classificacao.py [--documentos 200] [--aleatorios 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extrator_pdf import campos  # noqa: E402
+from bench_reducao_texto import corpus_sintetico  # noqa: E402
+
+def classificar_tipo_documento_original(texto: str) -> str:
+    texto_lower = texto.lower()
+    palavras_chave_cheque = ["cheque", "pague por este", "compensação", "banco", "agência", "conta corrente", "cheque n"]
+    if any(keyword in texto_lower for keyword in palavras_chave_cheque):
+        return "CHEQUE"
+    palavras_chave_nf = ["nota fiscal", "nf-e", "nfse", "danfe", "prestador", "tomador", "emitente", "valor total", "irrf", "município", "serviços"]
+    if any(keyword in texto_lower for keyword in palavras_chave_nf):
+        return "NOTA_FISCAL"
+    return "DESCONHECIDO"
+
+def detectar_forma_pagamento_original(texto: str) -> str:
+    texto_lower = texto.lower()
+    if any(banco in texto_lower for banco in ["itau", "itaú", "banco 341"]):
+        return "B"
+    outros_bancos = ["banco", "bradesco", "santander", "bb", "banco do brasil", "caixa"]
+    if any(banco in texto_lower for banco in outros_bancos):
+        return "D"
+    return ""
+
+def textos_aleatorios(quantidade: int, semente: int) -> list:
+    """Textos curtos com pedaços de palavras-chave colados, em caixas variadas."""
+    rnd = random.Random(semente)
+    palavras = [p for lista in campos.PALAVRAS_CHAVE_CATEGORIAS.values() for p in lista]
+    textos = []
+    for _ in range(quantidade):
+        partes = []
+        for _ in range(rnd.randint(0, 8)):
+            palavra = rnd.choice(palavras)
+            inicio = rnd.randint(0, len(palavra) - 1)
+            pedaco = palavra[inicio:] if rnd.random() < 0.5 else palavra[:rnd.randint(1, len(palavra))]
+            partes.append(pedaco.upper() if rnd.random() < 0.2 else pedaco)
+            partes.append(rnd.choice(["", " ", "b", "\n", "x"]))
+        textos.append("".join(partes))
+    return textos
+
+def medir(funcao, corpus: list, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in corpus:
+            funcao(texto)
+    return (time.perf_counter() - inicio) / repeticoes
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--aleatorios", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    notas = [texto for texto, _ in corpus_sintetico(args.documentos, args.semente)]
+
+    def original(texto: str) -> tuple:
+        return classificar_tipo_documento_original(texto), detectar_forma_pagamento_original(texto)
+
+    def atual(texto: str) -> tuple:
+        campos.categorias_palavras_chave.cache_clear()
+        return campos.classificar_tipo_documento(texto), campos.detectar_forma_pagamento(texto)
+
+    antes = medir(original, notas, args.repeticoes)
+    depois = medir(atual, notas, args.repeticoes)
+    print(f"Classificação + forma de pagamento: {1000.0 * antes:.1f} ms -> {1000.0 * depois:.1f} ms "
+          f"({antes / max(depois, 1e-9):.2f}x) em {len(notas)} notas")
+    divergencias = 0
+    for texto in notas + textos_aleatorios(args.aleatorios, args.semente):
+        if original(texto) != atual(texto):
+            divergencias += 1
+            if divergencias <= 5:
+                print(f"  divergência: {texto!r}")
+    print(f"Divergências: {divergencias}")
+    return 0 if divergencias == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Mede o índice de duplicatas (`extrator_pdf.duplicatas`) com muitas notas já registradas.
+
+O índice é preenchido com --entradas textos de NFS-e sintéticas (`corpus_pdf.py`), gravados em
+lotes. Depois são consultadas --consultas cópias alteradas de notas registradas (OCR com ruído,
+folha de rosto na frente, linhas em outra ordem) e o mesmo número de notas novas do mesmo modelo.
+Informa o tempo de consulta (p50, p99, máximo), quantas cópias foram reconhecidas e quantas
+notas novas foram confundidas com uma registrada. As consultas não usam a chave fiscal, só a
+impressão do texto.
+
+    python benchmarks/bench_duplicatas.py [--entradas 200000] [--consultas 2000] [--semente 42] [--pasta pasta]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+sys.path.insert(0, PASTA_BENCHMARKS)
+
+from corpus_pdf import gerar_gabarito, linhas_nfse  # noqa: E402
+from extrator_pdf.duplicatas import IndiceDuplicatas, impressao_documento  # noqa: E402
+
+LOTE_REGISTROS = 5000
+
+def texto_nota(rnd: random.Random) -> str:
+    return "\n".join(linhas_nfse(gerar_gabarito(rnd)))
+
+def com_ruido_ocr(texto: str, rnd: random.Random) -> str:
+    """Troca cerca de 2% das letras por confusões comuns do OCR."""
+    caracteres = list(texto)
+    for _ in range(len(caracteres) // 50):
+        i = rnd.randrange(len(caracteres))
+        if caracteres[i].isalpha():
+            caracteres[i] = rnd.choice("lI1rnmO0")
+    return "".join(caracteres)
+
+def com_folha_de_rosto(texto: str, rnd: random.Random) -> str:
+    return (f"ENCAMINHAMENTO SETOR FINANCEIRO\nProtocolo {rnd.randint(1000, 9999)}\n"
+            f"Favor providenciar o pagamento da nota anexa.\n\n{texto}")
+
+def com_linhas_reordenadas(texto: str, rnd: random.Random) -> str:
+    linhas = texto.splitlines()
+    i = rnd.randrange(len(linhas) - 1)
+    linhas[i], linhas[i + 1] = linhas[i + 1], linhas[i]
+    return "\n".join(linhas)
+
+VARIACOES = {
+    "ruido_ocr": com_ruido_ocr,
+    "folha_de_rosto": com_folha_de_rosto,
+    "linhas_reordenadas": com_linhas_reordenadas,
+}
+
+def percentil(valores: list, fracao: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entradas", type=int, default=200_000)
+    parser.add_argument("--consultas", type=int, default=2000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--pasta", help="pasta do índice (padrão: temporária, apagada ao final)")
+    args = parser.parse_args()
+
+    pasta = args.pasta or tempfile.mkdtemp(prefix="bench_duplicatas_")
+    rnd = random.Random(args.semente)
+    try:
+        indice = IndiceDuplicatas(os.path.join(pasta, "duplicatas.sqlite3"))
+        entradas = max(1, args.entradas)
+        amostra = set(rnd.sample(range(entradas), min(entradas, max(1, args.consultas))))
+        originais = {}
+
+        inicio = time.perf_counter()
+        for primeiro in range(0, entradas, LOTE_REGISTROS):
+            with indice.lote():
+                for i in range(primeiro, min(entradas, primeiro + LOTE_REGISTROS)):
+                    texto = texto_nota(rnd)
+                    if i in amostra:
+                        originais[i] = texto
+                    indice.registrar(impressao_documento(texto), None, f"/notas/{i}.pdf", str(i), {"i": i})
+        segundos = time.perf_counter() - inicio
+        print(f"{len(indice)} notas registradas em {segundos:.1f} s ({entradas / segundos:.0f} notas/s)")
+
+        tempos = []
+        for nome, variacao in VARIACOES.items():
+            reconhecidas = 0
+            for i, texto in originais.items():
+                impressao = impressao_documento(variacao(texto, rnd))
+                inicio = time.perf_counter()
+                encontrada = indice.procurar(impressao, None, "/entrada/copia.pdf")
+                tempos.append(time.perf_counter() - inicio)
+                reconhecidas += encontrada is not None and encontrada[1]["i"] == i
+            print(f"{nome:20s} reconhecidas {reconhecidas}/{len(originais)} ({100.0 * reconhecidas / len(originais):.1f}%)")
+
+        confundidas = 0
+        for _ in range(len(originais)):
+            impressao = impressao_documento(texto_nota(rnd))
+            inicio = time.perf_counter()
+            confundidas += indice.procurar(impressao, None, "/entrada/nova.pdf") is not None
+            tempos.append(time.perf_counter() - inicio)
+        print(f"{'notas_novas':20s} confundidas {confundidas}/{len(originais)} ({100.0 * confundidas / len(originais):.2f}%)")
+
+        print(f"consulta: p50 {1000.0 * percentil(tempos, 0.5):.3f} ms  p99 {1000.0 * percentil(tempos, 0.99):.3f} ms  "
+              f"máximo {1000.0 * max(tempos):.3f} ms ({len(tempos)} consultas)")
+    finally:
+        if not args.pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
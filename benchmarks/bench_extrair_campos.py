@@ -0,0 +1,126 @@
+"""
+Micro-benchmark de `extrair_campos` contra a implementação anterior (uma busca por campo,
+com padrões não compilados e o texto dividido em linhas), reproduzida abaixo como referência.
+
+Mede o tempo nos dois corpora e confere que os campos extraídos são os mesmos
+(`data_emissao_nf`, que antes ficava sempre vazio, não entra na comparação):
+
+- sintético: notas longas no estilo de OCR (mesmo gerador de bench_reducao_texto.py);
+- adversarial: lixo de OCR que faz os padrões antigos retrocederem (palavras-chave repetidas
+  sem ':' na mesma linha, "CNPJ" seguido de longos trechos sem dígitos, espaços sem valor).
+
+    python benchmarks/bench_extrair_campos.py [--documentos 200] [--tamanho 20000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extrator_pdf import campos  # noqa: E402
+from bench_reducao_texto import corpus_sintetico  # noqa: E402
+
+CAMPOS_COMPARADOS = ["numero_nota", "prestador", "cnpj", "pagador", "cnpj_pagador", "forma_pagamento", "valor_total", "irrf"]
+
+def extrair_campos_original(texto):
+    resultado = {}
+
+    # Split text into lines and find NF number on the right side
+    linhas = texto.split('\n')
+    numero_nota = ""
+
+    for linha in linhas:
+        # Look for 8-digit number at the start of a line or after significant whitespace
+        match = re.search(r'(?:^|\s{2,})(\d{8})(?:\s|$)', linha)
+        if match:
+            numero_nota = match.group(1)
+            break
+
+    resultado["numero_nota"] = str(numero_nota) if numero_nota else ""
+
+    # Extração do prestador e CNPJ (existente)
+    prestador_match = re.search(r"(?:Prestador|Emitente).*?:\s*(.*)", texto, re.IGNORECASE)
+    resultado["prestador"] = prestador_match.group(1).strip() if prestador_match else ""
+
+    cnpj_match = re.search(r"CNPJ[^\d]*(\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2})", texto, re.IGNORECASE)
+    resultado["cnpj"] = cnpj_match.group(1) if cnpj_match else ""
+
+    # Extração do pagador
+    pagador_match = re.search(r"(?:Tomador|Cliente|Pagador).*?:\s*(.*?)(?:\n|CNPJ|$)", texto, re.IGNORECASE)
+    resultado["pagador"] = pagador_match.group(1).strip() if pagador_match else ""
+
+    # CNPJ do pagador (procura após o nome do pagador)
+    cnpj_pagador_match = re.search(r"(?:Tomador|Cliente|Pagador).*?(?:CNPJ[^\d]*(\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}))", texto, re.IGNORECASE)
+    resultado["cnpj_pagador"] = cnpj_pagador_match.group(1) if cnpj_pagador_match else ""
+
+    # Detecção de forma de pagamento
+    resultado["forma_pagamento"] = campos.detectar_forma_pagamento(texto)
+
+    valor_total_match = re.search(r"(?:Total a pagar|Valor Total da Nota|Total do contrato)[:\s]*R?\$?\s*([\d.,]+)", texto, re.IGNORECASE)
+    resultado["valor_total"] = valor_total_match.group(1) if valor_total_match else "0"
+
+    irrf_match = re.search(r"IRRF[:\s]*R?\$?\s*([\d.,]+)", texto, re.IGNORECASE)
+    resultado["irrf"] = irrf_match.group(1) if irrf_match else "0"
+
+    # --- Novos campos para corresponder à estrutura desejada ---
+    # Estes campos serão vazios a menos que você adicione lógica para preenchê-los
+    resultado["data_emissao_nf"] = ""
+    resultado["operacao"] = ""
+    resultado["observacoes"] = ""
+
+    return resultado
+
+def corpus_adversarial(tamanho: int, semente: int) -> list:
+    rnd = random.Random(semente)
+    return [
+        "Tomador " * (tamanho // 8) + "CNPJ" + " x" * (tamanho // 2),
+        ("CNPJ " + "abc " * 50) * (tamanho // 200),
+        "Valor Total da Nota" + " " * tamanho + "fim",
+        ("Prestador " * 20 + "\n") * (tamanho // 200),
+        "IRRF" + "\n" * tamanho + "R$",
+        "".join(rnd.choice("CNPJ Tomador:IRRF 0123456789/.-\n") for _ in range(tamanho)),
+    ]
+
+def medir(funcao, corpus: list, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in corpus:
+            funcao(texto)
+    return time.perf_counter() - inicio
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--tamanho", type=int, default=20000, help="Tamanho dos textos adversariais")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    corpora = {
+        "sintético": [texto for texto, _ in corpus_sintetico(args.documentos, args.semente)],
+        "adversarial": corpus_adversarial(args.tamanho, args.semente),
+    }
+    divergencias = 0
+    for nome, corpus in corpora.items():
+        for texto in corpus:
+            antigo = extrair_campos_original(texto)
+            novo = campos.extrair_campos(texto)
+            for campo in CAMPOS_COMPARADOS:
+                if antigo[campo] != novo[campo]:
+                    divergencias += 1
+                    print(f"[{nome}] {campo}: antes={antigo[campo]!r} agora={novo[campo]!r}")
+
+        tempo_antigo = medir(extrair_campos_original, corpus, args.repeticoes)
+        tempo_novo = medir(campos.extrair_campos, corpus, args.repeticoes)
+        documentos = len(corpus) * args.repeticoes
+        print(f"{nome}: {len(corpus)} textos, {sum(map(len, corpus))} caracteres")
+        print(f"   anterior: {1000.0 * tempo_antigo / documentos:8.3f} ms/documento")
+        print(f"   atual:    {1000.0 * tempo_novo / documentos:8.3f} ms/documento ({tempo_antigo / max(tempo_novo, 1e-9):.1f}x)")
+    print(f"Campos divergentes: {divergencias}")
+    return 0 if divergencias == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Mede e confere a fila compartilhada (`extrator_pdf.fila`) com vários processos locais.
+
+Para cada quantidade de processos em --processos, uma fila nova recebe --trabalhos arquivos e
+os processos a esvaziam em paralelo: cada trabalho "processado" é uma espera de --trabalho-ms e
+gera uma linha num CSV gravado pelo `GravadorResultados` com a trava da fila, como na linha de
+comando. Um processo extra reivindica um trabalho e é encerrado com os._exit (como um processo
+morto) sem concluir: o trabalho precisa ser retomado por outro depois que o lease vencer.
+
+Ao final de cada rodada confere que todos os trabalhos terminaram, que cada arquivo tem
+exatamente uma linha no CSV e informa trabalhos/s e a aceleração em relação a 1 processo.
+Retorna 1 se alguma conferência falhar.
+
+    python benchmarks/bench_fila.py [--trabalhos 200] [--trabalho-ms 50] [--processos 1 2 4] [--lease 2]
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+
+from extrator_pdf.fila import FilaTrabalhos, identificar_processo  # noqa: E402
+from extrator_pdf.saida import GravadorResultados, SaidaCSV  # noqa: E402
+
+COLUNAS = ["caminho_arquivo", "processo"]
+
+def esvaziar_fila(caminho_fila: str, caminho_csv: str, lease: float, trabalho_ms: float, morrer: bool) -> None:
+    fila = FilaTrabalhos(caminho_fila, duracao_lease=lease)
+    dono = identificar_processo()
+    if morrer:
+        fila.reivindicar(dono)
+        os._exit(1)
+    with fila.exclusiva():
+        saida = SaidaCSV(caminho_csv, COLUNAS)
+    with fila.batimento(dono), GravadorResultados({"sucesso": [saida]}, max_linhas=5, intervalo=0.5,
+                                                  trava=lambda contextos: fila.concluir(dono, contextos, [caminho_csv])) as gravador:
+        while True:
+            reivindicado = fila.reivindicar(dono)
+            if reivindicado is None:
+                quantidade, _ = fila.em_andamento_por_outros(dono)
+                if not quantidade:
+                    return
+                gravador.gravar()
+                time.sleep(lease / 4)
+                continue
+            caminho, _ = reivindicado
+            time.sleep(trabalho_ms / 1000.0)
+            gravador.adicionar("sucesso", {"caminho_arquivo": caminho, "processo": dono}, (caminho, {}, "sucesso"))
+
+def rodada(pasta: str, trabalhos: int, processos: int, lease: float, trabalho_ms: float) -> dict:
+    pasta_rodada = os.path.join(pasta, f"{processos}_processos")
+    os.makedirs(os.path.join(pasta_rodada, "pdfs"))
+    caminhos = []
+    for i in range(trabalhos):
+        caminho = os.path.join(pasta_rodada, "pdfs", f"nota_{i:05d}.pdf")
+        with open(caminho, "wb") as f:
+            f.write(b"%PDF-1.4\n")
+        caminhos.append(caminho)
+    caminho_fila = os.path.join(pasta_rodada, "fila_trabalhos.sqlite3")
+    caminho_csv = os.path.join(pasta_rodada, "saida.csv")
+    FilaTrabalhos(caminho_fila).enfileirar(caminhos)
+
+    contexto = multiprocessing.get_context("spawn")
+    morto = contexto.Process(target=esvaziar_fila, args=(caminho_fila, caminho_csv, lease, trabalho_ms, True))
+    morto.start()
+    morto.join()
+    inicio = time.perf_counter()
+    filhos = [contexto.Process(target=esvaziar_fila, args=(caminho_fila, caminho_csv, lease, trabalho_ms, False))
+              for _ in range(processos)]
+    for filho in filhos:
+        filho.start()
+    for filho in filhos:
+        filho.join()
+    segundos = time.perf_counter() - inicio
+
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        linhas = list(csv.DictReader(f, delimiter=";"))
+    por_caminho = {}
+    for linha in linhas:
+        por_caminho[linha["caminho_arquivo"]] = por_caminho.get(linha["caminho_arquivo"], 0) + 1
+    contagem = FilaTrabalhos(caminho_fila).contagem()
+    return {
+        "segundos": segundos,
+        "trabalhos_por_segundo": trabalhos / segundos,
+        "linhas": len(linhas),
+        "repetidos": sum(1 for quantidade in por_caminho.values() if quantidade > 1),
+        "faltando": len(set(map(os.path.abspath, caminhos)) - set(por_caminho)),
+        "contagem": contagem,
+        "ok": contagem == {"sucesso": trabalhos} and len(linhas) == trabalhos and len(por_caminho) == trabalhos,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trabalhos", type=int, default=200)
+    parser.add_argument("--trabalho-ms", type=float, default=50.0)
+    parser.add_argument("--processos", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--lease", type=float, default=2.0, help="duração do lease em segundos")
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_fila_")
+    falhas = 0
+    base = None
+    try:
+        for processos in args.processos:
+            resultado = rodada(pasta, max(1, args.trabalhos), processos, args.lease, args.trabalho_ms)
+            base = base or resultado["trabalhos_por_segundo"] / processos
+            print(f"{processos:2d} processo(s): {resultado['segundos']:6.2f} s  {resultado['trabalhos_por_segundo']:7.1f} trabalhos/s  "
+                  f"({resultado['trabalhos_por_segundo'] / base:.2f}x)  linhas {resultado['linhas']}  "
+                  f"repetidos {resultado['repetidos']}  faltando {resultado['faltando']}  {resultado['contagem']}"
+                  + ("" if resultado["ok"] else "  FALHOU"))
+            falhas += not resultado["ok"]
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Compara a vazão do pipeline com e sem lotes na DeepSeek, contra o servidor local de `stub_deepseek.py`.
+
+Gera NFS-e digitais curtas (`corpus_pdf.py`) e processa todas com `processar_arquivos`, como a
+linha de comando, com a DeepSeek sempre consultada (CONFIANCA_MINIMA_LOCAL acima de 1) e os
+caches desativados: uma vez sem lotes e uma vez para cada orçamento em --lote-tokens. Informa
+documentos/s, requisições e documentos por requisição, e confere que as linhas gravadas são as
+mesmas da execução sem lotes. Com --falhas-lote, o servidor troca o número da nota dessa fração
+dos documentos nas respostas em lote, que precisam ser recusadas e consultadas de novo, uma a uma.
+
+    python benchmarks/bench_lotes_deepseek.py [--documentos 40] [--latencia-llm 0.5] [--lote-tokens 4000 8000]
+                                              [--rpm 0] [--workers 1] [--falhas-lote 0.1]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+sys.path.insert(0, PASTA_BENCHMARKS)
+
+from corpus_pdf import gerar_corpus  # noqa: E402
+from stub_deepseek import ServidorDeepSeekFalso  # noqa: E402
+
+from extrator_pdf import config  # noqa: E402
+from extrator_pdf.cli import FIELDNAMES_ERRO, FIELDNAMES_SUCESSO  # noqa: E402
+from extrator_pdf.pipeline import processar_arquivos  # noqa: E402
+from extrator_pdf.saida import GravadorResultados, SaidaCSV  # noqa: E402
+
+def rodada(caminhos: list, pasta: str, nome: str, cfg: config.Extractor, servidor: ServidorDeepSeekFalso,
+           workers: int) -> dict:
+    config.ativar(cfg)
+    caminho_csv = os.path.join(pasta, f"{nome}.csv")
+    saidas = {"sucesso": [SaidaCSV(caminho_csv, FIELDNAMES_SUCESSO)],
+              "erro": [SaidaCSV(os.path.join(pasta, f"{nome}_erro.csv"), FIELDNAMES_ERRO)]}
+    requisicoes, documentos = servidor.requisicoes, servidor.documentos
+    por_metodo = {}
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), GravadorResultados(saidas) as gravador:
+        processar_arquivos(caminhos, {}, workers, gravador, por_metodo)
+    segundos = time.perf_counter() - inicio
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        linhas = {linha["Caminho do Arquivo"]: linha for linha in csv.DictReader(f, delimiter=";")}
+    return {
+        "segundos": segundos,
+        "documentos_por_segundo": len(caminhos) / segundos,
+        "requisicoes": servidor.requisicoes - requisicoes,
+        "documentos_enviados": servidor.documentos - documentos,
+        "linhas": linhas,
+        "por_metodo": por_metodo,
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=40)
+    parser.add_argument("--latencia-llm", type=float, default=0.5, help="Latência simulada de cada requisição, em segundos")
+    parser.add_argument("--lote-tokens", type=int, nargs="+", default=[4000, 8000], help="Orçamentos de tokens por lote")
+    parser.add_argument("--lote-documentos", type=int, default=16, help="Máximo de documentos por lote")
+    parser.add_argument("--rpm", type=float, default=0.0, help="Limite de requisições por minuto do cliente (0 = sem limite)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--falhas-lote", type=float, default=0.0, help="Fração de documentos com resposta em lote errada")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    pasta = tempfile.mkdtemp(prefix="bench_lotes_")
+    falhas = 0
+    try:
+        corpus = gerar_corpus(os.path.join(pasta, "corpus"), args.documentos, tipos=["digital_nfse"])
+        caminhos = [documento["caminho"] for documento in corpus]
+        os.environ["NO_PROXY"] = "127.0.0.1,localhost"
+        with ServidorDeepSeekFalso(latencia=args.latencia_llm, falhas_lote=args.falhas_lote) as servidor:
+            base = config.Extractor.do_ambiente().substituir(
+                deepseek_api_url=servidor.url, deepseek_api_key="benchmark", deepseek_requisicoes_por_minuto=args.rpm,
+                confianca_minima_local=1.1, cache_ocr_max_mb=0, cache_llm_max_mb=0, detectar_duplicatas=False,
+                deepseek_lote_documentos=args.lote_documentos, deepseek_lote_espera_segundos=3600.0
+            )
+            referencia = None
+            for lote_tokens in [0] + args.lote_tokens:
+                nome = f"lote_{lote_tokens}" if lote_tokens else "sem_lote"
+                resultado = rodada(caminhos, pasta, nome, base.substituir(deepseek_lote_tokens=lote_tokens), servidor, args.workers)
+                referencia = referencia or resultado
+                iguais = resultado["linhas"] == referencia["linhas"] and len(resultado["linhas"]) == len(caminhos)
+                falhas += not iguais
+                print(f"{nome:>11}: {resultado['segundos']:7.2f} s  {resultado['documentos_por_segundo']:6.2f} docs/s "
+                      f"({resultado['documentos_por_segundo'] / referencia['documentos_por_segundo']:.2f}x)  "
+                      f"{resultado['requisicoes']:4d} requisições  "
+                      f"{resultado['documentos_enviados'] / max(1, resultado['requisicoes']):5.2f} docs/requisição  "
+                      f"{resultado['por_metodo']}" + ("" if iguais else "  LINHAS DIFERENTES"))
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
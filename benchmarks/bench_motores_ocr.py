@@ -0,0 +1,90 @@
+"""
+Compara os motores de OCR (`extrator_pdf.motor_ocr`): o pytesseract, que executa o `tesseract`
+e recarrega o modelo do idioma a cada página, e o tesserocr, com motores persistentes.
+
+As páginas "escaneadas" são desenhadas em memória como no corpus sintético (`corpus_pdf.py`),
+sem o Poppler. Para cada motor instalado, informa o tempo da primeira página (inclui carregar
+o modelo), páginas/s com --threads threads e quantas páginas tiveram o mesmo texto (espaços
+normalizados) que o pytesseract. Motores não instalados são marcados como indisponíveis.
+
+    python benchmarks/bench_motores_ocr.py [--paginas 24] [--threads 2] [--semente 42]
+"""
+import argparse
+import concurrent.futures
+import os
+import random
+import sys
+import time
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+sys.path.insert(0, PASTA_BENCHMARKS)
+
+from corpus_pdf import gerar_gabarito, imagem_de_texto, linhas_cheque, linhas_nfse  # noqa: E402
+from extrator_pdf import config  # noqa: E402
+from extrator_pdf.motor_ocr import MOTORES_OCR, criar_motor_ocr  # noqa: E402
+
+def paginas_sinteticas(quantidade: int, semente: int) -> list:
+    rnd = random.Random(semente)
+    paginas = []
+    for i in range(quantidade):
+        linhas = linhas_cheque(rnd) if i % 4 == 3 else linhas_nfse(gerar_gabarito(rnd))
+        paginas.append(imagem_de_texto(linhas, rnd))
+    return paginas
+
+def medir_motor(nome: str, paginas: list, threads: int) -> dict:
+    config.ativar(config.Extractor.do_ambiente(motor_ocr=nome))
+    motor = criar_motor_ocr(config.atual())
+    if motor.nome != nome:
+        return {"indisponivel": f"pacote {nome} não instalado"}
+    try:
+        inicio = time.perf_counter()
+        motor.reconhecer(paginas[0])
+        primeira = time.perf_counter() - inicio
+    except Exception as e:
+        return {"indisponivel": f"Tesseract não encontrado ({str(e).splitlines()[0] if str(e) else type(e).__name__})"}
+    try:
+        inicio = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            textos = list(executor.map(motor.reconhecer, paginas))
+        segundos = time.perf_counter() - inicio
+    finally:
+        motor.fechar()
+    return {
+        "versao": motor.versao(),
+        "primeira_pagina_segundos": primeira,
+        "segundos": segundos,
+        "paginas_por_segundo": len(paginas) / segundos if segundos else None,
+        "textos": [" ".join(texto.split()) for texto in textos],
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=24)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    paginas = paginas_sinteticas(max(1, args.paginas), args.semente)
+    resultados = {nome: medir_motor(nome, paginas, max(1, args.threads)) for nome in MOTORES_OCR}
+
+    referencia = resultados["pytesseract"].get("textos")
+    for nome, resultado in resultados.items():
+        if "indisponivel" in resultado:
+            print(f"{nome:12s} indisponível: {resultado['indisponivel']}")
+            continue
+        linha = (f"{nome:12s} {resultado['versao']:>20s}  primeira página {1000.0 * resultado['primeira_pagina_segundos']:7.1f} ms  "
+                 f"{len(paginas)} páginas em {resultado['segundos']:.2f} s ({resultado['paginas_por_segundo']:.2f} páginas/s)")
+        if referencia is not None and nome != "pytesseract":
+            iguais = sum(a == b for a, b in zip(referencia, resultado["textos"]))
+            linha += f"  texto igual ao pytesseract em {iguais}/{len(paginas)}"
+        print(linha)
+
+    disponiveis = [r for r in resultados.values() if "indisponivel" not in r]
+    if len(disponiveis) == 2:
+        antes, depois = (resultados[nome]["paginas_por_segundo"] for nome in MOTORES_OCR)
+        print(f"tesserocr / pytesseract: {depois / antes:.2f}x páginas/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
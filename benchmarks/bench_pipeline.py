@@ -0,0 +1,301 @@
+"""
+Benchmark por etapa do pipeline, offline, sobre o corpus sintético de `corpus_pdf.py`.
+
+Cada etapa roda num processo novo (o pico de memória de uma não contamina a outra) e informa
+tempo total, documentos/s, páginas/s e pico de RSS. A DeepSeek é substituída pelo servidor
+local de `stub_deepseek.py` e os caches em disco ficam desativados. Etapas que dependem do
+Poppler ou do Tesseract são marcadas como ignoradas quando eles não estão instalados.
+
+Etapas:
+- importacao: `import extrator_pdf` num interpretador novo (--repeticoes-importacao vezes, mediana),
+  conferindo que nenhuma dependência pesada (pdfplumber, Poppler, Tesseract, requests) é carregada;
+- extrair_texto_pdf: texto nativo de todos os PDFs (pdfplumber);
+- pdf_para_imagens: renderização das páginas escaneadas;
+- extrair_texto_com_ocr: OCR das páginas escaneadas (já renderizadas fora da medição);
+- extrair_campos: regex sobre os textos dos PDFs digitais (--repeticoes vezes);
+- gravacao_resultados: --linhas linhas gravadas em CSV e JSONL pelo GravadorResultados;
+- pipeline: processar_arquivo_pdf de ponta a ponta em todos os PDFs.
+
+O resultado é gravado em JSON; com --comparar, etapas mais lentas ou com mais memória
+que a execução anterior além da --tolerancia são apontadas e o código de saída é 1.
+
+    python benchmarks/bench_pipeline.py [--corpus pasta] [--quantidade 4] [--saida bench.json]
+                                        [--comparar anterior.json] [--tolerancia 0.2]
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(PASTA_BENCHMARKS))
+sys.path.insert(0, PASTA_BENCHMARKS)
+
+from corpus_pdf import carregar_corpus, gerar_corpus  # noqa: E402
+from stub_deepseek import ServidorDeepSeekFalso  # noqa: E402
+
+ETAPAS = ["importacao", "extrair_texto_pdf", "pdf_para_imagens", "extrair_texto_com_ocr", "extrair_campos", "gravacao_resultados", "pipeline"]
+
+def pico_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None se não houver como medir)."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+# --- TEMPO DE IMPORTAÇÃO (interpretador novo) ---
+
+MODULOS_PESADOS = ["pdfplumber", "pdf2image", "pytesseract", "PIL", "requests", "dotenv"]
+
+_CODIGO_IMPORTACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+import extrator_pdf
+segundos = time.perf_counter() - inicio
+print(json.dumps({"segundos": segundos, "pesados": [m for m in %r if m in sys.modules]}))
+""" % (MODULOS_PESADOS,)
+
+def medir_importacao(repeticoes: int) -> dict:
+    """Mediana do tempo de `import extrator_pdf`, cada vez num processo Python novo."""
+    medicoes = []
+    for _ in range(max(1, repeticoes)):
+        saida = subprocess.run([sys.executable, "-c", _CODIGO_IMPORTACAO], cwd=os.path.dirname(PASTA_BENCHMARKS),
+                               capture_output=True, text=True, check=True).stdout
+        medicoes.append(json.loads(saida.strip().splitlines()[-1]))
+    tempos = sorted(medicao["segundos"] for medicao in medicoes)
+    return {
+        "segundos": round(tempos[len(tempos) // 2], 4),
+        "minimo_segundos": round(tempos[0], 4),
+        "repeticoes": len(tempos),
+        "modulos_pesados_carregados": sorted({m for medicao in medicoes for m in medicao["pesados"]}),
+    }
+
+# --- EXECUÇÃO DE UMA ETAPA (processo filho) ---
+
+def _configurar_pacote():
+    """Silencia o log do pacote e ativa a configuração do ambiente montado pelo processo principal."""
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()])
+    from extrator_pdf import config
+    config.ativar(config.Extractor.do_ambiente())
+    return config.atual()
+
+def _poppler_disponivel(cfg, caminho_pdf: str) -> bool:
+    try:
+        import pdf2image
+        pdf2image.pdfinfo_from_path(caminho_pdf, poppler_path=cfg.poppler_path or None)
+        return True
+    except Exception:
+        return False
+
+def _paginas_escaneadas(documento: dict) -> list:
+    """Índices das páginas escaneadas: no corpus elas são sempre as últimas."""
+    return list(range(documento["paginas"] - documento["paginas_escaneadas"], documento["paginas"]))
+
+def executar_etapa(etapa: str, pasta_corpus: str, opcoes: dict) -> dict:
+    import contextlib
+    import io
+
+    cfg = _configurar_pacote()
+    from extrator_pdf.campos import extrair_campos
+    from extrator_pdf.documento import extrair_texto_pdf
+    from extrator_pdf.ocr import extrair_texto_com_ocr, iterar_imagens_pdf, versao_tesseract
+    from extrator_pdf.pipeline import processar_arquivo_pdf
+    from extrator_pdf.saida import GravadorResultados, SaidaCSV, SaidaJSONL
+
+    corpus = carregar_corpus(pasta_corpus)
+    escaneados = [doc for doc in corpus if doc["paginas_escaneadas"]]
+    documentos = paginas = 0
+    extras = {}
+
+    # Preparação (fora da medição)
+    if etapa in ("pdf_para_imagens", "extrair_texto_com_ocr"):
+        if not escaneados or not _poppler_disponivel(cfg, escaneados[0]["caminho"]):
+            return {"ignorada": "Poppler não encontrado"}
+    if etapa == "extrair_texto_com_ocr":
+        if versao_tesseract() == "desconhecida":
+            return {"ignorada": "Tesseract não encontrado"}
+        imagens = [img for doc in escaneados for _, img in iterar_imagens_pdf(doc["caminho"], _paginas_escaneadas(doc))]
+    if etapa == "extrair_campos":
+        textos = [extrair_texto_pdf(doc["caminho"]) for doc in corpus if not doc["paginas_escaneadas"]]
+    if etapa == "gravacao_resultados":
+        pasta_saida = tempfile.mkdtemp(prefix="bench_saida_")
+        fieldnames = ["DATA EMISSÃO NF", "NOME FORNECEDOR", "NÚMERO NF", "VALOR", "Caminho do Arquivo"]
+        linha = {"DATA EMISSÃO NF": "05/03/2024", "NOME FORNECEDOR": "FORNECEDOR LTDA", "NÚMERO NF": "00012345",
+                 "VALOR": "1.234,56", "Caminho do Arquivo": "H:\\Notas\\nota.pdf"}
+
+    rss_inicial = pico_rss_mb()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if etapa == "extrair_texto_pdf":
+            for doc in corpus:
+                extrair_texto_pdf(doc["caminho"])
+                documentos += 1
+                paginas += doc["paginas"]
+        elif etapa == "pdf_para_imagens":
+            for doc in escaneados:
+                for _, img in iterar_imagens_pdf(doc["caminho"], _paginas_escaneadas(doc)):
+                    paginas += 1
+                    del img
+                documentos += 1
+        elif etapa == "extrair_texto_com_ocr":
+            for img in imagens:
+                extrair_texto_com_ocr(img)
+                paginas += 1
+            documentos = len(escaneados)
+        elif etapa == "extrair_campos":
+            for _ in range(opcoes["repeticoes"]):
+                for texto in textos:
+                    extrair_campos(texto)
+                    documentos += 1
+        elif etapa == "gravacao_resultados":
+            saidas = [SaidaCSV(os.path.join(pasta_saida, "bench.csv"), fieldnames),
+                      SaidaJSONL(os.path.join(pasta_saida, "bench.jsonl"), fieldnames)]
+            with GravadorResultados({"sucesso": saidas}) as gravador:
+                for _ in range(opcoes["linhas"]):
+                    gravador.adicionar("sucesso", linha)
+                    documentos += 1
+        elif etapa == "pipeline":
+            destinos = {}
+            for doc in corpus:
+                resultado = processar_arquivo_pdf(doc["caminho"])
+                destinos[resultado["destino"]] = destinos.get(resultado["destino"], 0) + 1
+                documentos += 1
+                paginas += doc["paginas"]
+            extras["destinos"] = destinos
+        else:
+            raise ValueError(f"Etapa desconhecida: {etapa}")
+    segundos = time.perf_counter() - inicio
+
+    metricas = {
+        "segundos": round(segundos, 4),
+        "documentos": documentos,
+        "documentos_por_segundo": round(documentos / segundos, 2) if segundos else None,
+        "rss_inicial_mb": round(rss_inicial, 1) if rss_inicial is not None else None,
+        "pico_rss_mb": round(pico_rss_mb(), 1) if rss_inicial is not None else None,
+    }
+    if paginas:
+        metricas["paginas"] = paginas
+        metricas["paginas_por_segundo"] = round(paginas / segundos, 2) if segundos else None
+    metricas.update(extras)
+    return metricas
+
+# --- COMPARAÇÃO ---
+
+def comparar(atual: dict, anterior: dict, tolerancia: float) -> list:
+    """Regressões (etapa, métrica, antes, depois) acima da tolerância relativa."""
+    regressoes = []
+    for etapa, metricas in atual["etapas"].items():
+        base = anterior.get("etapas", {}).get(etapa)
+        if not base or "ignorada" in metricas or "ignorada" in base:
+            continue
+        for metrica in ("segundos", "pico_rss_mb"):
+            antes, depois = base.get(metrica), metricas.get(metrica)
+            if antes and depois and depois > antes * (1 + tolerancia):
+                regressoes.append((etapa, metrica, antes, depois))
+    return regressoes
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PASTA_BENCHMARKS,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="", help="Pasta com corpus.json (padrão: gera um corpus temporário)")
+    parser.add_argument("--quantidade", type=int, default=4, help="PDFs de cada tipo no corpus gerado")
+    parser.add_argument("--paginas-longo", type=int, default=60)
+    parser.add_argument("--etapas", default=",".join(ETAPAS))
+    parser.add_argument("--repeticoes", type=int, default=20, help="Repetições da etapa extrair_campos")
+    parser.add_argument("--linhas", type=int, default=5000, help="Linhas da etapa gravacao_resultados")
+    parser.add_argument("--repeticoes-importacao", type=int, default=5, help="Importações medidas na etapa importacao")
+    parser.add_argument("--latencia-llm", type=float, default=0.2, help="Latência simulada da DeepSeek, em segundos")
+    parser.add_argument("--saida", default="bench_pipeline.json")
+    parser.add_argument("--comparar", default="", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora relativa tolerada na comparação")
+    args = parser.parse_args()
+
+    pasta_corpus = args.corpus or tempfile.mkdtemp(prefix="bench_corpus_")
+    if not os.path.exists(os.path.join(pasta_corpus, "corpus.json")):
+        gerar_corpus(pasta_corpus, args.quantidade, args.paginas_longo)
+    corpus = carregar_corpus(pasta_corpus)
+
+    # Configuração herdada pelos processos das etapas
+    os.environ["DEEPSEEK_API_KEY"] = "benchmark"
+    os.environ["CACHE_OCR_MAX_MB"] = "0"
+    os.environ["CACHE_LLM_MAX_MB"] = "0"
+    os.environ["NO_PROXY"] = "127.0.0.1,localhost"
+    if os.name != "nt":
+        os.environ.setdefault("POPPLER_PATH", "")
+        os.environ.setdefault("TESSERACT_PATH", "tesseract")
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "corpus": {
+            "pasta": pasta_corpus,
+            "documentos": len(corpus),
+            "paginas": sum(doc["paginas"] for doc in corpus),
+            "paginas_escaneadas": sum(doc["paginas_escaneadas"] for doc in corpus),
+        },
+        "latencia_llm": args.latencia_llm,
+        "etapas": {},
+    }
+    opcoes = {"repeticoes": args.repeticoes, "linhas": args.linhas}
+    contexto = multiprocessing.get_context("spawn")
+    with ServidorDeepSeekFalso(latencia=args.latencia_llm) as servidor:
+        os.environ["DEEPSEEK_API_URL"] = servidor.url
+        for etapa in [e.strip() for e in args.etapas.split(",") if e.strip()]:
+            if etapa == "importacao":
+                metricas = medir_importacao(args.repeticoes_importacao)
+                resultado["etapas"][etapa] = metricas
+                pesados = ", ".join(metricas["modulos_pesados_carregados"]) or "nenhuma"
+                print(f"{etapa:<22} {metricas['segundos']:>9.3f} s  (mínimo {metricas['minimo_segundos']:.3f} s; "
+                      f"dependências pesadas carregadas: {pesados})")
+                continue
+            requisicoes_antes = servidor.requisicoes
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                metricas = executor.submit(executar_etapa, etapa, pasta_corpus, opcoes).result()
+            if etapa == "pipeline":
+                metricas["requisicoes_llm"] = servidor.requisicoes - requisicoes_antes
+            resultado["etapas"][etapa] = metricas
+            if "ignorada" in metricas:
+                print(f"{etapa:<22} ignorada: {metricas['ignorada']}")
+                continue
+            print(f"{etapa:<22} {metricas['segundos']:>9.3f} s  {metricas['documentos_por_segundo'] or 0:>9.1f} docs/s  "
+                  f"{metricas.get('paginas_por_segundo') or 0:>8.1f} págs/s  pico RSS {metricas['pico_rss_mb']} MB")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+        regressoes = comparar(resultado, anterior, args.tolerancia)
+        for etapa, metrica, antes, depois in regressoes:
+            print(f"REGRESSÃO {etapa}.{metrica}: {antes} -> {depois} ({100.0 * (depois / antes - 1):+.0f}%)")
+        if regressoes:
+            return 1
+        print(f"Sem regressões acima de {100.0 * args.tolerancia:.0f}% em relação a {args.comparar}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Compara o texto completo com o texto reduzido por `reduzir_texto_para_llm`.
+
+Para cada documento do corpus verifica se os valores dos campos continuam presentes
+no texto reduzido e se `extrair_campos` encontra os mesmos valores nos dois textos.
+Sem argumentos usa um corpus sintético de notas longas (OCR com tabelas e texto legal);
+com --pasta usa os PDFs reais da pasta informada (sem gabarito, só a comparação).
+
+    python benchmarks/bench_reducao_texto.py [--documentos 200] [--pasta H:\\Notas]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extrator_pdf import campos, deepseek, documento  # noqa: E402
+
+CAMPOS_COMPARADOS = ["numero_nota", "prestador", "cnpj", "pagador", "cnpj_pagador", "valor_total", "irrf"]
+
+PARAGRAFO_LEGAL = (
+    "Documento emitido por ME ou EPP optante pelo Simples Nacional. Não gera direito a crédito fiscal de IPI. "
+    "A retenção dos tributos federais observa a legislação vigente e as instruções normativas aplicáveis. "
+)
+
+def _cnpj_aleatorio(rnd: random.Random) -> str:
+    d = [rnd.randint(0, 9) for _ in range(12)]
+    return f"{d[0]}{d[1]}.{d[2]}{d[3]}{d[4]}.{d[5]}{d[6]}{d[7]}/{d[8]}{d[9]}{d[10]}{d[11]}-{rnd.randint(10, 99)}"
+
+def gerar_nota_longa(rnd: random.Random, paginas: int) -> tuple:
+    """Texto no estilo de OCR de uma NFS-e com várias páginas e o gabarito dos campos."""
+    gabarito = {
+        "numero_nota": f"{rnd.randint(1, 99999999):08d}",
+        "prestador": f"FORNECEDOR {rnd.randint(1, 9999)} SERVICOS LTDA",
+        "cnpj": _cnpj_aleatorio(rnd),
+        "pagador": f"CLIENTE {rnd.randint(1, 9999)} SA",
+        "cnpj_pagador": _cnpj_aleatorio(rnd),
+        "valor_total": f"{rnd.randint(100, 99999)},{rnd.randint(0, 99):02d}",
+        "irrf": f"{rnd.randint(1, 999)},{rnd.randint(0, 99):02d}",
+        "data_emissao": f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/20{rnd.randint(20, 25)}",
+    }
+    linhas = [
+        "PREFEITURA MUNICIPAL",
+        "NOTA FISCAL DE SERVIÇOS ELETRÔNICA - NFS-e",
+        "Número da Nota",
+        gabarito["numero_nota"],
+        f"Data e Hora de Emissão {gabarito['data_emissao']} 10:15:00",
+        f"Prestador de Serviços: {gabarito['prestador']}",
+        f"CNPJ: {gabarito['cnpj']}",
+        f"Tomador de Serviços: {gabarito['pagador']} CNPJ: {gabarito['cnpj_pagador']}",
+    ]
+    for pagina in range(paginas):
+        linhas.append(f"--- página {pagina + 1} ---")
+        for item in range(40):
+            linhas.append(
+                f"{item:03d}  SERVICO DE MANUTENCAO ITEM {rnd.randint(1000, 9999)}  "
+                f"QTD {rnd.randint(1, 50)}  UN  {rnd.randint(1, 999)},{rnd.randint(0, 99):02d}"
+            )
+        linhas.extend([PARAGRAFO_LEGAL] * 6)
+    linhas.insert(rnd.randint(10, len(linhas) - 1), f"Valor Total da Nota: R$ {gabarito['valor_total']}")
+    linhas.insert(rnd.randint(10, len(linhas) - 1), f"IRRF: R$ {gabarito['irrf']}")
+    return "\n".join(linhas), gabarito
+
+def corpus_sintetico(documentos: int, semente: int) -> list:
+    rnd = random.Random(semente)
+    return [gerar_nota_longa(rnd, rnd.randint(1, 12)) for _ in range(documentos)]
+
+def corpus_pasta(pasta: str) -> list:
+    corpus = []
+    for caminho in sorted(glob.glob(os.path.join(pasta, "**", "*.pdf"), recursive=True)):
+        try:
+            corpus.append((documento.extrair_texto_pdf(caminho), None))
+        except Exception as e:
+            print(f"Ignorando {caminho}: {str(e)}")
+    return corpus
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--pasta", default="", help="Usa os PDFs desta pasta em vez do corpus sintético")
+    args = parser.parse_args()
+
+    corpus = corpus_pasta(args.pasta) if args.pasta else corpus_sintetico(args.documentos, args.semente)
+    caracteres_originais = caracteres_reduzidos = 0
+    valores_ausentes = divergencias_regex = 0
+    tempo = 0.0
+    for texto, gabarito in corpus:
+        inicio = time.perf_counter()
+        reduzido = deepseek.reduzir_texto_para_llm(texto)
+        tempo += time.perf_counter() - inicio
+        caracteres_originais += len(texto)
+        caracteres_reduzidos += len(reduzido)
+
+        if gabarito:
+            valores_ausentes += sum(1 for valor in gabarito.values() if valor not in reduzido)
+        campos_completo = campos.extrair_campos(texto)
+        campos_reduzido = campos.extrair_campos(reduzido)
+        divergencias_regex += sum(1 for campo in CAMPOS_COMPARADOS if campos_completo[campo] != campos_reduzido[campo])
+
+    total = max(1, len(corpus))
+    print(f"Documentos: {len(corpus)}")
+    print(f"Caracteres: {caracteres_originais} -> {caracteres_reduzidos} "
+          f"({100.0 * caracteres_reduzidos / max(1, caracteres_originais):.1f}% do original)")
+    print(f"Tokens estimados: {deepseek.estimar_tokens('x' * caracteres_originais)} -> {deepseek.estimar_tokens('x' * caracteres_reduzidos)}")
+    print(f"Tempo médio de redução: {1000.0 * tempo / total:.2f} ms/documento")
+    if not args.pasta:
+        print(f"Valores do gabarito ausentes no texto reduzido: {valores_ausentes}")
+    print(f"Campos do extrair_campos que mudaram com a redução: {divergencias_regex}")
+    return 0 if valores_ausentes == 0 and divergencias_regex == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
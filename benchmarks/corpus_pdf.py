@@ -0,0 +1,249 @@
+"""
+Gera um corpus sintético de PDFs para os benchmarks, sem dependências além do Pillow:
+
+- digital: NFS-e e DANFE com camada de texto;
+- escaneado: NFS-e e cheques só com imagem (sem texto nativo, exigem OCR);
+- misto: primeira página com texto e as demais escaneadas;
+- longo: NFS-e com dezenas de páginas de itens.
+
+Cada documento vem com o gabarito dos campos. O índice fica em `corpus.json` na pasta.
+
+    python benchmarks/corpus_pdf.py pasta_destino [--quantidade 4] [--paginas-longo 60]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import zlib
+
+from PIL import Image, ImageDraw, ImageFont
+
+LARGURA_PONTOS, ALTURA_PONTOS = 595, 842  # A4
+DPI_ESCANEADO = 150
+
+# --- GERAÇÃO DE CAMPOS ---
+
+def gerar_cnpj(rnd: random.Random) -> str:
+    """CNPJ formatado com dígitos verificadores válidos."""
+    digitos = [rnd.randint(0, 9) for _ in range(8)] + [0, 0, 0, 1]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    d = "".join(map(str, digitos))
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+def gerar_gabarito(rnd: random.Random) -> dict:
+    return {
+        "numero_nota": f"{rnd.randint(1, 99999999):08d}",
+        "prestador": f"FORNECEDOR {rnd.randint(1, 9999)} SERVICOS LTDA",
+        "cnpj": gerar_cnpj(rnd),
+        "pagador": f"CLIENTE {rnd.randint(1, 9999)} SA",
+        "valor_total": f"{rnd.randint(100, 99999)},{rnd.randint(0, 99):02d}",
+        "irrf": f"{rnd.randint(1, 999)},{rnd.randint(0, 99):02d}",
+        "data_emissao": f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/20{rnd.randint(20, 25)}",
+    }
+
+def linhas_itens(rnd: random.Random, quantidade: int) -> list:
+    return [
+        f"{item:03d}  SERVICO DE MANUTENCAO ITEM {rnd.randint(1000, 9999)}  QTD {rnd.randint(1, 50)}  UN  "
+        f"{rnd.randint(1, 999)},{rnd.randint(0, 99):02d}"
+        for item in range(quantidade)
+    ]
+
+def linhas_nfse(gabarito: dict) -> list:
+    return [
+        "PREFEITURA MUNICIPAL DE SÃO PAULO",
+        "NOTA FISCAL DE SERVIÇOS ELETRÔNICA - NFS-e",
+        "Número da Nota",
+        gabarito["numero_nota"],
+        f"Data e Hora de Emissão {gabarito['data_emissao']} 10:15:00",
+        f"Prestador de Serviços: {gabarito['prestador']}",
+        f"CNPJ: {gabarito['cnpj']}",
+        f"Tomador de Serviços: {gabarito['pagador']}",
+        "Município: São Paulo",
+        "Discriminação dos serviços: consultoria técnica em sistemas",
+        f"Valor Total da Nota: R$ {gabarito['valor_total']}",
+        f"IRRF: R$ {gabarito['irrf']}",
+        "Pagamento: depósito Itaú",
+    ]
+
+def linhas_danfe(gabarito: dict) -> list:
+    return [
+        "DANFE - DOCUMENTO AUXILIAR DA NOTA FISCAL ELETRÔNICA",
+        "0 - ENTRADA  1 - SAÍDA",
+        f"Nº {gabarito['numero_nota']}  SÉRIE 1",
+        gabarito["numero_nota"],
+        f"Emitente: {gabarito['prestador']}",
+        f"CNPJ {gabarito['cnpj']}",
+        f"Data de Emissão: {gabarito['data_emissao']}",
+        f"Destinatário: {gabarito['pagador']}",
+        f"Valor Total da Nota: R$ {gabarito['valor_total']}",
+        "Informações complementares: boleto Bradesco",
+    ]
+
+def linhas_cheque(rnd: random.Random) -> list:
+    return [
+        f"BANCO DO BRASIL  AGÊNCIA {rnd.randint(1000, 9999)}  CONTA CORRENTE {rnd.randint(10000, 99999)}-{rnd.randint(0, 9)}",
+        f"CHEQUE Nº {rnd.randint(100000, 999999)}",
+        f"PAGUE POR ESTE CHEQUE A QUANTIA DE R$ {rnd.randint(100, 9999)},00",
+        "A FORNECEDOR EXEMPLO LTDA OU À SUA ORDEM",
+        "COMPENSAÇÃO 001",
+    ]
+
+# --- ESCRITA DO PDF ---
+
+def _escapar_texto_pdf(texto: str) -> bytes:
+    dados = texto.encode("cp1252", errors="replace")
+    return dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _conteudo_texto(linhas: list) -> bytes:
+    partes = [b"BT /F1 10 Tf 40 800 Td 12 TL"]
+    for linha in linhas:
+        partes.append(b"(" + _escapar_texto_pdf(linha) + b") Tj T*")
+    partes.append(b"ET")
+    return b"\n".join(partes)
+
+def _fonte_imagem() -> ImageFont.ImageFont:
+    for nome in ("DejaVuSans.ttf", "arial.ttf"):
+        try:
+            return ImageFont.truetype(nome, 20)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+def imagem_de_texto(linhas: list, rnd: random.Random) -> Image.Image:
+    """Página "escaneada": texto desenhado numa imagem em tons de cinza, com leve ruído."""
+    largura = int(LARGURA_PONTOS * DPI_ESCANEADO / 72)
+    altura = int(ALTURA_PONTOS * DPI_ESCANEADO / 72)
+    imagem = Image.new("L", (largura, altura), 255)
+    desenho = ImageDraw.Draw(imagem)
+    fonte = _fonte_imagem()
+    y = 80
+    for linha in linhas:
+        if y > altura - 60:
+            break
+        desenho.text((80 + rnd.randint(-2, 2), y), linha, fill=rnd.randint(0, 40), font=fonte)
+        y += 26
+    for _ in range(400):
+        desenho.point((rnd.randrange(largura), rnd.randrange(altura)), fill=rnd.randint(120, 200))
+    return imagem
+
+def escrever_pdf(caminho: str, paginas: list) -> None:
+    """
+    Escreve um PDF mínimo. Cada página é uma lista de linhas (camada de texto, Helvetica)
+    ou uma imagem PIL (página escaneada, JPEG ocupando a página inteira).
+    """
+    objetos = []
+
+    def adicionar(dados: bytes) -> int:
+        objetos.append(dados)
+        return len(objetos)
+
+    fonte = adicionar(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    id_paginas = adicionar(b"")
+    filhos = []
+    for pagina in paginas:
+        if isinstance(pagina, Image.Image):
+            buffer = io.BytesIO()
+            pagina.save(buffer, format="JPEG", quality=75)
+            jpeg = buffer.getvalue()
+            imagem = adicionar(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Filter /DCTDecode /Length %d >>\nstream\n" % (pagina.width, pagina.height, len(jpeg))
+                + jpeg + b"\nendstream"
+            )
+            conteudo = b"q %d 0 0 %d 0 0 cm /Im1 Do Q" % (LARGURA_PONTOS, ALTURA_PONTOS)
+            recursos = b"<< /XObject << /Im1 %d 0 R >> >>" % imagem
+        else:
+            conteudo = zlib.compress(_conteudo_texto(pagina))
+            recursos = b"<< /Font << /F1 %d 0 R >> >>" % fonte
+        filtro = b"" if isinstance(pagina, Image.Image) else b" /Filter /FlateDecode"
+        id_conteudo = adicionar(b"<< /Length %d%s >>\nstream\n" % (len(conteudo), filtro) + conteudo + b"\nendstream")
+        filhos.append(adicionar(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R /Resources %s >>"
+            % (id_paginas, LARGURA_PONTOS, ALTURA_PONTOS, id_conteudo, recursos)
+        ))
+    objetos[id_paginas - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % filho for filho in filhos), len(filhos)
+    )
+    catalogo = adicionar(b"<< /Type /Catalog /Pages %d 0 R >>" % id_paginas)
+
+    saida = bytearray(b"%PDF-1.4\n")
+    deslocamentos = []
+    for numero, dados in enumerate(objetos, 1):
+        deslocamentos.append(len(saida))
+        saida += b"%d 0 obj\n" % numero + dados + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for deslocamento in deslocamentos:
+        saida += b"%010d 00000 n \n" % deslocamento
+    saida += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, catalogo, inicio_xref)
+    with open(caminho, "wb") as f:
+        f.write(saida)
+
+# --- CORPUS ---
+
+TIPOS_DOCUMENTO = ["digital_nfse", "digital_danfe", "escaneado_nfse", "escaneado_cheque", "misto", "longo"]
+
+def gerar_documento(tipo: str, rnd: random.Random, paginas_longo: int) -> tuple:
+    """Retorna (páginas, gabarito) do tipo pedido; cheques não têm gabarito."""
+    gabarito = gerar_gabarito(rnd)
+    if tipo == "digital_nfse":
+        return [linhas_nfse(gabarito) + linhas_itens(rnd, 30)], gabarito
+    if tipo == "digital_danfe":
+        return [linhas_danfe(gabarito) + linhas_itens(rnd, 30)], gabarito
+    if tipo == "escaneado_nfse":
+        return [imagem_de_texto(linhas_nfse(gabarito) + linhas_itens(rnd, 20), rnd)], gabarito
+    if tipo == "escaneado_cheque":
+        return [imagem_de_texto(linhas_cheque(rnd), rnd)], None
+    if tipo == "misto":
+        return [linhas_nfse(gabarito) + linhas_itens(rnd, 30)] + [
+            imagem_de_texto(linhas_itens(rnd, 40), rnd) for _ in range(2)
+        ], gabarito
+    if tipo == "longo":
+        return [linhas_nfse(gabarito) + linhas_itens(rnd, 30)] + [
+            linhas_itens(rnd, 60) for _ in range(paginas_longo - 1)
+        ], gabarito
+    raise ValueError(f"Tipo de documento desconhecido: {tipo}")
+
+def gerar_corpus(pasta: str, quantidade: int = 4, paginas_longo: int = 60, semente: int = 42,
+                 tipos: list = None) -> list:
+    """Gera `quantidade` PDFs de cada tipo em `pasta` e grava o índice `corpus.json`."""
+    rnd = random.Random(semente)
+    os.makedirs(pasta, exist_ok=True)
+    indice = []
+    for tipo in tipos or TIPOS_DOCUMENTO:
+        for numero in range(quantidade):
+            paginas, gabarito = gerar_documento(tipo, rnd, paginas_longo)
+            caminho = os.path.join(pasta, f"{tipo}_{numero:03d}.pdf")
+            escrever_pdf(caminho, paginas)
+            indice.append({
+                "caminho": os.path.abspath(caminho),
+                "tipo": tipo,
+                "paginas": len(paginas),
+                "paginas_escaneadas": sum(1 for pagina in paginas if isinstance(pagina, Image.Image)),
+                "gabarito": gabarito,
+            })
+    with open(os.path.join(pasta, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump(indice, f, ensure_ascii=False, indent=1)
+    return indice
+
+def carregar_corpus(pasta: str) -> list:
+    with open(os.path.join(pasta, "corpus.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pasta")
+    parser.add_argument("--quantidade", type=int, default=4, help="PDFs de cada tipo")
+    parser.add_argument("--paginas-longo", type=int, default=60)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+    indice = gerar_corpus(args.pasta, args.quantidade, args.paginas_longo, args.semente)
+    print(f"{len(indice)} PDFs ({sum(doc['paginas'] for doc in indice)} páginas) gerados em {args.pasta}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Servidor HTTP local que imita o endpoint de chat da DeepSeek, para benchmarks sem rede.
+
+Responde no formato da API (`choices[0].message.content` com o JSON dos campos), extraindo
+os campos do texto recebido com expressões simples, depois de uma latência configurável.
+Mensagens com vários documentos ("### DOCUMENTO <id>", o formato dos lotes) recebem
+{"documentos": [...]} com um objeto por documento; uma fração `falhas_lote` deles volta com o
+número da nota trocado, como uma resposta que misturou documentos.
+Aponte `DEEPSEEK_API_URL` (ou `Extractor.deepseek_api_url`) para `ServidorDeepSeekFalso.url`.
+"""
+import http.server
+import json
+import random
+import re
+import threading
+import time
+
+_PADROES_CAMPOS = {
+    "numero_nota": re.compile(r"(?m)^\s*(\d{8})\s*$"),
+    "prestador": re.compile(r"(?:Prestador de Servi\w+|Emitente)\s*:\s*(.+)"),
+    "cnpj": re.compile(r"CNPJ\D{0,5}(\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2})"),
+    "pagador": re.compile(r"(?:Tomador de Servi\w+|Destinat\w+rio)\s*:\s*(.+)"),
+    "valor_total": re.compile(r"Valor Total da Nota\s*:\s*R\$\s*([\d.,]+)"),
+    "irrf": re.compile(r"IRRF\s*:\s*R\$\s*([\d.,]+)"),
+    "data_emissao": re.compile(r"Emiss\w+\D{0,20}(\d{2}/\d{2}/\d{4})"),
+}
+
+def extrair_campos_falsos(texto: str) -> dict:
+    campos = {}
+    for campo, padrao in _PADROES_CAMPOS.items():
+        match = padrao.search(texto)
+        campos[campo] = match.group(1).strip() if match else ""
+    campos["operacao"] = "Prestação de serviços"
+    campos["observacoes"] = ""
+    return campos
+
+_DOCUMENTO_LOTE = re.compile(r"(?m)^### DOCUMENTO (\S+)\n")
+
+class ServidorDeepSeekFalso:
+    """Servidor em thread própria; `requisicoes` conta as chamadas recebidas e `documentos`, os documentos nelas."""
+
+    def __init__(self, latencia: float = 0.0, porta: int = 0, falhas_lote: float = 0.0, semente: int = 0):
+        self.latencia = latencia
+        self.falhas_lote = falhas_lote
+        self.requisicoes = 0
+        self.documentos = 0
+        self._sorteio = random.Random(semente)
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Tratador(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                tamanho = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(tamanho) or b"{}")
+                with servidor._lock:
+                    servidor.requisicoes += 1
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                texto = payload.get("messages", [{}])[-1].get("content", "")
+                resposta = servidor.responder(texto)
+                corpo = json.dumps({
+                    "choices": [{"message": {"role": "assistant", "content": json.dumps(resposta, ensure_ascii=False)}}],
+                    "usage": {"prompt_tokens": len(texto) // 4},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *_):
+                pass
+
+        self._http = http.server.ThreadingHTTPServer(("127.0.0.1", porta), Tratador)
+        self._http.daemon_threads = True
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def responder(self, texto: str) -> dict:
+        partes = _DOCUMENTO_LOTE.split(texto)
+        if len(partes) == 1:
+            with self._lock:
+                self.documentos += 1
+            return extrair_campos_falsos(texto)
+        documentos = []
+        for id_documento, trecho in zip(partes[1::2], partes[2::2]):
+            campos = {"id": id_documento, **extrair_campos_falsos(trecho)}
+            with self._lock:
+                self.documentos += 1
+                if self._sorteio.random() < self.falhas_lote:
+                    campos["numero_nota"] = "99999999"
+            documentos.append(campos)
+        return {"documentos": documentos}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._http.server_address[1]}/v1/chat/completions"
+
+    def __enter__(self) -> "ServidorDeepSeekFalso":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._http.shutdown()
+        self._http.server_close()
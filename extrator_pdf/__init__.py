@@ -0,0 +1,24 @@
+"""
+Extrator de dados de notas fiscais em PDF.
+
+Uso como biblioteca::
+
+    from extrator_pdf import Extractor
+
+    extractor = Extractor(deepseek_api_key="...", pasta_cache="cache")
+    resultado = extractor.process_pdf("nota.pdf")
+    if resultado.sucesso:
+        print(resultado.dados["valor_total"])
+
+Importar o pacote não configura o logging, não lê o ini.env e não carrega o pdfplumber,
+o Poppler, o Tesseract nem o requests: cada um é importado na primeira vez que é usado.
+"""
+import logging
+
+from .config import Extractor, process_pdf
+from .resultado import Result
+
+# Sem handlers próprios: quem usa o pacote decide para onde vai o log (a linha de comando configura o seu)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+__all__ = ["Extractor", "Result", "process_pdf"]
@@ -0,0 +1,190 @@
+"""
+Armazém dos resultados: um banco SQLite ao lado dos CSVs com uma linha por documento gravado.
+
+Guarda o que o CSV perde: valores em número, CNPJ e número da nota normalizados, data de
+emissão em ISO (AAAA-MM-DD), hash do arquivo, camada de extração e tempos. Também guarda a linha
+exata gravada no CSV, de onde `python -m extrator_pdf.consulta export` gera as saídas de novo,
+só com as linhas que ainda não foram exportadas.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_DOCUMENTOS = (
+    "destino", "caminho", "hash_arquivo", "tipo_documento", "metodo", "cnpj", "numero_nota", "prestador",
+    "data_emissao", "valor_total", "irrf", "valor_liquido", "duplicata_de", "truncado", "segundos",
+    "etapas", "dados", "linha", "gravado_em",
+)
+
+def normalizar_cnpj(cnpj: Any) -> str:
+    return re.sub(r"\D", "", str(cnpj or ""))
+
+def normalizar_numero_nota(numero_nota: Any) -> str:
+    """Número da nota sem zeros à esquerda ("00012345" e "12345" são a mesma nota)."""
+    return str(numero_nota or "").strip().lstrip("0")
+
+def data_iso(data: Any) -> Optional[str]:
+    """DD/MM/AAAA → AAAA-MM-DD; None se a data não for válida."""
+    try:
+        return datetime.strptime(str(data or "").strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def registro_do_resultado(pdf_path: str, resultado: Dict[str, Any], hash_arquivo: str = "",
+                          metricas: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Linha do armazém para o resultado de `processar_arquivo_pdf` (depois de gravado na saída)."""
+    dados = resultado.get("dados", {})
+    linha = resultado.get("linha", {})
+    return {
+        "destino": resultado["destino"],
+        "caminho": pdf_path,
+        "hash_arquivo": hash_arquivo or None,
+        "tipo_documento": resultado.get("tipo_documento") or linha.get("tipo_documento"),
+        "metodo": resultado.get("metodo") or None,
+        "cnpj": normalizar_cnpj(dados.get("cnpj")) or None,
+        "numero_nota": normalizar_numero_nota(dados.get("numero_nota")) or None,
+        "prestador": dados.get("prestador") or None,
+        "data_emissao": data_iso(dados.get("data_emissao_nf")),
+        "valor_total": dados.get("valor_total"),
+        "irrf": dados.get("irrf"),
+        "valor_liquido": dados.get("valor_liquido"),
+        "duplicata_de": resultado.get("duplicata_de") or None,
+        "truncado": int(bool(resultado.get("truncado"))),
+        "segundos": (metricas or {}).get("total", resultado.get("segundos")),
+        "etapas": json.dumps(metricas["etapas"]) if metricas and metricas.get("etapas") else None,
+        "dados": json.dumps(dados, ensure_ascii=False) if dados else None,
+        "linha": json.dumps(linha, ensure_ascii=False),
+        "gravado_em": datetime.now().isoformat(timespec="seconds"),
+    }
+
+class ArmazemResultados:
+    """
+    Banco de resultados com índices por CNPJ + número da nota, data de emissão e caminho.
+    Como a fila, fica na pasta de saída (às vezes um compartilhamento de rede), então usa o
+    journal de rollback em vez do WAL, a menos que `wal` seja True.
+    """
+
+    def __init__(self, caminho: str, wal: bool = False):
+        self.caminho = caminho
+        self.wal = wal
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._trava = threading.RLock()
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, timeout=60, check_same_thread=False, isolation_level=None)
+            self._conexao.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS documentos ("
+                " id INTEGER PRIMARY KEY, destino TEXT NOT NULL, caminho TEXT NOT NULL, hash_arquivo TEXT,"
+                " tipo_documento TEXT, metodo TEXT, cnpj TEXT, numero_nota TEXT, prestador TEXT, data_emissao TEXT,"
+                " valor_total REAL, irrf REAL, valor_liquido REAL, duplicata_de TEXT, truncado INTEGER NOT NULL DEFAULT 0,"
+                " segundos REAL, etapas TEXT, dados TEXT, linha TEXT NOT NULL, gravado_em TEXT NOT NULL)"
+            )
+            for nome, colunas in (("chave", "cnpj, numero_nota"), ("data_emissao", "data_emissao"),
+                                  ("caminho", "caminho"), ("destino", "destino, id")):
+                self._conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_documentos_{nome} ON documentos ({colunas})")
+            # Última linha de cada destino já exportada para cada arquivo de saída
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS exportacoes ("
+                " saida TEXT PRIMARY KEY, destino TEXT NOT NULL, ultimo_id INTEGER NOT NULL, exportado_em TEXT NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._conexao
+
+    def gravar_lote(self, registros: List[Dict[str, Any]]) -> None:
+        """Acrescenta os registros de `registro_do_resultado` numa única transação."""
+        if not registros:
+            return
+        with self._trava:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                conexao.executemany(
+                    f"INSERT INTO documentos ({', '.join(COLUNAS_DOCUMENTOS)})"
+                    f" VALUES ({', '.join('?' * len(COLUNAS_DOCUMENTOS))})",
+                    [tuple(registro.get(coluna) for coluna in COLUNAS_DOCUMENTOS) for registro in registros]
+                )
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            conexao.execute("COMMIT")
+        logger.info(f"{len(registros)} registro(s) gravados em {self.caminho}")
+
+    def consultar(self, sql: str, parametros: Tuple[Any, ...] = ()) -> List[sqlite3.Row]:
+        with self._trava:
+            cursor = self._conectar().execute(sql, parametros)
+            cursor.row_factory = sqlite3.Row
+            return cursor.fetchall()
+
+    def procurar_nota(self, cnpj: str, numero_nota: str) -> List[sqlite3.Row]:
+        """Documentos com o CNPJ e o número da nota (só os de sucesso têm campos), do mais recente ao mais antigo."""
+        return self.consultar(
+            "SELECT * FROM documentos WHERE cnpj = ? AND numero_nota = ? ORDER BY id DESC",
+            (normalizar_cnpj(cnpj), normalizar_numero_nota(numero_nota))
+        )
+
+    def totais_por_fornecedor(self, inicio: Optional[str] = None, fim: Optional[str] = None) -> List[sqlite3.Row]:
+        """
+        Notas e soma do valor líquido por CNPJ do prestador, com data de emissão em [inicio, fim]
+        (AAAA-MM-DD). Cada nota (CNPJ + número) conta uma vez, pela gravação mais recente, mesmo
+        que tenha sido reprocessada ou recebida em duplicata.
+        """
+        # Sem filtrar pelo destino (só os de sucesso têm CNPJ), para a consulta usar o índice da data
+        filtros, parametros = ["cnpj IS NOT NULL", "numero_nota IS NOT NULL"], []
+        if inicio:
+            filtros.append("data_emissao >= ?")
+            parametros.append(inicio)
+        if fim:
+            filtros.append("data_emissao <= ?")
+            parametros.append(fim)
+        return self.consultar(
+            "SELECT cnpj, MAX(prestador) AS prestador, COUNT(*) AS notas, ROUND(SUM(valor_liquido), 2) AS valor_liquido"
+            " FROM documentos WHERE id IN (SELECT MAX(id) FROM documentos"
+            f" WHERE {' AND '.join(filtros)} GROUP BY cnpj, numero_nota)"
+            " GROUP BY cnpj ORDER BY valor_liquido DESC",
+            tuple(parametros)
+        )
+
+    def linhas_desde(self, destino: str, ultimo_id: int, limite: int = 1000) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(id, linha da saída) dos documentos de `destino` gravados depois de `ultimo_id`, em ordem."""
+        while True:
+            lote = self.consultar(
+                "SELECT id, linha FROM documentos WHERE destino = ? AND id > ? ORDER BY id LIMIT ?",
+                (destino, ultimo_id, limite)
+            )
+            if not lote:
+                return
+            for linha in lote:
+                yield linha["id"], json.loads(linha["linha"])
+            ultimo_id = lote[-1]["id"]
+
+    def ultimo_exportado(self, saida: str) -> int:
+        linhas = self.consultar("SELECT ultimo_id FROM exportacoes WHERE saida = ?", (os.path.abspath(saida),))
+        return linhas[0]["ultimo_id"] if linhas else 0
+
+    def marcar_exportado(self, saida: str, destino: str, ultimo_id: int) -> None:
+        with self._trava:
+            self._conectar().execute(
+                "INSERT INTO exportacoes (saida, destino, ultimo_id, exportado_em) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (saida) DO UPDATE SET ultimo_id = excluded.ultimo_id, exportado_em = excluded.exportado_em",
+                (os.path.abspath(saida), destino, ultimo_id, datetime.now().isoformat(timespec="seconds"))
+            )
+
+def abrir_armazem(pasta_saida: str) -> Optional[ArmazemResultados]:
+    """Armazém `resultados.sqlite3` da pasta de saída, ou None com `armazem_resultados` desligado."""
+    cfg = config.atual()
+    if not cfg.armazem_resultados:
+        return None
+    return ArmazemResultados(os.path.join(pasta_saida, "resultados.sqlite3"), cfg.fila_wal)
@@ -0,0 +1,167 @@
+"""Caches persistentes em SQLite (OCR por página e respostas da DeepSeek)."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class CacheDisco:
+    """
+    Cache persistente chave → valor (JSON) em SQLite, com limite de tamanho e
+    despejo do que foi acessado há mais tempo (LRU) e validade opcional.
+
+    O banco usa WAL, então vários processos podem ler e gravar ao mesmo tempo.
+    A conexão é aberta no primeiro uso, já dentro do processo que vai usá-la.
+    """
+
+    def __init__(self, caminho: str, limite_mb: float, validade_segundos: Optional[float] = None, nome: str = "cache"):
+        self.caminho = caminho
+        self.limite_bytes = int(limite_mb * 1024 * 1024)
+        self.validade_segundos = validade_segundos
+        self.nome = nome
+        self.acertos = 0
+        self.falhas = 0
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._trava = threading.Lock()
+        self._gravacoes = 0
+        # Quando True, as consultas são ignoradas mas os novos resultados continuam sendo gravados
+        self.ignorar_leitura = False
+
+    @property
+    def habilitado(self) -> bool:
+        return self.limite_bytes > 0
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " chave TEXT PRIMARY KEY, valor TEXT NOT NULL, tamanho INTEGER NOT NULL,"
+                " criado_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_cache_acessado_em ON cache (acessado_em)")
+            self._pid = os.getpid()
+        return self._conexao
+
+    @staticmethod
+    def _hash_chave(chave: str) -> str:
+        return hashlib.sha256(chave.encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Optional[Any]:
+        """Valor guardado para a chave, ou None se ausente/expirado."""
+        chave_hash = self._hash_chave(chave)
+        agora = time.time()
+        with self._trava:
+            try:
+                conexao = self._conectar()
+                linha = conexao.execute("SELECT valor, criado_em FROM cache WHERE chave = ?", (chave_hash,)).fetchone()
+                if linha is not None and self.validade_segundos is not None and agora - linha[1] > self.validade_segundos:
+                    conexao.execute("DELETE FROM cache WHERE chave = ?", (chave_hash,))
+                    linha = None
+                if linha is None:
+                    self.falhas += 1
+                    return None
+                conexao.execute("UPDATE cache SET acessado_em = ? WHERE chave = ?", (agora, chave_hash))
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao ler o {self.nome}: {str(e)}")
+                self.falhas += 1
+                return None
+        self.acertos += 1
+        return json.loads(linha[0])
+
+    def gravar(self, chave: str, valor: Any) -> None:
+        conteudo = json.dumps(valor, ensure_ascii=False)
+        agora = time.time()
+        with self._trava:
+            try:
+                conexao = self._conectar()
+                conexao.execute(
+                    "INSERT OR REPLACE INTO cache (chave, valor, tamanho, criado_em, acessado_em) VALUES (?, ?, ?, ?, ?)",
+                    (self._hash_chave(chave), conteudo, len(conteudo.encode("utf-8")), agora, agora)
+                )
+                self._gravacoes += 1
+                if self._gravacoes % 50 == 1:
+                    self._despejar(conexao)
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao gravar no {self.nome}: {str(e)}")
+
+    def _despejar(self, conexao: sqlite3.Connection) -> None:
+        """Remove entradas expiradas e, acima do limite, as acessadas há mais tempo."""
+        if self.validade_segundos is not None:
+            conexao.execute("DELETE FROM cache WHERE criado_em < ?", (time.time() - self.validade_segundos,))
+        total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM cache").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        # Libera até 90% do limite para não despejar a cada gravação
+        excesso = total - int(self.limite_bytes * 0.9)
+        removidos = 0
+        for chave, tamanho in conexao.execute("SELECT chave, tamanho FROM cache ORDER BY acessado_em").fetchall():
+            if excesso <= 0:
+                break
+            conexao.execute("DELETE FROM cache WHERE chave = ?", (chave,))
+            excesso -= tamanho
+            removidos += 1
+        logger.info(f"{self.nome}: {removidos} entradas antigas removidas para respeitar o limite de tamanho")
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {"acertos": self.acertos, "falhas": self.falhas}
+
+    def acumular(self, estatisticas: Dict[str, int]) -> None:
+        """Soma contadores vindos de um processo worker."""
+        self.acertos += estatisticas.get("acertos", 0)
+        self.falhas += estatisticas.get("falhas", 0)
+
+_caches: Dict[str, CacheDisco] = {}
+_caches_de: Optional[config.Extractor] = None
+
+def caches() -> Dict[str, CacheDisco]:
+    """Caches da configuração ativa, criados no primeiro uso (a conexão só é aberta na primeira consulta)."""
+    global _caches, _caches_de
+    cfg = config.atual()
+    if _caches_de is not cfg:
+        cache_llm = CacheDisco(
+            os.path.join(cfg.pasta_cache, "llm.sqlite3"),
+            cfg.cache_llm_max_mb,
+            validade_segundos=cfg.cache_llm_validade_dias * 24 * 3600,
+            nome="cache da DeepSeek"
+        )
+        cache_llm.ignorar_leitura = cfg.ignorar_cache_llm
+        _caches = {
+            "ocr": CacheDisco(os.path.join(cfg.pasta_cache, "ocr.sqlite3"), cfg.cache_ocr_max_mb, nome="cache de OCR"),
+            "llm": cache_llm,
+        }
+        _caches_de = cfg
+    return _caches
+
+def cache_ocr() -> CacheDisco:
+    return caches()["ocr"]
+
+def cache_llm() -> CacheDisco:
+    return caches()["llm"]
+
+def estatisticas_caches() -> Dict[str, Dict[str, int]]:
+    return {nome: cache.estatisticas() for nome, cache in caches().items()}
+
+def acumular_estatisticas_caches(estatisticas: Dict[str, Dict[str, int]]) -> None:
+    for nome, contadores in estatisticas.items():
+        caches()[nome].acumular(contadores)
+
+def registrar_estatisticas_caches() -> None:
+    """Registra no log os acertos/falhas dos caches ao final da execução."""
+    for cache in caches().values():
+        if not cache.habilitado:
+            continue
+        consultas = cache.acertos + cache.falhas
+        taxa = 100.0 * cache.acertos / consultas if consultas else 0.0
+        logger.info(f"{cache.nome[0].upper() + cache.nome[1:]}: {cache.acertos} acertos, {cache.falhas} falhas ({taxa:.1f}% de acerto)")
+
@@ -0,0 +1,78 @@
+"""Extração em camadas: regex validado primeiro, DeepSeek só quando a confiança é baixa."""
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import config
+from .campos import completar_com_campos_locais, extrair_campos, pontuar_campos_locais, validar_campos_locais
+from .deepseek import extrair_campos_descritivos_com_deepseek, extrair_com_deepseek
+from .duplicatas import METODO_DUPLICATA
+from .metricas import medir_etapa
+
+logger = logging.getLogger(__name__)
+
+# Camada que produziu cada linha, registrada no CSV de sucesso e no resumo da execução
+METODO_LOCAL = "Regex"
+METODO_LOCAL_COMPLETADO = "Regex+DeepSeek"
+METODO_DEEPSEEK = "DeepSeek"
+METODO_DEEPSEEK_COMPLETADO = "DeepSeek+Regex"
+METODO_FALLBACK = "Regex (fallback)"
+
+def precisa_deepseek(dados_regex: Dict[str, Any]) -> bool:
+    """Se a extração local ficou abaixo de `confianca_minima_local` (a DeepSeek será consultada)."""
+    return pontuar_campos_locais(validar_campos_locais(dados_regex)) < config.atual().confianca_minima_local
+
+def extrair_campos_em_camadas(
+    texto: str,
+    dados_regex: Optional[Dict[str, Any]] = None,
+    extrair_deepseek: Callable[[str], Optional[Dict[str, Any]]] = extrair_com_deepseek,
+    extrair_descritivos: Callable[[str], Optional[Dict[str, Any]]] = extrair_campos_descritivos_com_deepseek
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Extrai os campos primeiro por regex e só chama a DeepSeek se a fração de campos validados
+    ficar abaixo de `confianca_minima_local`. Com a extração local confiável e
+    `deepseek_campos_descritivos`, a DeepSeek é consultada só pelos campos que o regex não extrai
+    (operação e observações). Retorna os dados e o método (camada) que os produziu.
+    `dados_regex` reaproveita o resultado de `extrair_campos` já calculado para o mesmo texto, e
+    `extrair_deepseek` permite usar uma resposta já obtida (ex.: de uma requisição em lote).
+    """
+    if dados_regex is None:
+        with medir_etapa("regex"):
+            dados_regex = extrair_campos(texto)
+    validacao = validar_campos_locais(dados_regex)
+    confianca = pontuar_campos_locais(validacao)
+    if confianca >= config.atual().confianca_minima_local:
+        if not config.atual().deepseek_campos_descritivos:
+            print(f"Extração local confiável (confiança {confianca:.2f}); DeepSeek dispensada.")
+            return dados_regex, METODO_LOCAL
+        print(f"Extração local confiável (confiança {confianca:.2f}); consultando DeepSeek só por operação e observações...")
+        descritivos = extrair_descritivos(texto)
+        if descritivos is None:
+            print("DeepSeek falhou; operação e observações ficam vazias.")
+            logger.warning("Operação e observações não obtidas da DeepSeek; mantida a extração local")
+            return dados_regex, METODO_LOCAL
+        return {**dados_regex, **descritivos}, METODO_LOCAL_COMPLETADO
+
+    invalidos = [campo for campo, valido in validacao.items() if not valido]
+    print(f"Confiança da extração local {confianca:.2f} (campos não validados: {', '.join(invalidos)}). Consultando DeepSeek...")
+    dados_deepseek = extrair_deepseek(texto)
+    if dados_deepseek is not None:
+        dados, completados = completar_com_campos_locais(dados_deepseek, dados_regex, validacao)
+        if completados:
+            print(f" Campos vazios da DeepSeek completados pelo regex: {', '.join(completados)}")
+            return dados, METODO_DEEPSEEK_COMPLETADO
+        return dados, METODO_DEEPSEEK
+
+    print("DeepSeek falhou ou retornou dados incompletos. Usando Regex...")
+    return dados_regex, METODO_FALLBACK
+
+def registrar_resumo_metodos(documentos_por_metodo: Dict[str, int]) -> None:
+    """Exibe quantos documentos cada camada resolveu e a fração resolvida sem chamar a API."""
+    total = sum(documentos_por_metodo.values())
+    if not total:
+        return
+    sem_api = documentos_por_metodo.get(METODO_LOCAL, 0) + documentos_por_metodo.get(METODO_DUPLICATA, 0)
+    detalhes = ", ".join(f"{metodo}: {qtd}" for metodo, qtd in sorted(documentos_por_metodo.items()))
+    resumo = f"Resolvidos sem a DeepSeek: {sem_api} de {total} documentos ({100.0 * sem_api / total:.1f}%) [{detalhes}]"
+    logger.info(resumo)
+    print(f"\n{resumo}")
+
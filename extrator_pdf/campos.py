@@ -0,0 +1,302 @@
+"""Extração dos campos por regex, classificação por palavras-chave, validação e formatação de valores."""
+import functools
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from .metricas import medir_etapa
+
+# --- EXTRAÇÃO DE CAMPOS POR REGEX ---
+
+# Palavras-chave (em minúsculas) que antecedem cada campo
+_PALAVRAS_CHAVE_CAMPOS = {
+    "prestador": "prestador", "emitente": "prestador",
+    "tomador": "tomador", "cliente": "tomador", "pagador": "tomador",
+    "cnpj": "cnpj",
+    "total a pagar": "valor_total", "valor total da nota": "valor_total", "total do contrato": "valor_total",
+    "irrf": "irrf",
+    "emissão": "emissao", "emissao": "emissao",
+}
+# Uma única varredura localiza todas as palavras-chave. Só com alternativas literais (sem grupos)
+# o `re` usa o caminho rápido de busca; o tipo do campo vem do trecho encontrado.
+_PADRAO_GATILHOS = "|".join(map(re.escape, _PALAVRAS_CHAVE_CAMPOS))
+_REGEX_GATILHOS = re.compile(_PADRAO_GATILHOS)
+_REGEX_GATILHOS_SEM_CAIXA = re.compile(_PADRAO_GATILHOS, re.IGNORECASE)
+# Padrões aplicados a partir do fim da palavra-chave, com a mesma semântica dos padrões
+# originais, mas sem quantificadores sobrepostos que retrocedem em textos longos
+_REGEX_NOME_APOS_DOIS_PONTOS = re.compile(r"[^\n:]*:\s*(.*)")
+_REGEX_PAGADOR_APOS_DOIS_PONTOS = re.compile(r"[^\n:]*:\s*(.*?)(?:\n|CNPJ|$)", re.IGNORECASE)
+_REGEX_VALOR = re.compile(r"[:\s]*(?:(?:R\$?|\$)\s*)?([\d.,]+)", re.IGNORECASE)
+_REGEX_NUMERO_CNPJ = re.compile(r"\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}")
+_REGEX_DIGITO = re.compile(r"\d")
+_REGEX_DATA = re.compile(r"\d{2}/\d{2}/\d{4}")
+# Número da NF: 8 dígitos no início da linha ou após 2+ espaços, seguidos de espaço/fim de linha
+_REGEX_NUMERO_NOTA = re.compile(r"(?:^|(?<=[^\S\n]{2}))(\d{8})(?=\s|$)", re.MULTILINE)
+# Distância máxima entre "emissão" e a data para considerá-la a data de emissão
+DISTANCIA_DATA_EMISSAO = 80
+_CAMPOS_PALAVRAS_CHAVE = ("prestador", "cnpj", "pagador", "cnpj_pagador", "valor_total", "irrf", "data_emissao_nf")
+
+def extrair_campos(texto):
+    """
+    Extrai os campos da nota por regex (fallback da DeepSeek) numa única varredura das
+    palavras-chave, que termina assim que todos os campos são encontrados. Cada campo é resolvido
+    com um padrão ancorado na palavra-chave, então o tempo é linear mesmo em saídas de OCR
+    degeneradas. Número da NF e primeira data são buscas que param na primeira ocorrência.
+    """
+    # Minúsculas permitem o caminho rápido sem IGNORECASE; se `lower()` mudar o tamanho do
+    # texto (caracteres raros), as posições não batem e a busca usa IGNORECASE no original
+    minusculo = texto.lower()
+    regex = _REGEX_GATILHOS if len(minusculo) == len(texto) else _REGEX_GATILHOS_SEM_CAIXA
+    base = minusculo if regex is _REGEX_GATILHOS else texto
+
+    campos: Dict[str, str] = {}
+    linha_sem_dois_pontos_ate = {"prestador": -1, "tomador": -1}
+    tomador_pendente = -1         # fim do primeiro Tomador/Cliente/Pagador da linha que ainda espera um CNPJ
+    fim_linha_tomador = -1
+    proximo_digito = -1           # primeiro dígito após o último "CNPJ" e o número que começa nele
+    numero_cnpj = None
+
+    for gatilho in regex.finditer(base):
+        inicio, fim = gatilho.span()
+        tipo = _PALAVRAS_CHAVE_CAMPOS[gatilho.group(0).lower()]
+        if tipo in ("prestador", "tomador"):
+            campo = "prestador" if tipo == "prestador" else "pagador"
+            if campo not in campos and fim > linha_sem_dois_pontos_ate[tipo]:
+                regex_nome = _REGEX_NOME_APOS_DOIS_PONTOS if tipo == "prestador" else _REGEX_PAGADOR_APOS_DOIS_PONTOS
+                match = regex_nome.match(texto, fim)
+                if match:
+                    campos[campo] = match.group(1).strip()
+                else:
+                    # Sem ':' até o fim da linha: os próximos gatilhos desta linha também falhariam
+                    quebra = texto.find("\n", fim)
+                    linha_sem_dois_pontos_ate[tipo] = quebra if quebra != -1 else len(texto)
+            if tipo == "tomador" and inicio >= fim_linha_tomador:
+                tomador_pendente = fim
+                quebra = texto.find("\n", fim)
+                fim_linha_tomador = quebra if quebra != -1 else len(texto)
+        elif tipo == "cnpj":
+            # `CNPJ[^\d]*(...)`: só o primeiro dígito após a palavra-chave pode iniciar o número
+            if fim > proximo_digito:
+                match = _REGEX_DIGITO.search(texto, fim)
+                proximo_digito = match.start() if match else len(texto)
+                match = _REGEX_NUMERO_CNPJ.match(texto, proximo_digito)
+                numero_cnpj = match.group(0) if match else None
+            if numero_cnpj:
+                campos.setdefault("cnpj", numero_cnpj)
+                if tomador_pendente != -1 and inicio < fim_linha_tomador:
+                    campos.setdefault("cnpj_pagador", numero_cnpj)
+        elif tipo in ("valor_total", "irrf"):
+            if tipo not in campos:
+                match = _REGEX_VALOR.match(texto, fim)
+                if match:
+                    campos[tipo] = match.group(1)
+        elif tipo == "emissao" and "data_emissao_nf" not in campos:
+            match = _REGEX_DATA.search(texto, fim, fim + DISTANCIA_DATA_EMISSAO + 10)
+            if match and match.start() - fim <= DISTANCIA_DATA_EMISSAO:
+                campos["data_emissao_nf"] = match.group(0)
+
+        if len(campos) == len(_CAMPOS_PALAVRAS_CHAVE):
+            break
+
+    numero_nota = _REGEX_NUMERO_NOTA.search(texto)
+    if "data_emissao_nf" not in campos:
+        primeira_data = _REGEX_DATA.search(texto)
+        campos["data_emissao_nf"] = primeira_data.group(0) if primeira_data else ""
+
+    resultado = {
+        "numero_nota": numero_nota.group(1) if numero_nota else "",
+        "prestador": campos.get("prestador", ""),
+        "cnpj": campos.get("cnpj", ""),
+        "pagador": campos.get("pagador", ""),
+        "cnpj_pagador": campos.get("cnpj_pagador", ""),
+        # Detecção de forma de pagamento
+        "forma_pagamento": detectar_forma_pagamento(texto),
+        "valor_total": campos.get("valor_total", "0"),
+        "irrf": campos.get("irrf", "0"),
+        # Data logo após "emissão"; sem isso, a primeira data do documento
+        "data_emissao_nf": campos["data_emissao_nf"],
+        # Estes campos serão vazios a menos que você adicione lógica para preenchê-los
+        "operacao": "",
+        "observacoes": "",
+    }
+    return resultado
+
+# --- PALAVRAS-CHAVE DE CLASSIFICAÇÃO ---
+
+# Palavras procuradas no texto em minúsculas, por categoria (classificação do documento e forma de pagamento)
+PALAVRAS_CHAVE_CATEGORIAS = {
+    # Palavras-chave para cheque
+    "cheque": ["cheque", "pague por este", "compensação", "banco", "agência", "conta corrente", "cheque n"],
+    # Palavras-chave para nota fiscal (reforçadas)
+    "nota_fiscal": ["nota fiscal", "nf-e", "nfse", "danfe", "prestador", "tomador", "emitente", "valor total", "irrf", "município", "serviços"],
+    # Referências ao Itaú
+    "itau": ["itau", "itaú", "banco 341"],
+    # Referências a outros bancos
+    "outros_bancos": ["banco", "bradesco", "santander", "bb", "banco do brasil", "caixa"],
+}
+
+def _ordenar_palavras_chave(categorias: Dict[str, List[str]]) -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    Palavras distintas, das mais curtas para as mais longas, cada uma com as palavras menores
+    contidas nela: se uma delas não aparece no texto, a maior também não aparece e nem é buscada.
+    """
+    palavras = sorted({palavra for lista in categorias.values() for palavra in lista}, key=lambda p: (len(p), p))
+    return [(palavra, tuple(outra for outra in palavras if outra != palavra and outra in palavra)) for palavra in palavras]
+
+_PALAVRAS_CHAVE_ORDENADAS = _ordenar_palavras_chave(PALAVRAS_CHAVE_CATEGORIAS)
+
+@functools.lru_cache(maxsize=4)
+def categorias_palavras_chave(texto: str) -> frozenset:
+    """
+    Categorias de PALAVRAS_CHAVE_CATEGORIAS presentes no texto. Uma única cópia em minúsculas,
+    cada palavra buscada no máximo uma vez, e o resultado fica em memória para que a classificação
+    e a forma de pagamento do mesmo texto compartilhem a varredura.
+    """
+    minusculo = texto.lower()
+    presentes = set()
+    for palavra, contidas in _PALAVRAS_CHAVE_ORDENADAS:
+        if all(outra in presentes for outra in contidas) and palavra in minusculo:
+            presentes.add(palavra)
+    return frozenset(
+        categoria for categoria, palavras in PALAVRAS_CHAVE_CATEGORIAS.items()
+        if any(palavra in presentes for palavra in palavras)
+    )
+
+def detectar_forma_pagamento(texto: str) -> str:
+    """Detecta a forma de pagamento baseado no conteúdo do PDF."""
+    categorias = categorias_palavras_chave(texto)
+
+    if "itau" in categorias:
+        return "B"
+
+    if "outros_bancos" in categorias:
+        return "D"
+
+    return ""  # Retorna vazio se não encontrar referência a bancos
+
+def classificar_tipo_documento(texto: str) -> str:
+    with medir_etapa("classificacao"):
+        categorias = categorias_palavras_chave(texto)
+
+    if "cheque" in categorias:
+        return "CHEQUE"
+
+    if "nota_fiscal" in categorias:
+        return "NOTA_FISCAL"
+
+    return "DESCONHECIDO"
+
+# --- VALIDAÇÃO DOS CAMPOS ---
+
+_PESOS_CNPJ_DV1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+_PESOS_CNPJ_DV2 = [6] + _PESOS_CNPJ_DV1
+
+def validar_cnpj(cnpj: str) -> bool:
+    """Confere os dígitos verificadores de um CNPJ (com ou sem pontuação)."""
+    digitos = [int(c) for c in str(cnpj) if c.isdigit()]
+    if len(digitos) != 14 or len(set(digitos)) == 1:
+        return False
+    for pesos in (_PESOS_CNPJ_DV1, _PESOS_CNPJ_DV2):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        if digitos[len(pesos)] != (0 if resto < 2 else 11 - resto):
+            return False
+    return True
+
+def validar_data(data: str) -> bool:
+    try:
+        datetime.strptime(str(data).strip(), "%d/%m/%Y")
+        return True
+    except ValueError:
+        return False
+
+def validar_campos_locais(dados: Dict[str, Any]) -> Dict[str, bool]:
+    """
+    Indica, campo a campo, se o valor encontrado pelo regex é confiável: número da NF com 8 dígitos,
+    prestador com letras, CNPJ com dígitos verificadores corretos, valor total positivo e data válida.
+    """
+    prestador = str(dados.get("prestador", "")).strip()
+    return {
+        "numero_nota": bool(re.fullmatch(r"\d{8}", str(dados.get("numero_nota", "")).strip())),
+        "prestador": len(prestador) >= 3 and any(c.isalpha() for c in prestador),
+        "cnpj": validar_cnpj(dados.get("cnpj", "")),
+        "valor_total": parse_valor(dados.get("valor_total", "0")) > 0,
+        "data_emissao_nf": validar_data(dados.get("data_emissao_nf", "")),
+    }
+
+def pontuar_campos_locais(validacao: Dict[str, bool]) -> float:
+    """Fração dos campos validados (0 a 1)."""
+    return sum(validacao.values()) / len(validacao) if validacao else 0.0
+
+def completar_com_campos_locais(dados_deepseek: Dict[str, Any], dados_regex: Dict[str, Any],
+                                validacao: Dict[str, bool]) -> Tuple[Dict[str, Any], List[str]]:
+    """Preenche os campos que a DeepSeek deixou vazios com os valores validados do regex."""
+    dados = dict(dados_deepseek)
+    completados = []
+    for campo, valido in validacao.items():
+        vazio = not str(dados.get(campo) or "").strip() or (campo == "valor_total" and parse_valor(dados.get(campo)) == 0)
+        if valido and vazio:
+            dados[campo] = dados_regex[campo]
+            completados.append(campo)
+    return dados, completados
+
+def parse_valor(valor_str: str) -> float:
+    if not valor_str:
+        return 0.0
+    
+    try:
+        if isinstance(valor_str, (int, float)):
+            return float(valor_str)
+        
+        valor_str = str(valor_str).strip()
+        valor_limpo = re.sub(r'[R$\s]', '', valor_str)
+        valor_limpo = re.sub(r'[^\d,.]', '', valor_limpo)
+        
+        if not valor_limpo:
+            print(f"Valor vazio após limpeza: '{valor_str}'")
+            return 0.0
+            
+        valor_limpo = valor_limpo.replace(',', '.')
+        
+        if valor_limpo.count('.') > 1:
+            partes = valor_limpo.split('.')
+            valor_limpo = ''.join(partes[:-1]) + '.' + partes[-1]
+        
+        resultado = float(valor_limpo)
+        
+        if not isinstance(resultado, float) or not math.isfinite(resultado):
+            print(f"Resultado inválido: '{resultado}' para entrada '{valor_str}'")
+            return 0.0
+            
+        return resultado
+        
+    except (ValueError, TypeError) as e:
+        print(f"Erro ao converter valor: '{valor_str}'. Erro: {str(e)}")
+        return 0.0
+
+# --- VALORES PARA A SAÍDA ---
+
+def extrair_numero_nf_do_arquivo(nome_arquivo: str) -> str:
+    """Extrai o número da NF do nome do arquivo."""
+    match = re.search(r'NF\s*(\d+)', nome_arquivo, re.IGNORECASE)
+    if match:
+        return match.group(1)
+    # Tenta extrair qualquer sequência de dígitos se 'NF' não for encontrada
+    match_any_digits = re.search(r'(\d+)', nome_arquivo)
+    if match_any_digits:
+        return match_any_digits.group(1)
+    return ""
+
+def formatar_valor_csv(valor: float) -> str:
+    """Formata um valor float para o formato '- 0.000,00' para CSV."""
+    try:
+        valor = float(valor)
+    except (ValueError, TypeError):
+        return "" 
+        
+    valor_abs = abs(valor)
+    valor_formatado = f"{valor_abs:,.2f}".replace(",", "@").replace(".", ",").replace("@", ".")
+    if valor < 0:
+        return f"- {valor_formatado}"
+    return valor_formatado
+
@@ -0,0 +1,211 @@
+"""Linha de comando: `python app.py [pasta_pdf] [pasta_saida] [opções]` ou `python -m extrator_pdf`."""
+import argparse
+import contextlib
+import functools
+import logging
+import os
+import signal
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from . import config
+from .armazem import abrir_armazem
+from .cache import registrar_estatisticas_caches
+from .camadas import registrar_resumo_metodos
+from .fila import abrir_fila, identificar_processo, processar_fila
+from .manifesto import ManifestoProcessamento, filtrar_pendentes
+from .metricas import ColetorMetricas, registrar_resumo_metricas
+from .pipeline import pool_de_processos, processar_arquivos
+from .saida import GravadorResultados, SaidaCSV, criar_saidas
+from .watch import ObservadorPasta, listar_pdfs, observar_pasta
+
+# Colunas de cada saída, na ordem em que aparecem
+FIELDNAMES_SUCESSO = [
+    "DATA EMISSÃO NF",
+    "NOME FORNECEDOR",
+    "NÚMERO NF",
+    "OPERAÇÃO",
+    "VALOR",
+    "FORMA PAGAMENTO",
+    "OBSERVAÇÕES",
+    "Caminho do Arquivo",
+    "MÉTODO EXTRAÇÃO"
+]
+FIELDNAMES_ERRO = ["caminho_arquivo", "erro_detalhes", "tipo_documento"]
+FIELDNAMES_NAO_SUPORTADOS = ["caminho_arquivo", "tipo_documento", "detalhes"]
+
+def configurar_logging(pasta_logs: str = "logs") -> str:
+    """Log em arquivo com data/hora na pasta `logs` e no terminal. Retorna o caminho do arquivo."""
+    os.makedirs(pasta_logs, exist_ok=True)
+    log_filename = os.path.join(pasta_logs, f"processamento_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.FileHandler(log_filename, encoding="utf-8-sig"),
+            logging.StreamHandler(sys.stdout)  # também mostra no terminal
+        ]
+    )
+    return log_filename
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Extrai dados de notas fiscais em PDF para CSV.")
+    parser.add_argument("pasta_pdf", nargs="?", default="", help="Pasta com os PDFs (padrão: PASTA_PDF do ini.env)")
+    parser.add_argument("pasta_raiz", nargs="?", default="", help="Pasta de saída dos CSVs (padrão: PASTA_SAIDA do ini.env)")
+    parser.add_argument("--workers", type=int, default=1, help="Número de processos em paralelo (padrão: 1)")
+    parser.add_argument("--force", action="store_true", help="Reprocessa todos os arquivos, ignorando o manifesto")
+    parser.add_argument("--retry-errors", action="store_true", help="Reprocessa arquivos que terminaram em erro em execuções anteriores")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Não reaproveita respostas da DeepSeek do cache (as novas continuam sendo gravadas)")
+    parser.add_argument("--metrics", action="store_true", help="Mede cada etapa por documento e grava o resumo (JSON e Prometheus) na pasta de saída")
+    parser.add_argument("--watch", action="store_true", help="Depois de processar a pasta, continua observando e processa os PDFs que chegarem")
+    parser.add_argument("--watch-polling", action="store_true", help="No modo --watch, usa varreduras periódicas em vez de eventos do sistema de arquivos")
+    parser.add_argument("--queue", nargs="?", const="", default=None, metavar="ARQUIVO",
+                        help="Pega os PDFs de uma fila compartilhada com outros processos e máquinas "
+                             "(padrão: fila_trabalhos.sqlite3 na pasta de saída)")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    configurar_logging()
+    logging.info("Iniciando processamento...")
+
+    # Carrega as variáveis do arquivo ini.env
+    from dotenv import load_dotenv
+    load_dotenv("ini.env")
+
+    # Lê do .env
+    pasta_pdf = os.getenv("PASTA_PDF", r"H:\Notas")
+    pasta_raiz = os.getenv("PASTA_SAIDA", r"C:\processados")
+
+    logging.info(f"Pasta de PDFs: {pasta_pdf}")
+    logging.info(f"Pasta de saída: {pasta_raiz}")
+
+    args = criar_parser().parse_args(argv)
+    cfg = config.Extractor.do_ambiente()
+    cfg = cfg.substituir(ignorar_cache_llm=args.no_llm_cache, metricas=cfg.metricas or args.metrics)
+    config.ativar(cfg)
+
+    # Sobrescreve se vier argumentos (o script.bat repassa "" quando não há argumento)
+    if args.pasta_pdf:
+        pasta_pdf = args.pasta_pdf
+        print(f"[ARGUMENTO] Pasta de PDFs recebida: {pasta_pdf}")
+    else:
+        print(f"[ENV] Usando pasta de PDFs: {pasta_pdf}")
+
+    if args.pasta_raiz:
+        pasta_raiz = args.pasta_raiz
+        print(f"[ARGUMENTO] Pasta raiz recebida: {pasta_raiz}")
+    else:
+        print(f"[ENV] Usando pasta raiz: {pasta_raiz}")
+
+    output_csv_sucesso = os.path.join(pasta_raiz, "notas_fiscais_extraidas.csv")
+    output_csv_erro = os.path.join(pasta_raiz, "arquivos_com_erro.csv")
+    output_csv_nao_suportados = os.path.join(pasta_raiz, "documentos_nao_suportados.csv")
+
+    # Com --queue, outros processos gravam nas mesmas saídas: abri-las (reparar o final, escrever o
+    # cabeçalho) só com a trava da fila, para não cortar uma gravação em andamento
+    fila = abrir_fila(args.queue or os.path.join(pasta_raiz, "fila_trabalhos.sqlite3")) if args.queue is not None else None
+    dono = identificar_processo()
+
+    # Uma saída por formato para cada destino (o CSV escreve o cabeçalho se ainda não existir)
+    with fila.exclusiva() if fila is not None else contextlib.nullcontext():
+        saidas_por_destino = {
+            "sucesso": criar_saidas(os.path.splitext(output_csv_sucesso)[0], FIELDNAMES_SUCESSO, cfg.formatos_saida),
+            "erro": criar_saidas(os.path.splitext(output_csv_erro)[0], FIELDNAMES_ERRO, cfg.formatos_saida),
+            "nao_suportado": criar_saidas(os.path.splitext(output_csv_nao_suportados)[0], FIELDNAMES_NAO_SUPORTADOS, cfg.formatos_saida),
+        }
+
+    # No modo --watch o observador começa antes da varredura inicial para não perder arquivos copiados nesse meio tempo
+    observador = ObservadorPasta(pasta_pdf, forcar_polling=args.watch_polling) if args.watch else None
+    if observador is not None:
+        observador.iniciar()
+
+    # Encontra todos os arquivos PDF recursivamente na pasta_pdf
+    pdf_files = listar_pdfs(pasta_pdf)
+    logging.info(f"{len(pdf_files)} PDFs encontrados para processar.")
+
+    if not pdf_files and observador is None and fila is None:
+        print(f"Nenhum PDF encontrado em {pasta_pdf} ou suas subpastas.")
+        return 1
+
+    total_arquivos = len(pdf_files)
+    print(f"Encontrados {total_arquivos} arquivos PDF para processar")
+    if observador is not None:
+        observador.marcar_liberados(pdf_files)
+
+    manifesto = None
+    if fila is not None:
+        # A fila faz o papel do manifesto: cada caminho é processado uma vez por versão (tamanho, mtime)
+        novos = fila.enfileirar(pdf_files, forcar=args.force, refazer_erros=args.retry_errors)
+        contagem = fila.contagem()
+        print(f"Fila {fila.caminho}: {novos} trabalho(s) novo(s) ou alterado(s); "
+              + ", ".join(f"{estado}: {quantidade}" for estado, quantidade in sorted(contagem.items())))
+        logging.info(f"Fila {fila.caminho} (processo {dono}): {novos} enfileirados, {contagem}")
+    else:
+        # Ignora arquivos cujo conteúdo já foi processado por esta versão do pipeline
+        manifesto = ManifestoProcessamento(os.path.join(pasta_raiz, "manifesto_processamento.jsonl"))
+        pdf_files, identificacoes = filtrar_pendentes(pdf_files, manifesto, forcar=args.force, refazer_erros=args.retry_errors)
+
+        if not pdf_files:
+            print("Nenhum arquivo novo ou alterado para processar.")
+
+    if args.workers > 1:
+        print(f"Processando com {args.workers} processos em paralelo")
+        logging.info(f"Modo paralelo: {args.workers} workers")
+
+    # SIGTERM vira SystemExit para que as linhas pendentes sejam gravadas antes de sair
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+
+    # Banco com os resultados em número e indexados, para consultas e exportações (extrator_pdf.consulta)
+    armazem = abrir_armazem(pasta_raiz)
+
+    documentos_por_metodo: Dict[str, int] = {}
+    coletor = ColetorMetricas() if cfg.metricas else None
+    with contextlib.ExitStack() as pilha:
+        if coletor is not None:
+            # Registrado primeiro para rodar por último, depois da gravação das linhas pendentes (inclusive ao interromper)
+            pilha.callback(lambda: registrar_resumo_metricas(coletor.exportar(pasta_raiz)))
+        if fila is not None:
+            # Ao sair (inclusive por Ctrl+C), devolve à fila o que não foi concluído, depois de gravar o que foi
+            pilha.callback(fila.liberar, dono)
+            pilha.enter_context(fila.batimento(dono))
+            caminhos_saidas = [saida.caminho for saidas in saidas_por_destino.values() for saida in saidas]
+            trava = functools.partial(fila.concluir, dono, saidas=caminhos_saidas)
+            gravador = pilha.enter_context(GravadorResultados(saidas_por_destino, trava=trava, armazem=armazem))
+        else:
+            gravador = pilha.enter_context(GravadorResultados(saidas_por_destino, apos_gravar=manifesto.registrar_lote,
+                                                              armazem=armazem))
+        # No modo --watch (e com --queue, entre as rodadas da fila) o pool de processos é reaproveitado
+        reaproveitar_pool = (observador is not None or fila is not None) and args.workers > 1
+        executor = pilha.enter_context(pool_de_processos(args.workers)) if reaproveitar_pool else None
+        if fila is not None:
+            processar_fila(fila, dono, args.workers, gravador, documentos_por_metodo, executor, coletor,
+                           aguardar_outros=observador is None)
+        else:
+            processar_arquivos(pdf_files, identificacoes, args.workers, gravador, documentos_por_metodo, executor, coletor)
+        if observador is not None:
+            pilha.callback(observador.parar)
+            gravador.gravar()
+            try:
+                observar_pasta(observador, manifesto, args.workers, gravador, documentos_por_metodo,
+                               forcar=args.force, refazer_erros=args.retry_errors, executor=executor, coletor=coletor,
+                               fila=fila, dono=dono)
+            except KeyboardInterrupt:
+                print("\nEncerrando o modo --watch...")
+
+    registrar_resumo_metodos(documentos_por_metodo)
+    registrar_estatisticas_caches()
+    logging.info("Processamento concluído.")
+    logging.info(f"CSV sucesso: {output_csv_sucesso}")
+    logging.info(f"CSV erro: {output_csv_erro}")
+    logging.info(f"CSV não suportados: {output_csv_nao_suportados}")
+    print("\nProcessamento concluído.")
+    print(f"CSV de sucesso gerado/atualizado: {output_csv_sucesso}")
+    print(f"CSV de erros gerado/atualizado: {output_csv_erro}")
+    print(f"CSV de documentos não suportados gerado/atualizado: {output_csv_nao_suportados}")
+    for saida in [saida for saidas in saidas_por_destino.values() for saida in saidas if not isinstance(saida, SaidaCSV)]:
+        print(f"Saída gerada/atualizada: {saida.caminho}")
+    if armazem is not None:
+        logging.info(f"Armazém de resultados: {armazem.caminho}")
+        print(f"Armazém de resultados gerado/atualizado: {armazem.caminho}")
+    return 0
@@ -0,0 +1,224 @@
+"""
+Configuração do extrator: um objeto `Extractor` com todas as opções do pipeline.
+
+`Extractor()` usa os valores padrão; `Extractor.do_ambiente()` lê as mesmas variáveis do
+ini.env (já carregadas no ambiente pela linha de comando ou pelo serviço que usa o pacote).
+A configuração ativa vale para o processo inteiro: `process_pdf` e os workers a ativam antes
+de processar, e os caches e o cliente da DeepSeek são recriados quando ela muda.
+"""
+import dataclasses
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .resultado import Result
+
+def _booleano(valor: str) -> bool:
+    return valor == "1"
+
+def _lista_formatos(valor: str) -> List[str]:
+    return [formato.strip().lower() for formato in valor.split(",") if formato.strip()]
+
+@dataclass
+class Extractor:
+    """Opções do pipeline. Os comentários indicam a variável de ambiente lida por `do_ambiente`."""
+
+    # Poppler e Tesseract (POPPLER_PATH, TESSERACT_PATH)
+    poppler_path: str = r"C:\poppler-24.08.0\Library\bin"
+    tesseract_path: str = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+    # Cliente da DeepSeek: endpoint (configurável para testes com um servidor local), timeouts,
+    # retentativas e limites de taxa (0 = sem limite). Com --workers os limites são divididos entre os processos.
+    deepseek_api_key: str = ""
+    deepseek_api_url: str = "https://api.deepseek.com/v1/chat/completions"
+    deepseek_timeout_conexao: float = 10.0
+    deepseek_timeout_leitura: float = 120.0
+    deepseek_tentativas: int = 5
+    deepseek_requisicoes_por_minuto: float = 0.0
+    deepseek_tokens_por_minuto: float = 0.0
+    deepseek_max_simultaneas: int = 4
+    # Lotes: documentos curtos (até metade de `deepseek_lote_tokens` tokens estimados) que precisam da DeepSeek
+    # vão juntos numa requisição, até o orçamento de tokens ou `deepseek_lote_documentos` (0 tokens = desativado).
+    # Um lote incompleto é enviado quando o documento mais antigo espera há `deepseek_lote_espera_segundos`.
+    deepseek_lote_tokens: int = 0
+    deepseek_lote_documentos: int = 8
+    deepseek_lote_espera_segundos: float = 10.0
+
+    # Redução do texto enviado à DeepSeek: acima do limite, só trechos ao redor dos termos-âncora são enviados
+    llm_max_caracteres: int = 8000
+    llm_janela_antes: int = 200
+    llm_janela_depois: int = 400
+
+    # OCR: páginas com menos caracteres nativos que isso são renderizadas e passam pelo Tesseract
+    densidade_minima_ocr: int = 500
+    dpi_ocr: int = 300
+    # OCR adaptativo: renderiza primeiro em `dpi_ocr_inicial` e só volta em `dpi_ocr` se a confiança média
+    # das palavras ficar abaixo de `ocr_confianca_minima` (0 a 100). `dpi_ocr_inicial` = 0 desativa.
+    dpi_ocr_inicial: int = 200
+    ocr_confianca_minima: float = 80.0
+    # Recorta as margens em branco em volta do texto antes do reconhecimento
+    ocr_recortar_margens: bool = False
+    # Pré-classificação pela primeira página: OCR de uma renderização em baixa resolução (0 desativa o OCR)
+    dpi_pre_classificacao: int = 100
+    # Rasterização em janelas de poucas páginas, com OCR concorrente num pool limitado de threads
+    janela_rasterizacao: int = 2
+    threads_ocr: int = 2
+    ocr_tons_de_cinza: bool = True
+    ocr_idioma: str = "por"
+    ocr_config: str = "--psm 6"
+    # "pytesseract" (um processo tesseract por página) ou "tesserocr" (motores persistentes, pacote opcional)
+    motor_ocr: str = "pytesseract"
+
+    # Orçamento por documento (0 desativa cada limite): só as `max_paginas` primeiras páginas são lidas, só as
+    # `max_paginas_ocr` primeiras páginas sem texto passam pelo OCR e o texto guardado é truncado em
+    # `max_caracteres`; acima de `limite_memoria_mb` de memória no processo o documento vira uma linha de erro.
+    # Workers são recriados a cada `worker_max_documentos`.
+    max_paginas: int = 0
+    max_paginas_ocr: int = 0
+    max_caracteres: int = 500_000
+    limite_memoria_mb: float = 0.0
+    worker_max_documentos: int = 100
+
+    # Caches em disco ficam numa pasta local (SQLite não é confiável em compartilhamentos de rede)
+    pasta_cache: str = "cache"
+    cache_ocr_max_mb: float = 512.0
+    cache_llm_max_mb: float = 256.0
+    cache_llm_validade_dias: float = 90.0
+    # Quando True, respostas da DeepSeek não são lidas do cache (as novas continuam sendo gravadas)
+    ignorar_cache_llm: bool = False
+
+    # Fração mínima de campos validados para dispensar a DeepSeek (acima de 1 a DeepSeek é sempre chamada)
+    confianca_minima_local: float = 1.0
+    # Com a extração local confiável, a DeepSeek ainda é consultada só por OPERAÇÃO e OBSERVAÇÕES,
+    # que o regex não extrai; False deixa as duas vazias e dispensa a chamada
+    deepseek_campos_descritivos: bool = True
+
+    # Métricas por documento e por etapa (também ativadas por --metrics)
+    metricas: bool = False
+
+    # Modo --watch: um PDF só entra na fila depois de ficar com tamanho e mtime estáveis por este tempo,
+    # e a pasta é varrida a cada `watch_varredura_segundos` quando não há eventos do sistema de arquivos
+    watch_estabilidade_segundos: float = 2.0
+    watch_varredura_segundos: float = 10.0
+
+    # Fila compartilhada (--queue): duração do lease de cada trabalho (renovado a cada terço dela), tentativas
+    # antes de um trabalho que nunca conclui virar erro e WAL (só com todos os processos na mesma máquina)
+    fila_lease_segundos: float = 300.0
+    fila_max_tentativas: int = 3
+    fila_wal: bool = False
+
+    # Notas repetidas (reescaneadas, encaminhadas, com folha de rosto) reaproveitam o resultado da primeira,
+    # encontrada por CNPJ + número ou pela impressão do texto (Jaccard estimado dos trios de palavras com números)
+    detectar_duplicatas: bool = True
+    duplicatas_similaridade_minima: float = 0.5
+
+    # Saída: linhas gravadas em lotes, por quantidade ou intervalo, em cada formato pedido (csv, jsonl, parquet)
+    saida_lote_linhas: int = 50
+    saida_intervalo_segundos: float = 10.0
+    formatos_saida: List[str] = field(default_factory=lambda: ["csv"])
+    # Banco resultados.sqlite3 na pasta de saída, com os campos em número e índices para consultas
+    armazem_resultados: bool = True
+
+    def __post_init__(self):
+        self.deepseek_tentativas = max(1, self.deepseek_tentativas)
+        self.deepseek_max_simultaneas = max(1, self.deepseek_max_simultaneas)
+        self.janela_rasterizacao = max(1, self.janela_rasterizacao)
+        self.threads_ocr = max(1, self.threads_ocr)
+
+    @property
+    def ocr_adaptativo(self) -> bool:
+        return 0 < self.dpi_ocr_inicial < self.dpi_ocr
+
+    @classmethod
+    def do_ambiente(cls, **alteracoes: Any) -> "Extractor":
+        """Configuração a partir das variáveis de ambiente ausentes de `alteracoes`, que têm precedência."""
+        valores: Dict[str, Any] = {}
+        for campo, (variavel, conversor) in VARIAVEIS_AMBIENTE.items():
+            valor = os.getenv(variavel)
+            if valor is not None:
+                valores[campo] = conversor(valor)
+        valores.update(alteracoes)
+        return cls(**valores)
+
+    def substituir(self, **alteracoes: Any) -> "Extractor":
+        """Cópia com as opções informadas alteradas."""
+        return dataclasses.replace(self, **alteracoes)
+
+    def process_pdf(self, caminho_pdf: str) -> "Result":
+        """Processa um PDF com esta configuração e retorna o destino, os campos extraídos e a linha de saída."""
+        from .pipeline import processar_arquivo_pdf
+        from .resultado import Result
+
+        ativar(self)
+        return Result.do_resultado(caminho_pdf, processar_arquivo_pdf(caminho_pdf))
+
+# Opção -> (variável de ambiente, conversão do texto)
+VARIAVEIS_AMBIENTE: Dict[str, Tuple[str, Callable[[str], Any]]] = {
+    "poppler_path": ("POPPLER_PATH", str),
+    "tesseract_path": ("TESSERACT_PATH", str),
+    "deepseek_api_key": ("DEEPSEEK_API_KEY", str),
+    "deepseek_api_url": ("DEEPSEEK_API_URL", str),
+    "deepseek_timeout_conexao": ("DEEPSEEK_TIMEOUT_CONEXAO", float),
+    "deepseek_timeout_leitura": ("DEEPSEEK_TIMEOUT_LEITURA", float),
+    "deepseek_tentativas": ("DEEPSEEK_TENTATIVAS", int),
+    "deepseek_requisicoes_por_minuto": ("DEEPSEEK_RPM", float),
+    "deepseek_tokens_por_minuto": ("DEEPSEEK_TPM", float),
+    "deepseek_max_simultaneas": ("DEEPSEEK_MAX_SIMULTANEAS", int),
+    "deepseek_lote_tokens": ("DEEPSEEK_LOTE_TOKENS", int),
+    "deepseek_lote_documentos": ("DEEPSEEK_LOTE_DOCUMENTOS", int),
+    "deepseek_lote_espera_segundos": ("DEEPSEEK_LOTE_ESPERA_SEGUNDOS", float),
+    "llm_max_caracteres": ("LLM_MAX_CARACTERES", int),
+    "llm_janela_antes": ("LLM_JANELA_ANTES", int),
+    "llm_janela_depois": ("LLM_JANELA_DEPOIS", int),
+    "dpi_ocr": ("OCR_DPI", int),
+    "dpi_ocr_inicial": ("OCR_DPI_INICIAL", int),
+    "ocr_confianca_minima": ("OCR_CONFIANCA_MINIMA", float),
+    "ocr_recortar_margens": ("OCR_RECORTAR_MARGENS", _booleano),
+    "dpi_pre_classificacao": ("PRE_CLASSIFICACAO_DPI", int),
+    "janela_rasterizacao": ("OCR_JANELA_PAGINAS", int),
+    "threads_ocr": ("OCR_THREADS", int),
+    "ocr_tons_de_cinza": ("OCR_TONS_DE_CINZA", _booleano),
+    "motor_ocr": ("OCR_MOTOR", str),
+    "max_paginas": ("MAX_PAGINAS", int),
+    "max_paginas_ocr": ("MAX_PAGINAS_OCR", int),
+    "max_caracteres": ("MAX_CARACTERES", int),
+    "limite_memoria_mb": ("LIMITE_MEMORIA_MB", float),
+    "worker_max_documentos": ("WORKER_MAX_DOCUMENTOS", int),
+    "pasta_cache": ("PASTA_CACHE", str),
+    "fila_lease_segundos": ("FILA_LEASE_SEGUNDOS", float),
+    "fila_max_tentativas": ("FILA_MAX_TENTATIVAS", int),
+    "fila_wal": ("FILA_WAL", _booleano),
+    "detectar_duplicatas": ("DETECTAR_DUPLICATAS", _booleano),
+    "duplicatas_similaridade_minima": ("DUPLICATAS_SIMILARIDADE_MINIMA", float),
+    "cache_ocr_max_mb": ("CACHE_OCR_MAX_MB", float),
+    "cache_llm_max_mb": ("CACHE_LLM_MAX_MB", float),
+    "cache_llm_validade_dias": ("CACHE_LLM_VALIDADE_DIAS", float),
+    "confianca_minima_local": ("CONFIANCA_MINIMA_LOCAL", float),
+    "deepseek_campos_descritivos": ("DEEPSEEK_CAMPOS_DESCRITIVOS", _booleano),
+    "metricas": ("METRICAS", _booleano),
+    "watch_estabilidade_segundos": ("WATCH_ESTABILIDADE_SEGUNDOS", float),
+    "watch_varredura_segundos": ("WATCH_VARREDURA_SEGUNDOS", float),
+    "saida_lote_linhas": ("SAIDA_LOTE_LINHAS", int),
+    "saida_intervalo_segundos": ("SAIDA_INTERVALO_SEGUNDOS", float),
+    "formatos_saida": ("FORMATOS_SAIDA", _lista_formatos),
+    "armazem_resultados": ("ARMAZEM_RESULTADOS", _booleano),
+}
+
+_ativo: Optional[Extractor] = None
+
+def ativar(extractor: Extractor) -> None:
+    """Torna `extractor` a configuração usada pelo pipeline neste processo."""
+    global _ativo
+    _ativo = extractor
+
+def atual() -> Extractor:
+    """Configuração ativa; sem nenhuma ativada, a do ambiente (lida no primeiro uso, não na importação)."""
+    global _ativo
+    if _ativo is None:
+        _ativo = Extractor.do_ambiente()
+    return _ativo
+
+def process_pdf(caminho_pdf: str, extractor: Optional[Extractor] = None) -> "Result":
+    """Processa um PDF com `extractor` ou, sem ele, com a configuração ativa."""
+    return (extractor or atual()).process_pdf(caminho_pdf)
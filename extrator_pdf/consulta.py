@@ -0,0 +1,147 @@
+"""
+Consultas ao armazém de resultados (`resultados.sqlite3` da pasta de saída):
+
+    python -m extrator_pdf.consulta lookup --cnpj 12.345.678/0001-90 --number 1234
+    python -m extrator_pdf.consulta totals --month 2026-09
+    python -m extrator_pdf.consulta export pasta_relatorios [--formats csv,jsonl]
+
+`export` acrescenta às saídas da pasta, no mesmo layout dos CSVs do processamento, só as linhas
+gravadas no armazém desde a exportação anterior para o mesmo arquivo.
+"""
+import argparse
+import calendar
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from .armazem import ArmazemResultados
+from .campos import formatar_valor_csv
+from .cli import FIELDNAMES_ERRO, FIELDNAMES_NAO_SUPORTADOS, FIELDNAMES_SUCESSO
+from .saida import FORMATOS_DISPONIVEIS, criar_saidas
+
+logger = logging.getLogger(__name__)
+
+# Nome (sem extensão) e colunas das saídas de cada destino, como na linha de comando principal
+SAIDAS_POR_DESTINO = {
+    "sucesso": ("notas_fiscais_extraidas", FIELDNAMES_SUCESSO),
+    "erro": ("arquivos_com_erro", FIELDNAMES_ERRO),
+    "nao_suportado": ("documentos_nao_suportados", FIELDNAMES_NAO_SUPORTADOS),
+}
+
+def mes_valido(valor: str) -> str:
+    """Tipo do --month: AAAA-MM com um mês existente, normalizado (ex.: 2024-9 → 2024-09)."""
+    try:
+        return datetime.strptime(valor.strip(), "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mês inválido: {valor!r} (use AAAA-MM, ex.: 2024-09)")
+
+def data_valida(valor: str) -> str:
+    """Tipo do --from/--to: uma data AAAA-MM-DD existente, normalizada."""
+    try:
+        return datetime.strptime(valor.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {valor!r} (use AAAA-MM-DD, ex.: 2024-09-30)")
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Consulta e exporta o armazém de resultados (resultados.sqlite3).")
+    parser.add_argument("--db", default="", help="Banco do armazém (padrão: resultados.sqlite3 em PASTA_SAIDA do ini.env)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    lookup = comandos.add_parser("lookup", help="Mostra as notas com o CNPJ e o número informados")
+    lookup.add_argument("--cnpj", required=True, help="CNPJ do prestador, com ou sem pontuação")
+    lookup.add_argument("--number", required=True, help="Número da nota, com ou sem zeros à esquerda")
+
+    totals = comandos.add_parser("totals", help="Valor líquido por fornecedor no período (pela data de emissão)")
+    totals.add_argument("--month", type=mes_valido, help="Mês AAAA-MM")
+    totals.add_argument("--from", dest="inicio", type=data_valida, help="Data inicial AAAA-MM-DD")
+    totals.add_argument("--to", dest="fim", type=data_valida, help="Data final AAAA-MM-DD")
+
+    export = comandos.add_parser("export", help="Acrescenta às saídas da pasta as linhas ainda não exportadas")
+    export.add_argument("pasta_saida", help="Pasta das saídas exportadas")
+    export.add_argument("--formats", default="csv", help="Formatos separados por vírgula: csv, jsonl, parquet (padrão: csv)")
+    return parser
+
+def consultar_nota(armazem: ArmazemResultados, cnpj: str, numero: str) -> int:
+    documentos = armazem.procurar_nota(cnpj, numero)
+    if not documentos:
+        print(f"Nenhuma nota com CNPJ {cnpj} e número {numero}.")
+        return 1
+    for documento in documentos:
+        print(f"\n{documento['caminho']}")
+        for campo in ("prestador", "cnpj", "numero_nota", "data_emissao", "valor_total", "irrf", "valor_liquido",
+                      "tipo_documento", "metodo", "duplicata_de", "hash_arquivo", "segundos", "gravado_em"):
+            if documento[campo] is not None:
+                print(f"  {campo}: {documento[campo]}")
+        if documento["etapas"]:
+            print(f"  etapas: {json.loads(documento['etapas'])}")
+    return 0
+
+def periodo_do_mes(mes: str) -> List[str]:
+    """AAAA-MM → [primeiro dia, último dia] em AAAA-MM-DD."""
+    ano, numero_mes = (int(parte) for parte in mes.split("-"))
+    return [f"{ano:04d}-{numero_mes:02d}-01", f"{ano:04d}-{numero_mes:02d}-{calendar.monthrange(ano, numero_mes)[1]:02d}"]
+
+def mostrar_totais(armazem: ArmazemResultados, inicio: Optional[str], fim: Optional[str]) -> int:
+    linhas = armazem.totais_por_fornecedor(inicio, fim)
+    print(f"Período: {inicio or 'início'} a {fim or 'hoje'}")
+    for linha in linhas:
+        print(f"{linha['cnpj']:>14}  {(linha['prestador'] or '')[:40]:<40}  {linha['notas']:6d} nota(s)  "
+              f"R$ {formatar_valor_csv(linha['valor_liquido'] or 0):>14}")
+    print(f"{len(linhas)} fornecedor(es), {sum(linha['notas'] for linha in linhas)} nota(s), "
+          f"R$ {formatar_valor_csv(sum(linha['valor_liquido'] or 0 for linha in linhas))}")
+    return 0
+
+def exportar(armazem: ArmazemResultados, pasta_saida: str, formatos: List[str]) -> int:
+    os.makedirs(pasta_saida, exist_ok=True)
+    for destino, (nome, fieldnames) in SAIDAS_POR_DESTINO.items():
+        for formato in formatos:
+            caminho_base = os.path.join(pasta_saida, nome)
+            # Uma saída nova (ou apagada) recebe tudo desde o começo
+            existia = formato in FORMATOS_DISPONIVEIS and os.path.exists(caminho_base + FORMATOS_DISPONIVEIS[formato][0])
+            saidas = criar_saidas(caminho_base, fieldnames, [formato])
+            if not saidas:
+                continue
+            saida = saidas[0]
+            ultimo_id = armazem.ultimo_exportado(saida.caminho) if existia else 0
+            exportadas, lote = 0, []
+            for id_documento, linha in armazem.linhas_desde(destino, ultimo_id):
+                lote.append(linha)
+                ultimo_id = id_documento
+                if len(lote) >= 1000:
+                    saida.gravar_lote(lote)
+                    exportadas += len(lote)
+                    lote = []
+            if lote:
+                saida.gravar_lote(lote)
+                exportadas += len(lote)
+            if exportadas:
+                armazem.marcar_exportado(saida.caminho, destino, ultimo_id)
+            logger.info(f"{exportadas} linha(s) exportadas para {saida.caminho}")
+            print(f"{saida.caminho}: {exportadas} linha(s) nova(s)")
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    args = criar_parser().parse_args(argv)
+    caminho = args.db
+    if not caminho:
+        from dotenv import load_dotenv
+        load_dotenv("ini.env")
+        caminho = os.path.join(os.getenv("PASTA_SAIDA", r"C:\processados"), "resultados.sqlite3")
+    if not os.path.exists(caminho):
+        print(f"Armazém não encontrado: {caminho}")
+        return 1
+    armazem = ArmazemResultados(caminho)
+
+    if args.comando == "lookup":
+        return consultar_nota(armazem, args.cnpj, args.number)
+    if args.comando == "totals":
+        inicio, fim = periodo_do_mes(args.month) if args.month else (args.inicio, args.fim)
+        return mostrar_totais(armazem, inicio, fim)
+    return exportar(armazem, args.pasta_saida, [formato.strip().lower() for formato in args.formats.split(",") if formato.strip()])
+
+if __name__ == "__main__":
+    sys.exit(main())
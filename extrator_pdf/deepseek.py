@@ -0,0 +1,460 @@
+"""Cliente da DeepSeek, redução do texto enviado e extração dos campos pela API."""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from . import config
+from .cache import cache_llm
+from .metricas import contar_metrica, medir_etapa
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+class LimitadorTaxa:
+    """Balde de fichas por minuto, seguro entre threads. `por_minuto` <= 0 desativa o limite."""
+
+    def __init__(self, por_minuto: float):
+        self.capacidade = por_minuto
+        self.fichas = por_minuto
+        self.atualizado_em = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self, quantidade: float = 1) -> None:
+        if self.capacidade <= 0:
+            return
+        # Uma requisição maior que o limite inteiro espera o balde encher
+        quantidade = min(quantidade, self.capacidade)
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado_em) * self.capacidade / 60.0)
+                self.atualizado_em = agora
+                if self.fichas >= quantidade:
+                    self.fichas -= quantidade
+                    return
+                espera = (quantidade - self.fichas) * 60.0 / self.capacidade
+            time.sleep(espera)
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa grosseira (~4 caracteres por token), suficiente para o limite de tokens por minuto."""
+    return len(texto) // 4 + 1
+
+class ClienteLLM:
+    """
+    Cliente HTTP para a API de chat: sessão com conexões reaproveitadas (keep-alive),
+    timeouts de conexão/leitura, retentativas com backoff exponencial e jitter em 429/5xx,
+    limites de requisições e tokens por minuto e um teto de requisições simultâneas.
+    """
+
+    STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        timeout_conexao: float = 10.0,
+        timeout_leitura: float = 120.0,
+        tentativas: int = 5,
+        requisicoes_por_minuto: float = 0,
+        tokens_por_minuto: float = 0,
+        max_simultaneas: int = 4,
+        espera_base: float = 1.0,
+        espera_maxima: float = 60.0
+    ):
+        import requests
+        import requests.adapters
+
+        self.url = url
+        self.timeout = (timeout_conexao, timeout_leitura)
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.limite_requisicoes = LimitadorTaxa(requisicoes_por_minuto)
+        self.limite_tokens = LimitadorTaxa(tokens_por_minuto)
+        self._simultaneas = threading.BoundedSemaphore(max_simultaneas)
+        self.sessao = requests.Session()
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_simultaneas)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        })
+        self.requisicoes = 0
+        self.retentativas = 0
+
+    def _espera(self, tentativa: int, resposta: Optional["requests.Response"]) -> float:
+        if resposta is not None and resposta.headers.get("Retry-After", "").isdigit():
+            return min(self.espera_maxima, float(resposta.headers["Retry-After"]))
+        return min(self.espera_maxima, self.espera_base * 2 ** tentativa) * random.uniform(0.5, 1.5)
+
+    def completar(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envia o payload e retorna o JSON da resposta. Erros de rede, timeouts, 429 e 5xx são
+        retentados; ao esgotar as tentativas (ou em outros 4xx) levanta requests.RequestException.
+        """
+        import requests
+
+        tokens = estimar_tokens("".join(str(m.get("content", "")) for m in payload.get("messages", [])))
+        for tentativa in range(self.tentativas):
+            resposta = None
+            self.limite_requisicoes.aguardar(1)
+            self.limite_tokens.aguardar(tokens)
+            try:
+                with self._simultaneas:
+                    self.requisicoes += 1
+                    resposta = self.sessao.post(self.url, json=payload, timeout=self.timeout)
+                if resposta.status_code not in self.STATUS_RETENTAVEIS:
+                    resposta.raise_for_status() # Levanta um erro para códigos de status HTTP 4xx/5xx
+                    return resposta.json()
+                erro: Exception = requests.exceptions.HTTPError(f"{resposta.status_code} {resposta.reason}", response=resposta)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                erro = e
+            if tentativa + 1 >= self.tentativas:
+                raise erro
+            espera = self._espera(tentativa, resposta)
+            self.retentativas += 1
+            logger.warning(f"DeepSeek: {str(erro)}. Nova tentativa em {espera:.1f}s ({tentativa + 2}/{self.tentativas})")
+            time.sleep(espera)
+        raise requests.exceptions.RetryError("Tentativas esgotadas")
+
+_cliente_deepseek: Optional[ClienteLLM] = None
+_cliente_deepseek_de: Optional[Tuple[int, int, config.Extractor]] = None
+# Número de processos que dividem os limites de taxa (definido pelo --workers)
+_processos_compartilhando_limite = 1
+
+def definir_processos_compartilhando_limite(processos: int) -> None:
+    global _processos_compartilhando_limite
+    _processos_compartilhando_limite = max(1, processos)
+
+def obter_cliente_deepseek() -> ClienteLLM:
+    """Cliente da DeepSeek do processo atual, criado no primeiro uso e recriado se a configuração mudar."""
+    global _cliente_deepseek, _cliente_deepseek_de
+    cfg = config.atual()
+    origem = (os.getpid(), _processos_compartilhando_limite, cfg)
+    if _cliente_deepseek_de is None or _cliente_deepseek_de[:2] != origem[:2] or _cliente_deepseek_de[2] is not cfg:
+        _cliente_deepseek = ClienteLLM(
+            cfg.deepseek_api_url,
+            cfg.deepseek_api_key,
+            timeout_conexao=cfg.deepseek_timeout_conexao,
+            timeout_leitura=cfg.deepseek_timeout_leitura,
+            tentativas=cfg.deepseek_tentativas,
+            requisicoes_por_minuto=cfg.deepseek_requisicoes_por_minuto / _processos_compartilhando_limite,
+            tokens_por_minuto=cfg.deepseek_tokens_por_minuto / _processos_compartilhando_limite,
+            max_simultaneas=cfg.deepseek_max_simultaneas
+        )
+        _cliente_deepseek_de = origem
+    return _cliente_deepseek
+
+# --- REDUÇÃO DO TEXTO ENVIADO À DEEPSEEK ---
+
+# Os mesmos termos que `extrair_campos` procura: em volta deles estão os campos da nota
+ANCORAS_TEXTO = {
+    "prestador": r"prestador|emitente",
+    "tomador": r"tomador|cliente|pagador",
+    "cnpj": r"cnpj",
+    "valor_total": r"total a pagar|valor total|total do contrato",
+    "irrf": r"irrf",
+    "data": r"\d{2}/\d{2}/\d{4}",
+    "numero_nota": r"(?<!\d)\d{8}(?!\d)",
+}
+_REGEX_ANCORAS = re.compile(
+    "|".join(f"(?P<{nome}>{padrao})" for nome, padrao in ANCORAS_TEXTO.items()),
+    re.IGNORECASE
+)
+SEPARADOR_TRECHOS = "\n[...]\n"
+
+def _expandir_para_linhas(texto: str, inicio: int, fim: int, folga: int = 120) -> Tuple[int, int]:
+    """Estende o trecho até o início/fim das linhas, sem passar de `folga` caracteres extras."""
+    quebra = texto.rfind("\n", max(0, inicio - folga), inicio)
+    if quebra != -1:
+        inicio = quebra + 1
+    elif inicio <= folga:
+        inicio = 0
+    quebra = texto.find("\n", fim, fim + folga)
+    if quebra != -1:
+        fim = quebra
+    elif len(texto) - fim <= folga:
+        fim = len(texto)
+    return inicio, fim
+
+def reduzir_texto_para_llm(
+    texto: str,
+    max_caracteres: Optional[int] = None,
+    janela_antes: Optional[int] = None,
+    janela_depois: Optional[int] = None
+) -> str:
+    """
+    Reduz textos longos (ex.: OCR de notas com várias páginas de tabelas e texto legal)
+    aos trechos ao redor dos termos-âncora, respeitando `max_caracteres`.
+
+    O início do documento (cabeçalho com emitente e número) é sempre mantido. Se os trechos
+    não couberem no limite, entra primeiro a primeira ocorrência de cada tipo de âncora e
+    depois as demais, na ordem do documento. Textos dentro do limite não são alterados.
+    Os limites omitidos vêm da configuração ativa.
+    """
+    cfg = config.atual()
+    max_caracteres = cfg.llm_max_caracteres if max_caracteres is None else max_caracteres
+    janela_antes = cfg.llm_janela_antes if janela_antes is None else janela_antes
+    janela_depois = cfg.llm_janela_depois if janela_depois is None else janela_depois
+    if max_caracteres <= 0 or len(texto) <= max_caracteres:
+        return texto
+
+    cabecalho = _expandir_para_linhas(texto, 0, min(len(texto), janela_depois))
+    candidatos: List[Tuple[int, int, str]] = []
+    for ancora in _REGEX_ANCORAS.finditer(texto):
+        inicio, fim = _expandir_para_linhas(
+            texto, max(0, ancora.start() - janela_antes), min(len(texto), ancora.end() + janela_depois)
+        )
+        candidatos.append((inicio, fim, ancora.lastgroup))
+
+    # Prioridade: cabeçalho, primeira ocorrência de cada âncora, demais ocorrências
+    vistos = set()
+    primeiros, demais = [], []
+    for inicio, fim, tipo in candidatos:
+        (demais if tipo in vistos else primeiros).append((inicio, fim))
+        vistos.add(tipo)
+
+    escolhidos: List[Tuple[int, int]] = []
+    usados = 0
+    for inicio, fim in [cabecalho] + primeiros + demais:
+        # Conta só o que ainda não está coberto por trechos já escolhidos
+        novos = fim - inicio - sum(max(0, min(fim, f) - max(inicio, i)) for i, f in escolhidos)
+        if novos <= 0:
+            continue
+        if usados + novos + len(SEPARADOR_TRECHOS) > max_caracteres:
+            continue
+        escolhidos.append((inicio, fim))
+        usados += novos + len(SEPARADOR_TRECHOS)
+
+    # Junta trechos sobrepostos ou encostados, na ordem do documento
+    unidos: List[List[int]] = []
+    for inicio, fim in sorted(escolhidos):
+        if unidos and inicio <= unidos[-1][1] + 1:
+            unidos[-1][1] = max(unidos[-1][1], fim)
+        else:
+            unidos.append([inicio, fim])
+    reduzido = SEPARADOR_TRECHOS.join(texto[inicio:fim].strip() for inicio, fim in unidos)[:max_caracteres]
+
+    logger.info(f"Texto para a DeepSeek reduzido de {len(texto)} para {len(reduzido)} caracteres")
+    return reduzido
+
+PROMPT_SISTEMA_DEEPSEEK = """Você é um extrator de dados de nota fiscal. 
+                Extraia os seguintes campos em JSON:
+                - numero_nota (apenas números)
+                - prestador (nome ou razão social)
+                - cnpj (formato XX.XXX.XXX/XXXX-XX)
+                - pagador (nome ou razão social do tomador/cliente)
+                - cnpj_pagador (CNPJ do tomador/cliente)
+                - valor_total (valor em formato numérico)
+                - irrf (valor em formato numérico)
+                - data_emissao (formato DD/MM/AAAA)
+                - operacao (e.g., "MATERIA PRIMA", "SERVICO", "VENDA")
+                - observacoes (texto livre, se houver)
+                
+                IMPORTANTE: Não confundir IRRF com CSLL, são impostos diferentes.
+
+                Retorne um JSON válido, sem explicações ou comentários adicionais. NUNCA gere dados ficticios.
+                Se um campo não for encontrado, retorne uma string vazia para ele."""
+
+# Lotes: o mesmo prompt, com o formato da resposta trocado por uma lista com um objeto por documento
+PROMPT_SISTEMA_DEEPSEEK_LOTE = PROMPT_SISTEMA_DEEPSEEK + """
+
+                A mensagem traz vários documentos, cada um começando pela linha "### DOCUMENTO <id>".
+                Extraia os campos de cada documento só com o texto dele, sem misturar documentos.
+                Retorne um JSON no formato {"documentos": [{"id": "<id>", "numero_nota": "...", ...}, ...]},
+                com um objeto por documento, todos os campos acima e o id do documento."""
+
+# Só os campos que o regex não extrai, para notas cujos demais campos já foram validados localmente
+PROMPT_SISTEMA_DEEPSEEK_DESCRITIVOS = """Você é um especialista em extrair informações de notas fiscais brasileiras.
+                Extraia do texto da nota apenas os seguintes campos em formato JSON:
+                - operacao (e.g., "MATERIA PRIMA", "SERVICO", "VENDA")
+                - observacoes (texto livre, se houver)
+
+                Retorne um JSON válido, sem explicações ou comentários adicionais. NUNCA gere dados ficticios.
+                Se um campo não for encontrado, retorne uma string vazia para ele."""
+
+MODELO_DEEPSEEK = "deepseek-chat"  # DeepSeek model name
+
+# Campos pedidos no prompt, na ordem em que aparecem
+CAMPOS_DEEPSEEK = ("numero_nota", "prestador", "cnpj", "pagador", "cnpj_pagador", "valor_total", "irrf",
+                   "data_emissao", "operacao", "observacoes")
+
+def chave_cache_deepseek(texto_pdf: str, prompt: str = PROMPT_SISTEMA_DEEPSEEK) -> str:
+    """Com temperature 0, modelo + prompt + texto determinam a resposta."""
+    return "\x1f".join([MODELO_DEEPSEEK, prompt, texto_pdf])
+
+def _campos_da_resposta(dados: Dict[str, Any]) -> Dict[str, str]:
+    """Campos da resposta da DeepSeek com os nomes usados pelo pipeline."""
+    return {
+        "numero_nota": str(dados.get("numero_nota", "")),
+        "prestador": str(dados.get("prestador", "")),
+        "cnpj": str(dados.get("cnpj", "")),
+        "pagador": str(dados.get("pagador", "")),
+        "cnpj_pagador": str(dados.get("cnpj_pagador", "")),
+        "valor_total": str(dados.get("valor_total", "0")),
+        "irrf": str(dados.get("irrf", "0")),
+        "data_emissao_nf": str(dados.get("data_emissao", "")),
+        "operacao": str(dados.get("operacao", "")),
+        "observacoes": str(dados.get("observacoes", ""))
+    }
+
+def extrair_com_deepseek(texto_pdf: str, prompt: str = PROMPT_SISTEMA_DEEPSEEK) -> Optional[Dict[str, str]]:
+    texto_pdf = reduzir_texto_para_llm(texto_pdf)
+    chave_cache = chave_cache_deepseek(texto_pdf, prompt)
+    cache = cache_llm()
+    if cache.habilitado and not cache.ignorar_leitura:
+        dados_cache = cache.obter(chave_cache)
+        if dados_cache is not None:
+            print("Resposta da DeepSeek reaproveitada do cache")
+            return dados_cache
+
+    import requests
+
+    try:
+        messages = [
+            {
+                "role": "system",
+                "content": prompt
+            },
+            {
+                "role": "user",
+                "content": texto_pdf
+            }
+        ]
+
+        payload = {
+            "model": MODELO_DEEPSEEK,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": {"type": "json_object"}
+        }
+
+        cliente = obter_cliente_deepseek()
+        requisicoes, retentativas = cliente.requisicoes, cliente.retentativas
+        contar_metrica("caracteres_llm", len(texto_pdf))
+        try:
+            with medir_etapa("api_deepseek"):
+                response_data = cliente.completar(payload)
+        finally:
+            contar_metrica("requisicoes_llm", cliente.requisicoes - requisicoes)
+            contar_metrica("retentativas_llm", cliente.retentativas - retentativas)
+
+        if 'choices' in response_data and len(response_data['choices']) > 0:
+            content = response_data['choices'][0]['message']['content']
+            try:
+                resultado = _campos_da_resposta(json.loads(content))
+                # Só respostas interpretadas com sucesso vão para o cache
+                if cache.habilitado:
+                    cache.gravar(chave_cache, resultado)
+                return resultado
+            except json.JSONDecodeError:
+                print(f"Erro JSON DeepSeek:\n{content}")
+                return None
+        else:
+            print(f"Resposta inesperada DeepSeek:\n{response_data}")
+            return None
+
+    except requests.exceptions.RequestException as req_e:
+        print(f"Erro na requisição à DeepSeek: {req_e}")
+        return None
+    except Exception as e:
+        print(f"Erro ao chamar DeepSeek: {str(e)}")
+        return None
+
+def extrair_campos_descritivos_com_deepseek(texto_pdf: str) -> Optional[Dict[str, str]]:
+    """OPERAÇÃO e OBSERVAÇÕES da nota (os campos que o regex não extrai), ou None se a chamada falhar."""
+    dados = extrair_com_deepseek(texto_pdf, PROMPT_SISTEMA_DEEPSEEK_DESCRITIVOS)
+    if dados is None:
+        return None
+    return {"operacao": dados["operacao"], "observacoes": dados["observacoes"]}
+
+def validar_resposta_lote(item: Any, texto_pdf: str) -> bool:
+    """
+    Confere o objeto de um documento na resposta em lote: campos com texto ou número (os
+    ausentes ficam vazios, como na resposta individual) e CNPJ e número da nota, quando
+    preenchidos, presentes no texto do próprio documento, o que pega respostas trocadas entre
+    documentos do mesmo lote.
+    """
+    if not isinstance(item, dict) or any(not isinstance(item[campo], (str, int, float))
+                                         for campo in CAMPOS_DEEPSEEK if campo in item):
+        return False
+    numero = re.sub(r"\D", "", str(item.get("numero_nota", ""))).lstrip("0")
+    if numero and not re.search(rf"(?<!\d)0*{numero}(?!\d)", texto_pdf):
+        return False
+    cnpj = re.sub(r"\D", "", str(item.get("cnpj", "")))
+    return not cnpj or cnpj in re.sub(r"(?<=\d)[.\-/ ](?=\d)", "", texto_pdf)
+
+def extrair_lote_com_deepseek(textos_pdf: List[str]) -> List[Optional[Dict[str, str]]]:
+    """
+    Extrai os campos de vários documentos com uma única requisição. Retorna, na ordem de
+    `textos_pdf`, os campos de cada documento ou None quando a resposta dele não passou na
+    validação (ou a requisição falhou): esses devem ser consultados um a um com `extrair_com_deepseek`.
+    Respostas já no cache (de requisições individuais ou em lote) não são enviadas de novo.
+    """
+    textos_pdf = [reduzir_texto_para_llm(texto) for texto in textos_pdf]
+    resultados: List[Optional[Dict[str, str]]] = [None] * len(textos_pdf)
+    cache = cache_llm()
+    a_enviar = []
+    for posicao, texto in enumerate(textos_pdf):
+        if cache.habilitado and not cache.ignorar_leitura:
+            for prompt in (PROMPT_SISTEMA_DEEPSEEK, PROMPT_SISTEMA_DEEPSEEK_LOTE):
+                resultados[posicao] = cache.obter(chave_cache_deepseek(texto, prompt))
+                if resultados[posicao] is not None:
+                    break
+        if resultados[posicao] is None:
+            a_enviar.append(posicao)
+    if len(a_enviar) < len(textos_pdf):
+        print(f"{len(textos_pdf) - len(a_enviar)} resposta(s) da DeepSeek reaproveitada(s) do cache")
+    if not a_enviar:
+        return resultados
+
+    import requests
+
+    # O id de cada documento é a posição dele na lista, a partir de 1
+    conteudo = "\n\n".join(f"### DOCUMENTO {posicao + 1}\n{textos_pdf[posicao]}" for posicao in a_enviar)
+    payload = {
+        "model": MODELO_DEEPSEEK,
+        "messages": [
+            {"role": "system", "content": PROMPT_SISTEMA_DEEPSEEK_LOTE},
+            {"role": "user", "content": conteudo}
+        ],
+        "temperature": 0,
+        "response_format": {"type": "json_object"}
+    }
+    try:
+        response_data = obter_cliente_deepseek().completar(payload)
+        documentos = json.loads(response_data["choices"][0]["message"]["content"])["documentos"]
+        por_id = {str(item.get("id")): item for item in documentos if isinstance(item, dict)}
+    except requests.exceptions.RequestException as req_e:
+        print(f"Erro na requisição em lote à DeepSeek: {req_e}")
+        return resultados
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        print(f"Resposta em lote inesperada da DeepSeek ({type(e).__name__}: {str(e)})")
+        return resultados
+
+    recusados = []
+    for posicao in a_enviar:
+        item = por_id.get(str(posicao + 1))
+        try:
+            valido = validar_resposta_lote(item, textos_pdf[posicao])
+        except Exception as e:
+            # Item malformado: o documento é consultado sozinho, como os recusados
+            logger.warning(f"DeepSeek: item {posicao + 1} da resposta em lote malformado ({type(e).__name__}: {e})")
+            valido = False
+        if not valido:
+            recusados.append(str(posicao + 1))
+            continue
+        resultados[posicao] = _campos_da_resposta(item)
+        if cache.habilitado:
+            cache.gravar(chave_cache_deepseek(textos_pdf[posicao], PROMPT_SISTEMA_DEEPSEEK_LOTE), resultados[posicao])
+    if recusados:
+        logger.warning(f"DeepSeek: resposta em lote recusada para os documentos {', '.join(recusados)} de {len(a_enviar)}")
+    return resultados
@@ -0,0 +1,130 @@
+"""Leitura dos PDFs: sessão do pdfplumber por documento, com o texto de cada página sob demanda."""
+import functools
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from .memoria import paginas_no_orcamento, verificar_memoria
+from .metricas import contar_metrica, medir_etapa
+
+logger = logging.getLogger(__name__)
+
+def aguardar_arquivo_disponivel(caminho_arquivo: str, tentativas: int = 10, espera: float = 1.0, espera_inicial: float = 0.1) -> bool:
+    """
+    Aguarda até que o arquivo esteja disponível para leitura, com esperas crescentes
+    (de `espera_inicial` até `espera` segundos) entre as tentativas.
+    """
+    intervalo = espera_inicial
+    for i in range(tentativas):
+        try:
+            with open(caminho_arquivo, 'rb'):
+                pass
+            return True
+        except (IOError, PermissionError) as e:
+            print(f"⏳ Aguardando arquivo ficar disponível (tentativa {i+1}/{tentativas}): {str(e)}")
+            logger.warning(f"Aguardando arquivo ficar disponível (tentativa {i+1}/{tentativas}): {str(e)}")
+            time.sleep(intervalo)
+            intervalo = min(intervalo * 2, espera)
+    return False
+
+class DocumentoPDF:
+    """
+    Sessão de leitura de um PDF: abre o arquivo com o pdfplumber uma única vez e
+    guarda, sob demanda, o texto de cada página para ser reaproveitado pelas etapas.
+    Só as `max_paginas` primeiras páginas são lidas por `ler_paginas`.
+    """
+
+    def __init__(self, caminho_pdf: str):
+        import pdfplumber
+
+        self.caminho_pdf = caminho_pdf
+        with medir_etapa("pdfplumber"):
+            self._pdf = pdfplumber.open(caminho_pdf)
+        self._textos: Dict[int, str] = {}
+
+    def __enter__(self) -> "DocumentoPDF":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        self._pdf.close()
+
+    @property
+    def num_paginas(self) -> int:
+        return len(self._pdf.pages)
+
+    def texto_pagina(self, indice: int) -> str:
+        """Texto da página (índice a partir de 0); páginas sem camada de texto retornam ""."""
+        if indice not in self._textos:
+            with medir_etapa("pdfplumber"):
+                pagina = self._pdf.pages[indice]
+                self._textos[indice] = pagina.extract_text() or ""
+                # Só o texto é guardado: os objetos de layout da página são liberados logo após a extração.
+                pagina.flush_cache()
+        return self._textos[indice]
+
+    def caracteres_pagina(self, indice: int) -> int:
+        return len(self.texto_pagina(indice).strip())
+
+    @functools.cached_property
+    def hash_conteudo(self) -> str:
+        """SHA-256 do arquivo, calculado só quando alguma etapa precisa dele (ex.: cache de OCR)."""
+        return calcular_hash_arquivo(self.caminho_pdf)
+
+    def ler_paginas(self, max_caracteres: Optional[int] = None) -> Tuple[List[str], bool]:
+        """
+        Lê as páginas em ordem até somar `max_caracteres` (padrão: `max_caracteres` da configuração;
+        0 desativa) ou chegar a `max_paginas` páginas, conferindo a memória do processo a cada
+        página. Retorna os textos lidos (o último cortado no limite) e se o documento foi truncado.
+        """
+        if max_caracteres is None:
+            max_caracteres = config.atual().max_caracteres
+        textos: List[str] = []
+        total = 0
+        num_paginas = paginas_no_orcamento(self.num_paginas)
+        for i in range(num_paginas):
+            texto = self.texto_pagina(i)
+            verificar_memoria(f"a leitura da página {i + 1}")
+            if max_caracteres > 0 and total + len(texto) > max_caracteres:
+                textos.append(texto[:max_caracteres - total])
+                logger.warning(f"Texto de {self.caminho_pdf} truncado em {max_caracteres} caracteres (página {i + 1} de {self.num_paginas})")
+                contar_metrica("texto_truncado")
+                return textos, True
+            textos.append(texto)
+            total += len(texto)
+        if num_paginas < self.num_paginas:
+            logger.warning(f"Texto de {self.caminho_pdf} truncado em {num_paginas} de {self.num_paginas} páginas (MAX_PAGINAS)")
+            contar_metrica("texto_truncado")
+            return textos, True
+        return textos, False
+
+    def texto(self) -> str:
+        """Texto das páginas, uma após a outra, dentro do orçamento de caracteres."""
+        textos, _ = self.ler_paginas()
+        return "\n".join(textos).strip()
+
+def abrir_documento_pdf(caminho_pdf: str) -> DocumentoPDF:
+    """Abre a sessão de leitura do PDF, aguardando até que o arquivo esteja disponível."""
+    if not aguardar_arquivo_disponivel(caminho_pdf):
+        raise IOError(f"Arquivo não disponível após várias tentativas: {caminho_pdf}")
+    return DocumentoPDF(caminho_pdf)
+
+def extrair_texto_pdf(caminho_pdf: str, documento: Optional[DocumentoPDF] = None) -> str:
+    """Extrai texto de um arquivo PDF, aguardando até que esteja disponível"""
+    if documento is None:
+        with abrir_documento_pdf(caminho_pdf) as documento:
+            return extrair_texto_pdf(caminho_pdf, documento)
+    logger.info(f"Extraindo texto do PDF: {caminho_pdf}")
+    return documento.texto()
+
+def calcular_hash_arquivo(caminho_arquivo: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """Calcula o SHA-256 do conteúdo do arquivo, lendo em blocos."""
+    h = hashlib.sha256()
+    with open(caminho_arquivo, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
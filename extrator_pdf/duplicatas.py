@@ -0,0 +1,289 @@
+"""
+Detecção de notas repetidas (reescaneadas, encaminhadas, com folha de rosto) pelo texto extraído.
+
+Cada nota extraída com sucesso entra num índice em SQLite com duas chaves:
+- impressão do texto: MinHash de 64 posições sobre os trios de palavras do texto normalizado que
+  contêm um número, com 16 faixas de 4 posições indexadas (LSH): notas parecidas têm ao menos uma
+  faixa igual. Só os trios com números entram porque o resto do texto é quase todo do modelo da
+  nota, igual em todas as notas do mesmo emissor;
+- chave fiscal: CNPJ do prestador e número da nota encontrados pelo regex.
+
+Um documento novo que bate com um já extraído reaproveita o resultado dele e é marcado como
+duplicata. Pelas duas chaves, os textos também precisam ser parecidos e os números do texto
+(valores, datas, CNPJ) precisam estar quase todos na outra nota, para que notas diferentes do
+mesmo modelo e prestador (ou com o número da nota lido errado pelo regex) não se confundam.
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from . import config
+from .campos import validar_cnpj
+
+logger = logging.getLogger(__name__)
+
+METODO_DUPLICATA = "Duplicata"
+
+POSICOES_MINHASH = 64
+FAIXAS_LSH = 16
+POSICOES_POR_FAIXA = POSICOES_MINHASH // FAIXAS_LSH
+TAMANHO_TRIO = 3
+# Fração mínima dos números da nota menor presentes na outra
+CONTENCAO_MINIMA_NUMEROS = 0.9
+
+@dataclass(frozen=True)
+class ImpressaoDocumento:
+    assinatura: Tuple[int, ...]
+    numeros: FrozenSet[str]
+
+def normalizar_palavras(texto: str) -> List[str]:
+    """Palavras do texto em minúsculas, sem acentos nem pontuação."""
+    sem_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"[a-z0-9]+", sem_acentos.lower())
+
+def _numero_significativo(palavra: str) -> bool:
+    return len(palavra) >= 3 and palavra.isdigit()
+
+def trios_palavras(palavras: List[str], tamanho: int = TAMANHO_TRIO) -> Set[str]:
+    """Trios de palavras seguidas que contêm um número de 3 ou mais dígitos; sem nenhum, todos os trios."""
+    if len(palavras) < tamanho:
+        return {" ".join(palavras)} if palavras else set()
+    trios = [palavras[i:i + tamanho] for i in range(len(palavras) - tamanho + 1)]
+    com_numeros = {" ".join(trio) for trio in trios if any(_numero_significativo(palavra) for palavra in trio)}
+    return com_numeros or {" ".join(trio) for trio in trios}
+
+def numeros_texto(texto: str) -> FrozenSet[str]:
+    """Números com 3 ou mais dígitos (valores, datas, CNPJ, número da nota), sem pontuação."""
+    numeros = (re.sub(r"\D", "", numero) for numero in re.findall(r"\d[\d.,/-]*", texto))
+    return frozenset(numero for numero in numeros if len(numero) >= 3)
+
+# Funções de hash (a * x + b) mod p, uma por posição da assinatura, fixas entre execuções
+_PRIMO_MERSENNE = (1 << 61) - 1
+_COEFICIENTES_MINHASH = [
+    (random.Random(posicao).randrange(1, _PRIMO_MERSENNE), random.Random(-posicao - 1).randrange(_PRIMO_MERSENNE))
+    for posicao in range(POSICOES_MINHASH)
+]
+
+def minhash(trios: Set[str]) -> Tuple[int, ...]:
+    """
+    Assinatura MinHash: em cada posição, o menor valor de uma função de hash diferente sobre os
+    trios. A fração de posições iguais entre duas assinaturas estima o índice de Jaccard dos
+    trios. Texto vazio dá assinatura vazia.
+    """
+    if not trios:
+        return ()
+    valores = [int.from_bytes(hashlib.blake2b(trio.encode("utf-8"), digest_size=8).digest(), "big") for trio in trios]
+    return tuple(
+        min((a * valor + b) % _PRIMO_MERSENNE for valor in valores) & 0xFFFFFFFF
+        for a, b in _COEFICIENTES_MINHASH
+    )
+
+def impressao_documento(texto: str) -> ImpressaoDocumento:
+    return ImpressaoDocumento(minhash(trios_palavras(normalizar_palavras(texto))), numeros_texto(texto))
+
+def similaridade_assinaturas(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimativa do índice de Jaccard entre os trios dos dois textos."""
+    if not a or not b:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / POSICOES_MINHASH
+
+def contencao_numeros(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    menor = min(len(a), len(b))
+    return len(a & b) / menor if menor else 0.0
+
+def faixas_lsh(assinatura: Tuple[int, ...]) -> List[int]:
+    """Um inteiro de 64 bits (com sinal, como o INTEGER do SQLite) por faixa da assinatura."""
+    faixas = []
+    for faixa in range(FAIXAS_LSH):
+        valores = assinatura[faixa * POSICOES_POR_FAIXA:(faixa + 1) * POSICOES_POR_FAIXA]
+        resumo = hashlib.blake2b(struct.pack(f"<B{POSICOES_POR_FAIXA}I", faixa, *valores), digest_size=8).digest()
+        faixas.append(int.from_bytes(resumo, "big", signed=True))
+    return faixas
+
+def chave_fiscal(dados: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(CNPJ só com dígitos, número da nota sem zeros à esquerda), se o CNPJ for válido e houver número."""
+    cnpj = re.sub(r"\D", "", str(dados.get("cnpj", "")))
+    numero_nota = str(dados.get("numero_nota", "")).strip().lstrip("0")
+    if not numero_nota or not validar_cnpj(cnpj):
+        return None
+    return cnpj, numero_nota
+
+def _empacotar(assinatura: Tuple[int, ...]) -> bytes:
+    return struct.pack(f"<{len(assinatura)}I", *assinatura)
+
+def _desempacotar(dados: bytes) -> Tuple[int, ...]:
+    return struct.unpack(f"<{len(dados) // 4}I", dados)
+
+class IndiceDuplicatas:
+    """
+    Índice persistente das notas já extraídas. Como os caches, usa WAL (vários processos
+    leem e gravam ao mesmo tempo) e abre a conexão no primeiro uso, no processo que vai usá-la.
+    """
+
+    def __init__(self, caminho: str, similaridade_minima: float = 0.5):
+        self.caminho = caminho
+        self.similaridade_minima = similaridade_minima
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._trava = threading.RLock()
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS documentos ("
+                " id INTEGER PRIMARY KEY, caminho TEXT NOT NULL UNIQUE, hash_arquivo TEXT NOT NULL,"
+                " assinatura BLOB NOT NULL, numeros TEXT NOT NULL, cnpj TEXT, numero_nota TEXT,"
+                " resultado TEXT NOT NULL, criado_em REAL NOT NULL)"
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_documentos_chave ON documentos (cnpj, numero_nota)")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS faixas (valor INTEGER NOT NULL, documento INTEGER NOT NULL,"
+                " PRIMARY KEY (valor, documento)) WITHOUT ROWID"
+            )
+            self._pid = os.getpid()
+        return self._conexao
+
+    @contextlib.contextmanager
+    def lote(self) -> Iterator[None]:
+        """Agrupa vários `registrar` numa única transação (dentro de outro lote, usa a dele)."""
+        with self._trava:
+            conexao = self._conectar()
+            if conexao.in_transaction:
+                yield
+                return
+            conexao.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            conexao.execute("COMMIT")
+
+    def procurar(
+        self,
+        impressao: ImpressaoDocumento,
+        chave: Optional[Tuple[str, str]],
+        caminho_pdf: str
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Nota já extraída que corresponde a este documento: (caminho dela, resultado guardado).
+        O próprio arquivo (mesmo caminho, ex.: reprocessado com --force) não conta como duplicata.
+        """
+        try:
+            return self._procurar(impressao, chave, os.path.abspath(caminho_pdf))
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao consultar o índice de duplicatas: {str(e)}")
+            return None
+
+    def _procurar(
+        self,
+        impressao: ImpressaoDocumento,
+        chave: Optional[Tuple[str, str]],
+        caminho_pdf: str
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._trava:
+            conexao = self._conectar()
+            if chave is not None:
+                # O número da nota do regex é heurístico (ex.: a inscrição municipal no começo de uma
+                # linha): a chave só vale com o conteúdo também batendo, como pela impressão
+                for caminho, assinatura, numeros, resultado in conexao.execute(
+                    "SELECT caminho, assinatura, numeros, resultado FROM documentos WHERE cnpj = ? AND numero_nota = ?", chave
+                ):
+                    if caminho != caminho_pdf and self._conteudo_confere(impressao, assinatura, numeros):
+                        return caminho, json.loads(resultado)
+            if not impressao.assinatura:
+                return None
+            candidatos = conexao.execute(
+                "SELECT id, caminho, assinatura, numeros, cnpj, numero_nota FROM documentos WHERE id IN"
+                f" (SELECT documento FROM faixas WHERE valor IN ({', '.join('?' * FAIXAS_LSH)}))",
+                faixas_lsh(impressao.assinatura)
+            ).fetchall()
+            melhor: Optional[Tuple[float, int, str]] = None
+            for id_documento, caminho, assinatura, numeros, cnpj, numero_nota in candidatos:
+                if caminho == caminho_pdf:
+                    continue
+                # Mesma aparência mas outra nota fiscal (ex.: o mesmo modelo de outro mês)
+                if chave is not None and cnpj is not None and (cnpj, numero_nota) != chave:
+                    continue
+                if not self._conteudo_confere(impressao, assinatura, numeros):
+                    continue
+                similaridade = similaridade_assinaturas(impressao.assinatura, _desempacotar(assinatura))
+                if melhor is None or similaridade > melhor[0]:
+                    melhor = (similaridade, id_documento, caminho)
+            if melhor is None:
+                return None
+            linha = conexao.execute("SELECT resultado FROM documentos WHERE id = ?", (melhor[1],)).fetchone()
+            return melhor[2], json.loads(linha[0])
+
+    def _conteudo_confere(self, impressao: ImpressaoDocumento, assinatura: bytes, numeros: str) -> bool:
+        """Textos parecidos e os números (valores, datas, CNPJ) de um quase todos no outro."""
+        if similaridade_assinaturas(impressao.assinatura, _desempacotar(assinatura)) < self.similaridade_minima:
+            return False
+        return contencao_numeros(impressao.numeros, frozenset(numeros.split())) >= CONTENCAO_MINIMA_NUMEROS
+
+    def registrar(
+        self,
+        impressao: ImpressaoDocumento,
+        chave: Optional[Tuple[str, str]],
+        caminho_pdf: str,
+        hash_arquivo: str,
+        resultado: Dict[str, Any]
+    ) -> None:
+        """Guarda a nota extraída; um arquivo já registrado no mesmo caminho é substituído."""
+        caminho_pdf = os.path.abspath(caminho_pdf)
+        with self._trava:
+            try:
+                conexao = self._conectar()
+                with self.lote():
+                    anterior = conexao.execute("SELECT id, assinatura FROM documentos WHERE caminho = ?", (caminho_pdf,)).fetchone()
+                    if anterior is not None:
+                        faixas_anteriores = faixas_lsh(_desempacotar(anterior[1])) if anterior[1] else []
+                        conexao.executemany("DELETE FROM faixas WHERE valor = ? AND documento = ?",
+                                            [(valor, anterior[0]) for valor in faixas_anteriores])
+                        conexao.execute("DELETE FROM documentos WHERE id = ?", (anterior[0],))
+                    cursor = conexao.execute(
+                        "INSERT INTO documentos (caminho, hash_arquivo, assinatura, numeros, cnpj, numero_nota, resultado, criado_em)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (caminho_pdf, hash_arquivo, _empacotar(impressao.assinatura), " ".join(sorted(impressao.numeros)),
+                         *(chave or (None, None)), json.dumps(resultado, ensure_ascii=False), time.time())
+                    )
+                    if impressao.assinatura:
+                        conexao.executemany("INSERT OR IGNORE INTO faixas (valor, documento) VALUES (?, ?)",
+                                            [(valor, cursor.lastrowid) for valor in faixas_lsh(impressao.assinatura)])
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao gravar no índice de duplicatas: {str(e)}")
+
+    def __len__(self) -> int:
+        with self._trava:
+            return self._conectar().execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+
+_indice: Optional[IndiceDuplicatas] = None
+_indice_de: Optional[config.Extractor] = None
+
+def indice_duplicatas() -> Optional[IndiceDuplicatas]:
+    """Índice da configuração ativa (None com `detectar_duplicatas` desligado)."""
+    global _indice, _indice_de
+    cfg = config.atual()
+    if _indice_de is not cfg:
+        _indice = IndiceDuplicatas(
+            os.path.join(cfg.pasta_cache, "duplicatas.sqlite3"),
+            cfg.duplicatas_similaridade_minima
+        ) if cfg.detectar_duplicatas else None
+        _indice_de = cfg
+    return _indice
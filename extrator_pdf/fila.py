@@ -0,0 +1,355 @@
+"""
+Fila de trabalhos compartilhada (--queue): várias máquinas ou processos esvaziam a mesma pasta
+de PDFs sem processar o mesmo arquivo duas vezes.
+
+A fila é um banco SQLite na pasta de saída. Cada PDF é um trabalho. Um processo reivindica um
+trabalho pendente com um lease (prazo) e o renova periodicamente (batimento) enquanto o documento
+é processado. Um trabalho cujo lease venceu (processo encerrado, máquina desligada) volta a ser
+reivindicado por outro processo. O estado final é gravado uma única vez, só por quem ainda detém o
+lease, e confirmado depois que as linhas foram acrescentadas às saídas. Antes de acrescentá-las, o
+tamanho de cada saída vai para um diário ao lado do banco: se o processo for interrompido antes da
+confirmação, o próximo a gravar corta as saídas de volta a esse tamanho e o documento, refeito por
+outro processo, não fica com a linha repetida.
+"""
+import concurrent.futures
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import config
+from .manifesto import VERSAO_PIPELINE
+from .metricas import ColetorMetricas
+from .pipeline import entregar_resultado, processar_arquivos
+from .saida import GravadorResultados, posicao_saida, restaurar_saida
+
+logger = logging.getLogger(__name__)
+
+ESTADOS_FINAIS = ("sucesso", "erro", "nao_suportado")
+# Sem trabalhos livres, intervalo máximo entre as verificações dos que estão com outros processos
+FILA_ESPERA_SEGUNDOS = 10.0
+
+def identificar_processo() -> str:
+    """Dono dos leases deste processo: máquina, pid e um sufixo aleatório (pids se repetem)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class FilaTrabalhos:
+    """
+    Fila persistente de PDFs em SQLite, compartilhável entre processos e máquinas.
+
+    O WAL depende de memória compartilhada entre os processos e não funciona entre máquinas
+    num compartilhamento de rede, então por padrão o banco usa o journal de rollback;
+    `wal=True` serve quando todos os processos rodam na mesma máquina.
+    """
+
+    def __init__(self, caminho: str, duracao_lease: float = 300.0, max_tentativas: int = 3, wal: bool = False):
+        self.caminho = caminho
+        self.duracao_lease = duracao_lease
+        self.max_tentativas = max(1, max_tentativas)
+        self.wal = wal
+        self._conexao: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._trava = threading.RLock()
+
+    def _conectar(self) -> sqlite3.Connection:
+        if self._conexao is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            self._conexao = sqlite3.connect(self.caminho, timeout=60, check_same_thread=False, isolation_level=None)
+            self._conexao.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS trabalhos ("
+                " id INTEGER PRIMARY KEY, caminho TEXT NOT NULL UNIQUE, tamanho INTEGER, mtime_ns INTEGER,"
+                " versao TEXT NOT NULL, estado TEXT NOT NULL DEFAULT 'pendente', dono TEXT, lease_ate REAL,"
+                " tentativas INTEGER NOT NULL DEFAULT 0, detalhes TEXT, criado_em REAL NOT NULL, concluido_em REAL)"
+            )
+            self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_trabalhos_estado ON trabalhos (estado, id)")
+            # Marcas das gravações confirmadas, conferidas com o diário das saídas
+            self._conexao.execute("CREATE TABLE IF NOT EXISTS gravacoes (marca TEXT PRIMARY KEY)")
+            self._pid = os.getpid()
+        return self._conexao
+
+    @contextlib.contextmanager
+    def _transacao(self) -> Iterator[sqlite3.Connection]:
+        """Transação com a trava de escrita do banco desde o início (BEGIN IMMEDIATE)."""
+        with self._trava:
+            conexao = self._conectar()
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            conexao.execute("COMMIT")
+
+    @property
+    def caminho_diario(self) -> str:
+        return self.caminho + ".gravacao"
+
+    def _recuperar_gravacao(self, conexao: sqlite3.Connection) -> None:
+        """
+        Com a trava de escrita: se houver o diário de uma gravação que não chegou a ser confirmada
+        (processo interrompido entre as saídas e o COMMIT), corta as saídas de volta ao tamanho anterior.
+        """
+        try:
+            with open(self.caminho_diario, encoding="utf-8") as f:
+                diario = json.load(f)
+        except FileNotFoundError:
+            diario = None
+        except (OSError, ValueError):
+            diario = {}  # diário pela metade: as saídas ainda não tinham sido tocadas
+        if diario is not None:
+            confirmada = conexao.execute("SELECT 1 FROM gravacoes WHERE marca = ?", (diario.get("marca"),)).fetchone()
+            if diario and not confirmada:
+                for caminho, posicao in diario["saidas"].items():
+                    restaurar_saida(caminho, posicao)
+                print(f"⚠️ Gravação interrompida de {diario.get('dono')} desfeita nas saídas")
+                logger.warning(f"Gravação interrompida de {diario.get('dono')} desfeita em {', '.join(diario['saidas'])}")
+            os.remove(self.caminho_diario)
+        conexao.execute("DELETE FROM gravacoes")
+
+    @contextlib.contextmanager
+    def exclusiva(self) -> Iterator[None]:
+        """Segura a trava de escrita da fila: o bloco não roda junto com a gravação de outro processo."""
+        with self._transacao() as conexao:
+            self._recuperar_gravacao(conexao)
+            yield
+
+    def enfileirar(self, caminhos: List[str], forcar: bool = False, refazer_erros: bool = False) -> int:
+        """
+        Acrescenta os PDFs à fila. Um trabalho já concluído volta a ficar pendente se o arquivo mudou
+        (tamanho ou mtime), se a versão do pipeline mudou, com `forcar` ou, se terminou em erro,
+        com `refazer_erros`. Retorna quantos trabalhos ficaram pendentes por esta chamada.
+        """
+        registros = []
+        for caminho in caminhos:
+            try:
+                estado = os.stat(caminho)
+            except OSError as e:
+                logger.warning(f"Não foi possível enfileirar {caminho}: {str(e)}")
+                continue
+            registros.append((os.path.abspath(caminho), estado.st_size, estado.st_mtime_ns, VERSAO_PIPELINE, time.time()))
+        finais = ", ".join(f"'{estado}'" for estado in ESTADOS_FINAIS)
+        with self._transacao() as conexao:
+            antes = conexao.total_changes
+            conexao.executemany(
+                "INSERT INTO trabalhos (caminho, tamanho, mtime_ns, versao, criado_em) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (caminho) DO UPDATE SET tamanho = excluded.tamanho, mtime_ns = excluded.mtime_ns,"
+                " versao = excluded.versao, estado = 'pendente', dono = NULL, lease_ate = NULL, tentativas = 0,"
+                " detalhes = NULL, concluido_em = NULL"
+                f" WHERE trabalhos.estado IN ({finais}) AND (trabalhos.tamanho IS NOT excluded.tamanho"
+                " OR trabalhos.mtime_ns IS NOT excluded.mtime_ns OR trabalhos.versao != excluded.versao"
+                f" OR {int(forcar)} OR ({int(refazer_erros)} AND trabalhos.estado = 'erro'))",
+                registros
+            )
+            return conexao.total_changes - antes
+
+    def reivindicar(self, dono: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Próximo trabalho livre (pendente ou com o lease vencido), agora com um lease de `dono`:
+        (caminho, motivo do abandono); None se não houver. Trabalhos que já esgotaram `max_tentativas`
+        sem concluir (ex.: um PDF que derruba o processo) voltam com o motivo preenchido, para
+        `dono` gravar a linha de erro em vez de processá-los de novo.
+        """
+        while True:
+            agora = time.time()
+            with self._transacao() as conexao:
+                linha = conexao.execute(
+                    "SELECT id, caminho, tentativas FROM trabalhos WHERE estado = 'pendente' ORDER BY id LIMIT 1"
+                ).fetchone() or conexao.execute(
+                    "SELECT id, caminho, tentativas FROM trabalhos WHERE estado = 'em_andamento' AND lease_ate < ?"
+                    " ORDER BY id LIMIT 1",
+                    (agora,)
+                ).fetchone()
+                if linha is None:
+                    return None
+                id_trabalho, caminho, tentativas = linha
+                if tentativas >= self.max_tentativas:
+                    detalhes = f"Abandonado após {tentativas} tentativa(s) sem conclusão (lease vencido)."
+                    conexao.execute(
+                        "UPDATE trabalhos SET estado = 'em_andamento', dono = ?, lease_ate = ?, detalhes = ? WHERE id = ?",
+                        (dono, agora + self.duracao_lease, detalhes, id_trabalho)
+                    )
+                    print(f"⚠️ {caminho}: {detalhes}")
+                    logger.error(f"{caminho}: {detalhes}")
+                    return caminho, detalhes
+                conexao.execute(
+                    "UPDATE trabalhos SET estado = 'em_andamento', dono = ?, lease_ate = ?, tentativas = tentativas + 1"
+                    " WHERE id = ?",
+                    (dono, agora + self.duracao_lease, id_trabalho)
+                )
+            if tentativas:
+                logger.warning(f"Retomando {caminho} (lease vencido, tentativa {tentativas + 1})")
+            return caminho, None
+
+    def renovar(self, dono: str) -> int:
+        """Estende o lease de todos os trabalhos em andamento de `dono`. Retorna quantos foram renovados."""
+        with self._trava:
+            cursor = self._conectar().execute(
+                "UPDATE trabalhos SET lease_ate = ? WHERE dono = ? AND estado = 'em_andamento'",
+                (time.time() + self.duracao_lease, dono)
+            )
+            return cursor.rowcount
+
+    def liberar(self, dono: str) -> int:
+        """Devolve à fila os trabalhos em andamento de `dono` (ex.: ao interromper com Ctrl+C)."""
+        with self._trava:
+            cursor = self._conectar().execute(
+                "UPDATE trabalhos SET estado = 'pendente', dono = NULL, lease_ate = NULL, tentativas = MAX(0, tentativas - 1)"
+                " WHERE dono = ? AND estado = 'em_andamento'",
+                (dono,)
+            )
+            return cursor.rowcount
+
+    @contextlib.contextmanager
+    def concluir(
+        self,
+        dono: str,
+        contextos: List[Tuple[str, Any, str]],
+        saidas: Optional[List[str]] = None
+    ) -> Iterator[List[Tuple[str, Any, str]]]:
+        """
+        Transação de conclusão, para `GravadorResultados(trava=...)`: entrega os contextos
+        (caminho, identificação, destino) cujos trabalhos `dono` ainda detém e, ao sair sem erro,
+        grava o estado final deles. As linhas gravadas dentro do bloco ficam serializadas com as
+        dos outros processos. Se o lease foi perdido, outro processo refaz o documento e a linha
+        deste não é gravada. O tamanho das `saidas` (caminhos) vai antes para o diário, e as linhas
+        de uma gravação que não chega ao COMMIT são desfeitas (aqui, ou pelo próximo processo).
+        """
+        with self._transacao() as conexao:
+            self._recuperar_gravacao(conexao)
+            caminhos = {os.path.abspath(contexto[0]) for contexto in contextos}
+            marcadores = ", ".join("?" * len(caminhos))
+            detidos = {caminho for (caminho,) in conexao.execute(
+                f"SELECT caminho FROM trabalhos WHERE dono = ? AND estado = 'em_andamento' AND caminho IN ({marcadores})",
+                (dono, *caminhos)
+            )}
+            aceitos = [contexto for contexto in contextos if os.path.abspath(contexto[0]) in detidos]
+            for contexto in contextos:
+                if contexto not in aceitos:
+                    logger.warning(f"Lease de {contexto[0]} perdido para outro processo; resultado descartado")
+            marca = uuid.uuid4().hex
+            posicoes = {caminho: posicao_saida(caminho) for caminho in saidas or []}
+            if posicoes:
+                with open(self.caminho_diario, "w", encoding="utf-8") as f:
+                    json.dump({"marca": marca, "dono": dono, "saidas": posicoes}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+            try:
+                yield aceitos
+            except BaseException:
+                for caminho, posicao in posicoes.items():
+                    restaurar_saida(caminho, posicao)
+                if posicoes:
+                    os.remove(self.caminho_diario)
+                raise
+            conexao.execute("INSERT INTO gravacoes (marca) VALUES (?)", (marca,))
+            agora = time.time()
+            conexao.executemany(
+                "UPDATE trabalhos SET estado = ?, dono = NULL, lease_ate = NULL, concluido_em = ?"
+                " WHERE caminho = ? AND dono = ? AND estado = 'em_andamento'",
+                [(destino, agora, os.path.abspath(caminho), dono) for caminho, _, destino in aceitos]
+            )
+
+    def contagem(self) -> Dict[str, int]:
+        """Quantidade de trabalhos por estado."""
+        with self._trava:
+            return dict(self._conectar().execute("SELECT estado, COUNT(*) FROM trabalhos GROUP BY estado").fetchall())
+
+    def em_andamento_por_outros(self, dono: str) -> Tuple[int, Optional[float]]:
+        """Trabalhos com lease válido de outros processos e o vencimento mais próximo entre eles."""
+        with self._trava:
+            quantidade, vencimento = self._conectar().execute(
+                "SELECT COUNT(*), MIN(lease_ate) FROM trabalhos WHERE estado = 'em_andamento' AND dono != ? AND lease_ate >= ?",
+                (dono, time.time())
+            ).fetchone()
+            return quantidade, vencimento
+
+    @contextlib.contextmanager
+    def batimento(self, dono: str) -> Iterator[None]:
+        """Renova numa thread, a cada terço da duração do lease, os trabalhos de `dono` enquanto o bloco roda."""
+        parar = threading.Event()
+
+        def renovar_periodicamente() -> None:
+            while not parar.wait(self.duracao_lease / 3):
+                try:
+                    self.renovar(dono)
+                except sqlite3.Error as e:
+                    logger.warning(f"Falha ao renovar os leases da fila: {str(e)}")
+
+        thread = threading.Thread(target=renovar_periodicamente, name="batimento-fila", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            parar.set()
+            thread.join()
+
+def abrir_fila(caminho: str) -> FilaTrabalhos:
+    """Fila em `caminho` com os prazos e o modo do journal da configuração ativa."""
+    cfg = config.atual()
+    return FilaTrabalhos(caminho, cfg.fila_lease_segundos, cfg.fila_max_tentativas, cfg.fila_wal)
+
+def iterar_reivindicados(
+    fila: FilaTrabalhos,
+    dono: str,
+    identificacoes: Dict[str, Dict[str, Any]],
+    gravador: GravadorResultados,
+    documentos_por_metodo: Dict[str, int],
+    coletor: Optional[ColetorMetricas] = None
+) -> Iterator[str]:
+    """
+    Reivindica um trabalho por vez, só quando o chamador pede o próximo (o lease começa perto
+    do processamento), até não haver trabalhos livres. Cada caminho entra em `identificacoes`.
+    Trabalhos abandonados não são processados: a linha de erro deles vai direto para o gravador.
+    """
+    while True:
+        reivindicado = fila.reivindicar(dono)
+        if reivindicado is None:
+            return
+        caminho, abandono = reivindicado
+        identificacoes[caminho] = {}
+        if abandono is not None:
+            entregar_resultado(caminho, {"destino": "erro", "linha": {
+                "caminho_arquivo": caminho,
+                "erro_detalhes": abandono,
+                "tipo_documento": "DESCONHECIDO"
+            }}, identificacoes, gravador, documentos_por_metodo, coletor)
+            continue
+        yield caminho
+
+def processar_fila(
+    fila: FilaTrabalhos,
+    dono: str,
+    workers: int,
+    gravador: GravadorResultados,
+    documentos_por_metodo: Dict[str, int],
+    executor: Optional[concurrent.futures.Executor] = None,
+    coletor: Optional[ColetorMetricas] = None,
+    aguardar_outros: bool = True
+) -> None:
+    """
+    Processa trabalhos da fila até não sobrar nenhum livre. Com `aguardar_outros`, continua enquanto
+    outros processos tiverem trabalhos em andamento, retomando os que tiverem o lease vencido.
+    """
+    aguardando = None
+    while True:
+        identificacoes: Dict[str, Dict[str, Any]] = {}
+        reivindicados = iterar_reivindicados(fila, dono, identificacoes, gravador, documentos_por_metodo, coletor)
+        processar_arquivos(reivindicados, identificacoes, workers, gravador, documentos_por_metodo, executor, coletor)
+        gravador.gravar()
+        if not aguardar_outros:
+            return
+        quantidade, vencimento = fila.em_andamento_por_outros(dono)
+        if not quantidade:
+            return
+        if quantidade != aguardando:
+            print(f"Aguardando {quantidade} trabalho(s) em andamento em outros processos...")
+            logger.info(f"Fila sem trabalhos livres; {quantidade} em andamento em outros processos")
+            aguardando = quantidade
+        time.sleep(min(FILA_ESPERA_SEGUNDOS, max(1.0, vencimento - time.time())))
@@ -0,0 +1,128 @@
+"""Manifesto dos arquivos já processados, para que reexecuções só processem o que é novo ou mudou."""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .documento import calcular_hash_arquivo
+
+logger = logging.getLogger(__name__)
+
+# Incrementar sempre que uma mudança na extração justificar reprocessar arquivos já concluídos
+VERSAO_PIPELINE = "1"
+
+class ManifestoProcessamento:
+    """
+    Registro persistente (JSON Lines, só acrescenta) do resultado de cada PDF processado.
+
+    As entradas são indexadas pelo hash do conteúdo + VERSAO_PIPELINE. Tamanho e mtime
+    do caminho permitem reconhecer arquivos inalterados sem recalcular o hash.
+    """
+
+    def __init__(self, caminho_manifesto: str):
+        self.caminho_manifesto = caminho_manifesto
+        self.por_hash: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.por_caminho: Dict[str, Dict[str, Any]] = {}
+        self._carregar()
+
+    def _carregar(self) -> None:
+        if not os.path.exists(self.caminho_manifesto):
+            return
+        total_linhas = 0
+        with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    entrada = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue  # linha truncada por uma execução interrompida
+                total_linhas += 1
+                self.por_hash[(entrada["hash"], entrada["versao"])] = entrada
+                self.por_caminho[entrada["caminho"]] = entrada
+        logger.info(f"Manifesto carregado: {len(self.por_caminho)} arquivos registrados ({self.caminho_manifesto})")
+        # Compacta quando o histórico acumulou muitas entradas repetidas
+        if total_linhas > 2 * len(self.por_caminho) + 1000:
+            self._compactar()
+
+    def _compactar(self) -> None:
+        temporario = self.caminho_manifesto + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            for entrada in self.por_caminho.values():
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        os.replace(temporario, self.caminho_manifesto)
+        logger.info(f"Manifesto compactado: {self.caminho_manifesto}")
+
+    def identificar(self, caminho_pdf: str) -> Dict[str, Any]:
+        """
+        Retorna tamanho, mtime e hash do arquivo. O hash só é recalculado se o
+        tamanho ou o mtime mudaram desde o registro anterior do mesmo caminho.
+        """
+        estado = os.stat(caminho_pdf)
+        anterior = self.por_caminho.get(caminho_pdf)
+        if anterior and anterior["tamanho"] == estado.st_size and anterior["mtime_ns"] == estado.st_mtime_ns:
+            hash_arquivo = anterior["hash"]
+        else:
+            hash_arquivo = calcular_hash_arquivo(caminho_pdf)
+        return {"tamanho": estado.st_size, "mtime_ns": estado.st_mtime_ns, "hash": hash_arquivo}
+
+    def status(self, identificacao: Dict[str, Any]) -> Optional[str]:
+        """Status registrado para o conteúdo na versão atual do pipeline, ou None se inédito."""
+        entrada = self.por_hash.get((identificacao["hash"], VERSAO_PIPELINE))
+        return entrada["status"] if entrada else None
+
+    def registrar(self, caminho_pdf: str, identificacao: Dict[str, Any], status: str) -> None:
+        """Acrescenta o resultado do arquivo ao manifesto ("sucesso", "erro" ou "nao_suportado")."""
+        self.registrar_lote([(caminho_pdf, identificacao, status)])
+
+    def registrar_lote(self, registros: List[Tuple[str, Dict[str, Any], str]]) -> None:
+        """Acrescenta vários resultados (caminho, identificação, status) com uma única escrita."""
+        data = datetime.now().isoformat(timespec="seconds")
+        entradas = [{
+            "caminho": caminho_pdf,
+            "tamanho": identificacao["tamanho"],
+            "mtime_ns": identificacao["mtime_ns"],
+            "hash": identificacao["hash"],
+            "versao": VERSAO_PIPELINE,
+            "status": status,
+            "data": data,
+        } for caminho_pdf, identificacao, status in registros]
+        with open(self.caminho_manifesto, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entrada, ensure_ascii=False) + "\n" for entrada in entradas))
+        for entrada in entradas:
+            self.por_hash[(entrada["hash"], entrada["versao"])] = entrada
+            self.por_caminho[entrada["caminho"]] = entrada
+
+def filtrar_pendentes(
+    pdf_files: List[str],
+    manifesto: ManifestoProcessamento,
+    forcar: bool = False,
+    refazer_erros: bool = False
+) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """
+    Separa os PDFs que precisam ser processados nesta execução.
+
+    Retorna a lista de pendentes e a identificação (tamanho/mtime/hash) de cada um,
+    usada depois para registrar o resultado no manifesto.
+    """
+    pendentes = []
+    identificacoes = {}
+    ignorados = 0
+    for pdf_path in pdf_files:
+        try:
+            identificacao = manifesto.identificar(pdf_path)
+        except OSError as e:
+            # Arquivo ainda sendo copiado ou inacessível: processa sem registrar no manifesto
+            logger.warning(f"Não foi possível identificar {pdf_path} para o manifesto: {str(e)}")
+            pendentes.append(pdf_path)
+            continue
+        status = manifesto.status(identificacao)
+        if not forcar and status is not None and not (status == "erro" and refazer_erros):
+            ignorados += 1
+            continue
+        pendentes.append(pdf_path)
+        identificacoes[pdf_path] = identificacao
+    if ignorados:
+        print(f"{ignorados} arquivos já processados anteriormente foram ignorados")
+        logger.info(f"{ignorados} arquivos ignorados pelo manifesto")
+    return pendentes, identificacoes
+
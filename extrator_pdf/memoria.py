@@ -0,0 +1,92 @@
+"""
+Orçamento por documento: páginas, páginas com OCR, caracteres guardados e memória do processo.
+
+Um documento acima do orçamento de páginas, de páginas com OCR ou de caracteres é processado
+até o limite, com o texto marcado como truncado. Acima do orçamento de memória, levanta
+`OrcamentoExcedido`, que o pipeline transforma numa linha de erro. A memória conta a partir do
+início do documento (`orcamento_memoria`): o Python raramente devolve ao sistema a memória já
+liberada, e a de um documento grande anterior não deve derrubar os seguintes.
+"""
+import contextlib
+import functools
+import gc
+import logging
+import os
+import sys
+from typing import Iterator, List, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class OrcamentoExcedido(Exception):
+    """Documento acima de um dos limites da configuração; a mensagem diz qual."""
+
+@functools.lru_cache(maxsize=None)
+def _tamanho_pagina_memoria() -> int:
+    return os.sysconf("SC_PAGE_SIZE")
+
+def rss_atual_mb() -> Optional[float]:
+    """
+    Memória residente atual do processo, em MB: pelo psutil (opcional) ou, sem ele, por
+    /proc/self/statm no Linux. None quando não há como medir.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _tamanho_pagina_memoria() / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+_aviso_sem_medicao = False
+# Memória do processo no início do documento em andamento (0 fora de `orcamento_memoria`)
+_rss_inicial_mb = 0.0
+
+@contextlib.contextmanager
+def orcamento_memoria() -> Iterator[None]:
+    """Dentro do bloco (um documento), `verificar_memoria` mede o crescimento desde o início dele."""
+    global _rss_inicial_mb
+    anterior = _rss_inicial_mb
+    _rss_inicial_mb = (rss_atual_mb() or 0.0) if config.atual().limite_memoria_mb > 0 else 0.0
+    try:
+        yield
+    finally:
+        _rss_inicial_mb = anterior
+
+def verificar_memoria(etapa: str) -> None:
+    """
+    Levanta OrcamentoExcedido se a memória do processo cresceu mais que `limite_memoria_mb`
+    (0 desativa) desde o início do documento.
+    """
+    global _aviso_sem_medicao
+    limite = config.atual().limite_memoria_mb
+    if limite <= 0:
+        return
+    rss = rss_atual_mb()
+    if rss is None:
+        if not _aviso_sem_medicao:
+            _aviso_sem_medicao = True
+            logger.warning(f"Não foi possível medir a memória do processo ({sys.platform}); instale o psutil para usar LIMITE_MEMORIA_MB")
+        return
+    if rss - _rss_inicial_mb > limite:
+        gc.collect()
+        rss = rss_atual_mb() or rss
+        if rss - _rss_inicial_mb > limite:
+            raise OrcamentoExcedido(
+                f"memória do processo cresceu {rss - _rss_inicial_mb:.0f} MB (para {rss:.0f} MB) durante {etapa}"
+                f" (limite LIMITE_MEMORIA_MB={limite:.0f})"
+            )
+
+def paginas_no_orcamento(num_paginas: int) -> int:
+    """Quantas das `num_paginas` páginas são lidas: as `max_paginas` primeiras (0 desativa)."""
+    limite = config.atual().max_paginas
+    return min(num_paginas, limite) if limite > 0 else num_paginas
+
+def paginas_ocr_no_orcamento(paginas: List[int]) -> List[int]:
+    """As `max_paginas_ocr` primeiras das páginas sem texto (0 desativa), que são as que passam pelo OCR."""
+    limite = config.atual().max_paginas_ocr
+    return paginas[:limite] if limite > 0 else paginas
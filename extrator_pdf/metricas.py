@@ -0,0 +1,202 @@
+"""Métricas por documento e por etapa (--metrics) e o resumo da execução."""
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class MetricasDocumento:
+    """
+    Durações por etapa e contadores de um documento. As etapas são folhas que não se
+    sobrepõem (pdfplumber, rasterização, Tesseract, regex, API...); durações de etapas
+    que rodam em várias threads, como o Tesseract, são somadas.
+    """
+
+    def __init__(self, caminho_pdf: str):
+        self.caminho_pdf = caminho_pdf
+        self.etapas: Dict[str, float] = {}
+        self.contadores: Dict[str, int] = {}
+        # DPI e confiança média de cada página reconhecida pelo OCR adaptativo
+        self.ocr_por_pagina: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self.total = 0.0
+
+    @contextlib.contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.acumular(etapa, time.perf_counter() - inicio)
+
+    def acumular(self, etapa: str, segundos: float) -> None:
+        with self._lock:
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + segundos
+
+    def contar(self, nome: str, quantidade: int = 1) -> None:
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + quantidade
+
+    def registrar_pagina_ocr(self, pagina: int, dpi: int, confianca: float) -> None:
+        with self._lock:
+            self.ocr_por_pagina.append({"pagina": pagina + 1, "dpi": dpi, "confianca": round(confianca, 1)})
+
+    def finalizar(self) -> None:
+        self.total = time.perf_counter() - self._inicio
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "arquivo": self.caminho_pdf,
+            "total": round(self.total, 6),
+            "etapas": {etapa: round(segundos, 6) for etapa, segundos in self.etapas.items()},
+            **self.contadores,
+            **({"ocr_por_pagina": sorted(self.ocr_por_pagina, key=lambda p: p["pagina"])} if self.ocr_por_pagina else {}),
+        }
+
+# Documento em processamento neste processo (None com as métricas desativadas)
+_metricas_documento: Optional[MetricasDocumento] = None
+_SEM_MEDICAO = contextlib.nullcontext()
+
+def medir_etapa(etapa: str):
+    """Context manager que soma a duração do bloco na etapa do documento atual; sem custo se desativado."""
+    metricas = _metricas_documento
+    return _SEM_MEDICAO if metricas is None else metricas.medir(etapa)
+
+def contar_metrica(nome: str, quantidade: int = 1) -> None:
+    metricas = _metricas_documento
+    if metricas is not None:
+        metricas.contar(nome, quantidade)
+
+def registrar_pagina_ocr(pagina: int, dpi: int, confianca: float) -> None:
+    metricas = _metricas_documento
+    if metricas is not None:
+        metricas.registrar_pagina_ocr(pagina, dpi, confianca)
+
+@contextlib.contextmanager
+def medindo_documento(caminho_pdf: str) -> Iterator[MetricasDocumento]:
+    """Torna o documento o alvo de `medir_etapa`/`contar_metrica` durante o bloco e registra o total ao sair."""
+    global _metricas_documento
+    _metricas_documento = metricas = MetricasDocumento(caminho_pdf)
+    try:
+        yield metricas
+    finally:
+        _metricas_documento = None
+        metricas.finalizar()
+
+def _percentil(valores_ordenados: List[float], fracao: float) -> float:
+    """Percentil pelo método nearest-rank."""
+    if not valores_ordenados:
+        return 0.0
+    posicao = max(0, math.ceil(fracao * len(valores_ordenados)) - 1)
+    return valores_ordenados[posicao]
+
+class ColetorMetricas:
+    """
+    Junta, no processo principal, as métricas de cada documento e gera ao final o resumo
+    da execução (quantidade, p50/p95/máximo por etapa, vazão) em JSON e no formato
+    textfile do Prometheus, além de um registro JSONL por documento.
+    """
+
+    PREFIXO_PROMETHEUS = "extrator_pdf"
+
+    def __init__(self):
+        self.documentos: List[Dict[str, Any]] = []
+        self.inicio = datetime.now()
+        self._inicio = time.perf_counter()
+
+    def adicionar(self, metricas: Dict[str, Any]) -> None:
+        self.documentos.append(metricas)
+
+    def resumo(self) -> Dict[str, Any]:
+        duracao = time.perf_counter() - self._inicio
+        etapas: Dict[str, List[float]] = {"total": []}
+        totais: Dict[str, int] = {}
+        por_destino: Dict[str, int] = {}
+        for documento in self.documentos:
+            etapas["total"].append(documento["total"])
+            for etapa, segundos in documento["etapas"].items():
+                etapas.setdefault(etapa, []).append(segundos)
+            for nome, valor in documento.items():
+                if isinstance(valor, int) and not isinstance(valor, bool):
+                    totais[nome] = totais.get(nome, 0) + valor
+            destino = documento.get("destino", "")
+            por_destino[destino] = por_destino.get(destino, 0) + 1
+        resumo_etapas = {}
+        for etapa, valores in etapas.items():
+            valores.sort()
+            resumo_etapas[etapa] = {
+                "documentos": len(valores),
+                "soma": round(sum(valores), 4),
+                "p50": round(_percentil(valores, 0.50), 4),
+                "p95": round(_percentil(valores, 0.95), 4),
+                "max": round(valores[-1], 4) if valores else 0.0,
+            }
+        return {
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "duracao_segundos": round(duracao, 3),
+            "documentos": len(self.documentos),
+            "documentos_por_destino": por_destino,
+            "documentos_por_segundo": round(len(self.documentos) / duracao, 3) if duracao else 0.0,
+            "paginas_por_segundo": round(totais.get("paginas", 0) / duracao, 3) if duracao else 0.0,
+            "totais": totais,
+            "etapas": resumo_etapas,
+        }
+
+    def formatar_prometheus(self, resumo: Dict[str, Any]) -> str:
+        p = self.PREFIXO_PROMETHEUS
+        linhas = [
+            f"# HELP {p}_execucao_segundos Duração da execução.",
+            f"# TYPE {p}_execucao_segundos gauge",
+            f"{p}_execucao_segundos {resumo['duracao_segundos']}",
+            f"# HELP {p}_documentos_total Documentos processados, por destino.",
+            f"# TYPE {p}_documentos_total counter",
+        ]
+        linhas += [f'{p}_documentos_total{{destino="{destino}"}} {qtd}' for destino, qtd in sorted(resumo["documentos_por_destino"].items())]
+        for nome, valor in sorted(resumo["totais"].items()):
+            linhas += [f"# TYPE {p}_{nome}_total counter", f"{p}_{nome}_total {valor}"]
+        linhas += [
+            f"# HELP {p}_etapa_segundos Duração por documento de cada etapa.",
+            f"# TYPE {p}_etapa_segundos summary",
+        ]
+        for etapa, dados in sorted(resumo["etapas"].items()):
+            linhas += [
+                f'{p}_etapa_segundos{{etapa="{etapa}",quantile="0.5"}} {dados["p50"]}',
+                f'{p}_etapa_segundos{{etapa="{etapa}",quantile="0.95"}} {dados["p95"]}',
+                f'{p}_etapa_segundos_sum{{etapa="{etapa}"}} {dados["soma"]}',
+                f'{p}_etapa_segundos_count{{etapa="{etapa}"}} {dados["documentos"]}',
+            ]
+        linhas += [f"# HELP {p}_etapa_segundos_max Maior duração de cada etapa num documento.", f"# TYPE {p}_etapa_segundos_max gauge"]
+        linhas += [f'{p}_etapa_segundos_max{{etapa="{etapa}"}} {dados["max"]}' for etapa, dados in sorted(resumo["etapas"].items())]
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self, pasta: str) -> Dict[str, Any]:
+        """Grava metricas_execucao.json, metricas_execucao.prom (troca atômica) e acrescenta metricas_documentos.jsonl."""
+        resumo = self.resumo()
+        with open(os.path.join(pasta, "metricas_documentos.jsonl"), "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(documento, ensure_ascii=False) + "\n" for documento in self.documentos))
+        for nome, conteudo in (
+            ("metricas_execucao.json", json.dumps(resumo, ensure_ascii=False, indent=2)),
+            ("metricas_execucao.prom", self.formatar_prometheus(resumo)),
+        ):
+            caminho = os.path.join(pasta, nome)
+            with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+                f.write(conteudo)
+            os.replace(caminho + ".tmp", caminho)
+        logger.info(f"Métricas da execução gravadas em {os.path.join(pasta, 'metricas_execucao.json')}")
+        return resumo
+
+def registrar_resumo_metricas(resumo: Dict[str, Any]) -> None:
+    """Mostra no console onde o tempo da execução foi gasto."""
+    print(f"\nMétricas: {resumo['documentos']} documentos em {resumo['duracao_segundos']:.1f} s "
+          f"({resumo['documentos_por_segundo']:.2f} docs/s, {resumo['paginas_por_segundo']:.2f} páginas/s)")
+    for etapa, dados in sorted(resumo["etapas"].items(), key=lambda item: -item[1]["soma"]):
+        print(f"   {etapa:<20} soma {dados['soma']:>9.2f} s   p50 {dados['p50']:>7.3f} s   "
+              f"p95 {dados['p95']:>7.3f} s   máx {dados['max']:>7.3f} s   ({dados['documentos']} docs)")
+
@@ -0,0 +1,221 @@
+"""
+Motores de OCR: o pytesseract (padrão), que executa o `tesseract` a cada página, e o tesserocr
+(opcional), que mantém motores da API C do Tesseract já inicializados e recebe a imagem em memória.
+
+Os dois seguem o mesmo contrato: `reconhecer(imagem)` devolve o texto da página e levanta
+exceção em caso de erro; `reconhecer_com_confianca(imagem)` devolve também a confiança média
+das palavras (0 a 100, 0 sem nenhuma palavra); `versao()` identifica o resultado nas chaves
+do cache de OCR.
+"""
+import contextlib
+import logging
+import os
+import queue
+import shlex
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from . import config
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MOTORES_OCR = ("pytesseract", "tesserocr")
+
+class MotorOCR:
+    nome = ""
+
+    def reconhecer(self, imagem: "Image.Image") -> str:
+        raise NotImplementedError
+
+    def reconhecer_com_confianca(self, imagem: "Image.Image") -> Tuple[str, float]:
+        raise NotImplementedError
+
+    def versao(self) -> str:
+        raise NotImplementedError
+
+    def fechar(self) -> None:
+        pass
+
+class MotorPytesseract(MotorOCR):
+    """Um processo `tesseract` por página, com a imagem passada por arquivo temporário."""
+
+    nome = "pytesseract"
+
+    def __init__(self, cfg: config.Extractor):
+        self.cfg = cfg
+        self._versao: Optional[str] = None
+
+    def _pytesseract(self):
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = self.cfg.tesseract_path
+        return pytesseract
+
+    def reconhecer(self, imagem: "Image.Image") -> str:
+        return self._pytesseract().image_to_string(imagem, lang=self.cfg.ocr_idioma, config=self.cfg.ocr_config)
+
+    def reconhecer_com_confianca(self, imagem: "Image.Image") -> Tuple[str, float]:
+        """Uma única execução do `tesseract` (image_to_data), com o texto remontado linha a linha."""
+        pytesseract = self._pytesseract()
+        dados = pytesseract.image_to_data(imagem, lang=self.cfg.ocr_idioma, config=self.cfg.ocr_config,
+                                          output_type=pytesseract.Output.DICT)
+        return texto_e_confianca(dados)
+
+    def versao(self) -> str:
+        if self._versao is None:
+            try:
+                self._versao = str(self._pytesseract().get_tesseract_version())
+            except Exception:
+                self._versao = "desconhecida"
+        return self._versao
+
+def opcoes_tesseract(ocr_config: str) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    Converte as opções de linha de comando de `ocr_config` (--psm, --oem e -c chave=valor)
+    nos argumentos e variáveis da API C. Outras opções são ignoradas com um aviso.
+    """
+    argumentos: Dict[str, int] = {}
+    variaveis: Dict[str, str] = {}
+    partes = shlex.split(ocr_config)
+    ignoradas: List[str] = []
+    i = 0
+    while i < len(partes):
+        parte = partes[i]
+        valor = partes[i + 1] if i + 1 < len(partes) else ""
+        if parte in ("--psm", "--oem") and valor.isdigit():
+            argumentos[parte[2:]] = int(valor)
+            i += 2
+        elif parte == "-c" and "=" in valor:
+            chave, _, conteudo = valor.partition("=")
+            variaveis[chave] = conteudo
+            i += 2
+        else:
+            ignoradas.append(parte)
+            i += 1
+    if ignoradas:
+        logger.warning(f"Opções de ocr_config ignoradas pelo tesserocr: {' '.join(ignoradas)}")
+    return argumentos, variaveis
+
+def texto_e_confianca(dados: Dict[str, list]) -> Tuple[str, float]:
+    """
+    Texto e confiança média das palavras a partir da saída de `image_to_data`: palavras da
+    mesma linha separadas por espaço e uma linha em branco entre parágrafos, como no image_to_string.
+    """
+    linhas: List[str] = []
+    confiancas: List[float] = []
+    linha_atual = paragrafo_atual = None
+    for i, palavra in enumerate(dados["text"]):
+        if not str(palavra).strip():
+            continue
+        paragrafo = (dados["block_num"][i], dados["par_num"][i])
+        linha = paragrafo + (dados["line_num"][i],)
+        if linha != linha_atual:
+            if paragrafo_atual is not None and paragrafo != paragrafo_atual:
+                linhas.append("")
+            linhas.append(str(palavra))
+            linha_atual, paragrafo_atual = linha, paragrafo
+        else:
+            linhas[-1] += " " + str(palavra)
+        confianca = float(dados["conf"][i])
+        if confianca >= 0:
+            confiancas.append(confianca)
+    texto = "\n".join(linhas) + "\n" if linhas else ""
+    return texto, sum(confiancas) / len(confiancas) if confiancas else 0.0
+
+class MotorTesserocr(MotorOCR):
+    """
+    Motores do Tesseract carregados uma vez (modelo do idioma incluído) e reaproveitados entre
+    páginas e documentos: cada thread de OCR pega um motor livre, então há no máximo um por
+    thread em andamento.
+    """
+
+    nome = "tesserocr"
+
+    def __init__(self, cfg: config.Extractor):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.cfg = cfg
+        self._argumentos, self._variaveis = opcoes_tesseract(cfg.ocr_config)
+        # Sem TESSDATA_PREFIX, usa a pasta tessdata ao lado do executável configurado (instalação do Windows)
+        pasta_tessdata = os.path.join(os.path.dirname(cfg.tesseract_path), "tessdata")
+        self._pasta_tessdata = pasta_tessdata if not os.environ.get("TESSDATA_PREFIX") and os.path.isdir(pasta_tessdata) else None
+        self._livres: "queue.LifoQueue" = queue.LifoQueue()
+        self._criados = []
+        self._lock = threading.Lock()
+
+    def _criar_motor(self):
+        argumentos = dict(lang=self.cfg.ocr_idioma, variables=self._variaveis, **self._argumentos)
+        if self._pasta_tessdata is not None:
+            argumentos["path"] = self._pasta_tessdata
+        motor = self._tesserocr.PyTessBaseAPI(**argumentos)
+        with self._lock:
+            self._criados.append(motor)
+        logger.debug(f"Motor tesserocr inicializado ({len(self._criados)} no processo)")
+        return motor
+
+    @contextlib.contextmanager
+    def _motor(self) -> Iterator:
+        try:
+            motor = self._livres.get_nowait()
+        except queue.Empty:
+            motor = self._criar_motor()
+        try:
+            yield motor
+        finally:
+            motor.Clear()
+            self._livres.put(motor)
+
+    def reconhecer(self, imagem: "Image.Image") -> str:
+        with self._motor() as motor:
+            motor.SetImage(imagem)
+            return motor.GetUTF8Text()
+
+    def reconhecer_com_confianca(self, imagem: "Image.Image") -> Tuple[str, float]:
+        with self._motor() as motor:
+            motor.SetImage(imagem)
+            texto = motor.GetUTF8Text()
+            return texto, float(motor.MeanTextConf())
+
+    def versao(self) -> str:
+        return f"tesserocr {self._tesserocr.tesseract_version().split()[1]}"
+
+    def fechar(self) -> None:
+        with self._lock:
+            for motor in self._criados:
+                motor.End()
+            self._criados = []
+        self._livres = queue.LifoQueue()
+
+_motor: Optional[MotorOCR] = None
+_motor_de: Optional[Tuple[int, config.Extractor]] = None
+_motor_lock = threading.Lock()
+
+def criar_motor_ocr(cfg: config.Extractor) -> MotorOCR:
+    """Motor escolhido em `motor_ocr`; sem o tesserocr instalado, volta ao pytesseract com um aviso."""
+    if cfg.motor_ocr == "tesserocr":
+        try:
+            return MotorTesserocr(cfg)
+        except ImportError:
+            print("⚠️ OCR_MOTOR=tesserocr requer o pacote tesserocr (pip install tesserocr); usando o pytesseract.")
+            logger.warning("Pacote tesserocr não instalado; usando o pytesseract")
+    elif cfg.motor_ocr != "pytesseract":
+        logger.warning(f"Motor de OCR desconhecido: {cfg.motor_ocr!r} (opções: {', '.join(MOTORES_OCR)}); usando o pytesseract")
+    return MotorPytesseract(cfg)
+
+def motor_ocr() -> MotorOCR:
+    """Motor de OCR do processo atual, criado no primeiro uso e recriado se a configuração mudar."""
+    global _motor, _motor_de
+    cfg = config.atual()
+    # As threads de OCR pedem o motor ao mesmo tempo na primeira página
+    with _motor_lock:
+        if _motor_de is None or _motor_de[0] != os.getpid() or _motor_de[1] is not cfg:
+            # Motores herdados de outro processo (fork) não são encerrados: pertencem ao processo pai
+            if _motor is not None and _motor_de is not None and _motor_de[0] == os.getpid():
+                _motor.fechar()
+            _motor = criar_motor_ocr(cfg)
+            _motor_de = (os.getpid(), cfg)
+        return _motor
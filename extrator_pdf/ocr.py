@@ -0,0 +1,370 @@
+"""
+OCR das páginas sem camada de texto: renderização com o Poppler (pdf2image) e reconhecimento
+com o Tesseract (pelo motor de `motor_ocr`), importados só no primeiro uso.
+"""
+import concurrent.futures
+import logging
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from . import config
+from .cache import cache_ocr
+from .campos import classificar_tipo_documento, extrair_campos
+from .deepseek import extrair_com_deepseek
+from .documento import DocumentoPDF, abrir_documento_pdf
+from .memoria import paginas_ocr_no_orcamento, verificar_memoria
+from .metricas import contar_metrica, medir_etapa, registrar_pagina_ocr
+from .motor_ocr import motor_ocr
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+def verificar_necessidade_ocr(texto: str, caminho_pdf: str, documento: Optional[DocumentoPDF] = None) -> bool:
+    """Verifica se um PDF precisa de OCR."""
+    texto_limpo = texto.strip()
+    densidade_minima = config.atual().densidade_minima_ocr
+    if len(texto_limpo) < 200:
+        print(f"Texto extraído muito pequeno ({len(texto_limpo)} caracteres), provável necessidade de OCR")
+        logger.warning(f"Texto muito pequeno extraído de {caminho_pdf} ({len(texto_limpo)} chars). Provável necessidade de OCR.")
+        return True
+    try:
+        if documento is not None:
+            num_paginas = documento.num_paginas
+        else:
+            import pdfplumber
+
+            with pdfplumber.open(caminho_pdf) as pdf:
+                num_paginas = len(pdf.pages)
+        densidade = len(texto_limpo) / max(1, num_paginas)
+        if densidade < densidade_minima:
+            print(f"Densidade de texto baixa ({densidade:.1f} caracteres/página), provável necessidade de OCR")
+            logger.warning(f"Densidade baixa ({densidade:.1f} chars/pág). OCR possivelmente necessário.")
+            return True
+    except Exception as e:
+        print(f"Erro ao verificar densidade de texto: {str(e)}")
+        logger.error(f"Erro ao verificar densidade do texto: {str(e)}")
+    return False
+
+def pdf_para_imagens(
+    caminho_pdf: str,
+    primeira_pagina: Optional[int] = None,
+    ultima_pagina: Optional[int] = None,
+    tons_de_cinza: bool = False,
+    dpi: Optional[int] = None
+) -> List["Image.Image"]:
+    """Converte um PDF (ou o intervalo de páginas informado, a partir de 1) em uma lista de imagens."""
+    cfg = config.atual()
+    try:
+        import pdf2image
+
+        with medir_etapa("rasterizacao"):
+            return pdf2image.convert_from_path(
+                caminho_pdf, 
+                dpi=cfg.dpi_ocr if dpi is None else dpi,
+                fmt='png',
+                first_page=primeira_pagina,
+                last_page=ultima_pagina,
+                grayscale=tons_de_cinza,
+                poppler_path=cfg.poppler_path
+            )
+    except Exception as e:
+        print(f"Erro ao converter PDF para imagens: {str(e)}")
+        return []
+
+def extrair_texto_com_ocr(imagem: "Image.Image") -> str:
+    """Extrai texto de uma imagem usando OCR."""
+    texto = _tentar_ocr(imagem)
+    return texto if texto is not None else ""
+
+def _tentar_ocr(imagem: "Image.Image") -> Optional[str]:
+    """Como `extrair_texto_com_ocr`, mas retorna None em caso de erro (para não guardar falhas no cache)."""
+    try:
+        motor = motor_ocr()
+        with medir_etapa("tesseract"):
+            texto = motor.reconhecer(imagem)
+        return texto
+    except Exception as e:
+        print(f"Erro na extração OCR: {str(e)}")
+        return None
+
+def _tentar_ocr_com_confianca(imagem: "Image.Image") -> Optional[Tuple[str, float]]:
+    """Texto e confiança média das palavras (0 a 100), ou None em caso de erro."""
+    try:
+        motor = motor_ocr()
+        with medir_etapa("tesseract"):
+            return motor.reconhecer_com_confianca(imagem)
+    except Exception as e:
+        print(f"Erro na extração OCR: {str(e)}")
+        return None
+
+def recortar_margens(imagem: "Image.Image", limiar: int = 200, folga: int = 16) -> "Image.Image":
+    """
+    Recorta a imagem na caixa que contém os pixels mais escuros que `limiar`, com `folga`
+    pixels de sobra em cada lado. Páginas totalmente em branco são devolvidas como estão.
+    """
+    caixa = imagem.convert("L").point(lambda valor: 255 if valor < limiar else 0).getbbox()
+    if caixa is None:
+        return imagem
+    esquerda, topo, direita, base = caixa
+    return imagem.crop((max(0, esquerda - folga), max(0, topo - folga),
+                        min(imagem.width, direita + folga), min(imagem.height, base + folga)))
+
+def ocr_pagina(caminho_pdf: str, pagina: int, imagem: "Image.Image", dpi: int) -> Optional[str]:
+    """
+    OCR de uma página já renderizada em `dpi`, com as margens recortadas se configurado.
+
+    Com o OCR adaptativo, se a confiança média das palavras ficar abaixo de `ocr_confianca_minima`,
+    a página é renderizada de novo em `dpi_ocr` e fica o resultado de maior confiança. O DPI e a
+    confiança usados vão para o log e para as métricas do documento (`ocr_por_pagina`).
+    """
+    cfg = config.atual()
+    if cfg.ocr_recortar_margens:
+        imagem = recortar_margens(imagem)
+    if not cfg.ocr_adaptativo:
+        return _tentar_ocr(imagem)
+    resultado = _tentar_ocr_com_confianca(imagem)
+    if resultado is None:
+        return None
+    texto, confianca = resultado
+    if confianca < cfg.ocr_confianca_minima:
+        del imagem
+        contar_metrica("paginas_ocr_reprocessadas")
+        imagens = pdf_para_imagens(caminho_pdf, pagina + 1, pagina + 1, tons_de_cinza=cfg.ocr_tons_de_cinza, dpi=cfg.dpi_ocr)
+        if imagens:
+            imagem_alta = recortar_margens(imagens.pop()) if cfg.ocr_recortar_margens else imagens.pop()
+            resultado = _tentar_ocr_com_confianca(imagem_alta)
+            if resultado is not None and resultado[1] >= confianca:
+                (texto, confianca), dpi = resultado, cfg.dpi_ocr
+    logger.info(f"OCR da página {pagina + 1} de {caminho_pdf}: {dpi} dpi, confiança média {confianca:.1f}")
+    registrar_pagina_ocr(pagina, dpi, confianca)
+    return texto
+
+def versao_tesseract() -> str:
+    """Versão do Tesseract no motor de OCR ativo ("desconhecida" se ele não for encontrado)."""
+    return motor_ocr().versao()
+
+def chave_cache_ocr(hash_pdf: str, pagina: int, dpi: Optional[int] = None) -> str:
+    """
+    Chave do cache de OCR: conteúdo do PDF, página e tudo que altera o resultado do Tesseract.
+    Sem `dpi`, vale a resolução do OCR completo (a escala do OCR adaptativo, se ativo).
+    """
+    cfg = config.atual()
+    if dpi is not None:
+        resolucao = str(dpi)
+    elif cfg.ocr_adaptativo:
+        resolucao = f"{cfg.dpi_ocr_inicial}-{cfg.dpi_ocr}@{cfg.ocr_confianca_minima:g}"
+    else:
+        resolucao = str(cfg.dpi_ocr)
+    partes = [
+        hash_pdf, str(pagina), resolucao, "cinza" if cfg.ocr_tons_de_cinza else "cor",
+        cfg.ocr_idioma, cfg.ocr_config, versao_tesseract()
+    ]
+    if dpi is None and cfg.ocr_recortar_margens:
+        partes.append("sem margens")
+    return "|".join(partes)
+
+def ocr_pagina_baixa_resolucao(documento: DocumentoPDF, pagina: int) -> str:
+    """OCR de uma única página renderizada em `dpi_pre_classificacao` (só para classificar), com cache."""
+    cfg = config.atual()
+    cache = cache_ocr()
+    chave = chave_cache_ocr(documento.hash_conteudo, pagina, dpi=cfg.dpi_pre_classificacao) if cache.habilitado else None
+    if chave is not None:
+        texto_cache = cache.obter(chave)
+        if texto_cache is not None:
+            return texto_cache
+    imagens = pdf_para_imagens(documento.caminho_pdf, pagina + 1, pagina + 1,
+                               tons_de_cinza=cfg.ocr_tons_de_cinza, dpi=cfg.dpi_pre_classificacao)
+    if not imagens:
+        return ""
+    texto = _tentar_ocr(imagens[0])
+    if texto is None:
+        return ""
+    if chave is not None:
+        cache.gravar(chave, texto)
+    return texto
+
+def paginas_para_ocr(documento: DocumentoPDF, num_paginas: Optional[int] = None) -> List[int]:
+    """Índices das páginas (entre as `num_paginas` primeiras) cuja camada de texto não atinge a densidade mínima."""
+    densidade_minima = config.atual().densidade_minima_ocr
+    num_paginas = documento.num_paginas if num_paginas is None else num_paginas
+    return [i for i in range(num_paginas) if documento.caracteres_pagina(i) < densidade_minima]
+
+def agrupar_paginas_consecutivas(paginas: List[int]) -> List[Tuple[int, int]]:
+    """Agrupa índices ordenados em intervalos (inicio, fim) inclusivos, para renderizar cada trecho de uma vez."""
+    intervalos: List[Tuple[int, int]] = []
+    for pagina in paginas:
+        if intervalos and pagina == intervalos[-1][1] + 1:
+            intervalos[-1] = (intervalos[-1][0], pagina)
+        else:
+            intervalos.append((pagina, pagina))
+    return intervalos
+
+def iterar_imagens_pdf(
+    caminho_pdf: str,
+    paginas: List[int],
+    janela: Optional[int] = None,
+    tons_de_cinza: Optional[bool] = None,
+    dpi: Optional[int] = None
+) -> Iterator[Tuple[int, "Image.Image"]]:
+    """
+    Renderiza as páginas informadas (índices a partir de 0) em janelas de no máximo
+    `janela` páginas, gerando (indice, imagem) sem manter o documento inteiro em memória.
+    """
+    cfg = config.atual()
+    janela = max(1, cfg.janela_rasterizacao if janela is None else janela)
+    tons_de_cinza = cfg.ocr_tons_de_cinza if tons_de_cinza is None else tons_de_cinza
+    for inicio, fim in agrupar_paginas_consecutivas(paginas):
+        for inicio_janela in range(inicio, fim + 1, janela):
+            fim_janela = min(inicio_janela + janela - 1, fim)
+            imagens = pdf_para_imagens(caminho_pdf, inicio_janela + 1, fim_janela + 1, tons_de_cinza=tons_de_cinza, dpi=dpi)
+            if not imagens:
+                print(f"Não foi possível converter as páginas {inicio_janela + 1}-{fim_janela + 1} em imagens para OCR. Verifique o Poppler e o caminho.")
+                continue
+            for pagina in range(inicio_janela, fim_janela + 1):
+                if not imagens:
+                    break
+                yield pagina, imagens.pop(0)
+
+def ocr_paginas(
+    caminho_pdf: str,
+    paginas: List[int],
+    total_paginas: int,
+    threads: Optional[int] = None,
+    hash_pdf: Optional[str] = None
+) -> Dict[int, str]:
+    """
+    Aplica OCR nas páginas informadas com um pool limitado de threads (o Tesseract roda
+    em processo próprio ou, com o tesserocr, libera o GIL). A renderização só avança quando há vaga no pool, então o pico
+    de memória fica limitado à janela de rasterização mais as páginas em andamento. Com o OCR
+    adaptativo, as páginas são renderizadas em `dpi_ocr_inicial` (ver `ocr_pagina`).
+
+    Com `hash_pdf`, páginas já reconhecidas em execuções anteriores vêm do cache de OCR
+    e nem chegam a ser renderizadas.
+    """
+    cfg = config.atual()
+    threads = cfg.threads_ocr if threads is None else threads
+    cache = cache_ocr()
+    textos: Dict[int, str] = {}
+    if hash_pdf is not None and cache.habilitado:
+        for pagina in paginas:
+            texto_cache = cache.obter(chave_cache_ocr(hash_pdf, pagina))
+            if texto_cache is not None:
+                textos[pagina] = texto_cache
+        if textos:
+            print(f"   {len(textos)} página(s) reaproveitadas do cache de OCR")
+        paginas = [p for p in paginas if p not in textos]
+
+    def concluir(futuro: concurrent.futures.Future, pagina: int) -> None:
+        texto = futuro.result()
+        verificar_memoria(f"o OCR da página {pagina + 1}")
+        if texto is None:
+            textos[pagina] = ""
+            return
+        textos[pagina] = texto
+        if hash_pdf is not None and cache.habilitado:
+            cache.gravar(chave_cache_ocr(hash_pdf, pagina), texto)
+
+    dpi = cfg.dpi_ocr_inicial if cfg.ocr_adaptativo else cfg.dpi_ocr
+    limite_em_andamento = max(1, threads) + cfg.janela_rasterizacao
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        em_andamento: Dict[concurrent.futures.Future, int] = {}
+        for pagina, img in iterar_imagens_pdf(caminho_pdf, paginas, dpi=dpi):
+            print(f"   Processando página {pagina + 1}/{total_paginas} com OCR...")
+            em_andamento[executor.submit(ocr_pagina, caminho_pdf, pagina, img, dpi)] = pagina
+            del img
+            if len(em_andamento) >= limite_em_andamento:
+                concluidos, _ = concurrent.futures.wait(em_andamento, return_when=concurrent.futures.FIRST_COMPLETED)
+                for futuro in concluidos:
+                    concluir(futuro, em_andamento.pop(futuro))
+        for futuro in concurrent.futures.as_completed(em_andamento):
+            concluir(futuro, em_andamento[futuro])
+    return textos
+
+def extrair_texto_documento(documento: DocumentoPDF) -> Tuple[str, List[int], bool]:
+    """
+    Monta o texto do documento decidindo o OCR página a página.
+
+    Páginas com texto nativo suficiente são mantidas; apenas as esparsas são renderizadas
+    e passam pelo OCR. Só as páginas lidas dentro do orçamento de páginas e caracteres entram
+    no OCR, e só as `max_paginas_ocr` primeiras delas; as demais ficam com o texto nativo e o
+    documento conta como truncado. Retorna o texto na ordem das páginas, os índices que
+    passaram por OCR e se o texto foi truncado.
+    """
+    textos, truncado = documento.ler_paginas()
+    paginas = paginas_para_ocr(documento, len(textos))
+    contar_metrica("paginas", documento.num_paginas)
+    no_orcamento = paginas_ocr_no_orcamento(paginas)
+    if len(no_orcamento) < len(paginas):
+        print(f"⚠️ {len(paginas)} página(s) sem texto; OCR só nas {len(no_orcamento)} primeiras (MAX_PAGINAS_OCR).")
+        logger.warning(f"OCR limitado a {len(no_orcamento)} de {len(paginas)} páginas sem texto em {documento.caminho_pdf} (MAX_PAGINAS_OCR)")
+        if not truncado:
+            contar_metrica("texto_truncado")
+        paginas, truncado = no_orcamento, True
+    contar_metrica("paginas_ocr", len(paginas))
+    if paginas:
+        print(f"Texto insuficiente em {len(paginas)} de {documento.num_paginas} página(s), aplicando OCR nelas.")
+        logger.warning(f"OCR necessário nas páginas {[p + 1 for p in paginas]} de {documento.caminho_pdf}")
+    textos_ocr = ocr_paginas(documento.caminho_pdf, paginas, documento.num_paginas, hash_pdf=documento.hash_conteudo) if paginas else {}
+    for pagina, texto_ocr in textos_ocr.items():
+        # Mantém o texto nativo se o OCR não trouxe nada melhor
+        if len(texto_ocr.strip()) > len(textos[pagina].strip()):
+            textos[pagina] = texto_ocr
+    texto = "\n".join(textos).strip()
+    max_caracteres = config.atual().max_caracteres
+    if max_caracteres > 0 and len(texto) > max_caracteres:
+        texto, truncado = texto[:max_caracteres], True
+    return texto, sorted(textos_ocr), truncado
+
+def processar_com_ocr_real(caminho_pdf: str) -> Optional[Dict[str, str]]:
+    """Processa um PDF usando OCR real."""
+    print("Iniciando processamento OCR...")
+    try:
+        with abrir_documento_pdf(caminho_pdf) as documento:
+            num_paginas = documento.num_paginas
+        textos_ocr = ocr_paginas(caminho_pdf, list(range(num_paginas)), num_paginas)
+        if not textos_ocr:
+            return None # iterar_imagens_pdf já imprime o erro
+        
+        texto_completo = "".join(textos_ocr[i] + "\n" for i in sorted(textos_ocr))
+        
+        dados = extrair_com_deepseek(texto_completo)
+        if dados is None:
+            dados = extrair_campos(texto_completo) # Fallback para Regex nos dados OCRizados
+        
+        return dados
+        
+    except Exception:
+        raise # Propaga a exceção para ser tratada no loop principal
+
+def processar_com_ocr(caminho_pdf: str) -> Tuple[Optional[Dict[str, str]], bool]:
+    """
+    Processa um PDF usando OCR se necessário.
+    """
+    with abrir_documento_pdf(caminho_pdf) as documento:
+        texto, paginas_ocr, _ = extrair_texto_documento(documento)
+
+    contar_metrica("caracteres_texto", len(texto))
+
+    dados = extrair_com_deepseek(texto)
+    if dados is None:
+        with medir_etapa("regex"):
+            dados = extrair_campos(texto)
+    
+    return dados, bool(paginas_ocr)
+
+def pre_classificar_documento(documento: DocumentoPDF) -> str:
+    """
+    Classifica o documento só pela primeira página, antes da extração completa e do OCR.
+    Se a página não tiver texto nativo suficiente e o texto nativo não bastar para
+    identificar um cheque, usa o OCR de uma renderização em `dpi_pre_classificacao`.
+    """
+    if not documento.num_paginas:
+        return "DESCONHECIDO"
+    cfg = config.atual()
+    tipo = classificar_tipo_documento(documento.texto_pagina(0))
+    if tipo == "CHEQUE" or documento.caracteres_pagina(0) >= cfg.densidade_minima_ocr or cfg.dpi_pre_classificacao <= 0:
+        return tipo
+    texto_ocr = ocr_pagina_baixa_resolucao(documento, 0)
+    return classificar_tipo_documento(texto_ocr) if texto_ocr.strip() else tipo
+
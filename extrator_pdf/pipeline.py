@@ -0,0 +1,610 @@
+"""Pipeline por arquivo e distribuição dos PDFs entre processos."""
+import collections
+import collections.abc
+import concurrent.futures
+import contextlib
+import functools
+import gc
+import io
+import itertools
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config
+from .cache import acumular_estatisticas_caches, estatisticas_caches
+from .camadas import extrair_campos_em_camadas, precisa_deepseek
+from .campos import (classificar_tipo_documento, detectar_forma_pagamento, extrair_campos, extrair_numero_nf_do_arquivo,
+                     formatar_valor_csv, parse_valor)
+from .armazem import registro_do_resultado
+from .deepseek import (definir_processos_compartilhando_limite, estimar_tokens, extrair_com_deepseek, extrair_lote_com_deepseek,
+                       obter_cliente_deepseek, reduzir_texto_para_llm)
+from .documento import abrir_documento_pdf, calcular_hash_arquivo
+from .duplicatas import METODO_DUPLICATA, ImpressaoDocumento, chave_fiscal, impressao_documento, indice_duplicatas
+from .memoria import OrcamentoExcedido, orcamento_memoria
+from .metricas import ColetorMetricas, contar_metrica, medindo_documento, medir_etapa
+from .ocr import extrair_texto_documento, pre_classificar_documento
+from .saida import GravadorResultados
+
+logger = logging.getLogger(__name__)
+
+# Destino de um documento que espera a resposta da DeepSeek num lote (nunca chega ao gravador)
+DESTINO_ADIADO = "aguardando_lote"
+
+def processar_arquivo_pdf(pdf_path: str, adiar_deepseek: bool = False) -> Dict[str, Any]:
+    """
+    Executa o pipeline completo de um PDF (extração → OCR → classificação → campos).
+
+    Não escreve nos CSVs: retorna o destino ("sucesso", "erro" ou "nao_suportado")
+    e a linha correspondente, para que um único processo seja dono dos arquivos de saída.
+    O resultado traz a duração em "segundos" e, com as métricas ativadas, também "metricas"
+    (durações por etapa e contadores). Com `adiar_deepseek` e lotes configurados, um documento
+    curto que precisa da DeepSeek volta com o destino DESTINO_ADIADO, para `LotesDeepSeek` concluir.
+    """
+    inicio = time.perf_counter()
+    if not config.atual().metricas:
+        with orcamento_memoria():
+            resultado = _processar_arquivo_pdf(pdf_path, adiar_deepseek)
+    else:
+        with medindo_documento(pdf_path) as metricas, orcamento_memoria():
+            resultado = _processar_arquivo_pdf(pdf_path, adiar_deepseek)
+        resultado["metricas"] = {**metricas.como_dict(), "destino": resultado["destino"], "metodo": resultado.get("metodo", "")}
+    resultado["segundos"] = round(time.perf_counter() - inicio, 6)
+    return resultado
+
+def _processar_arquivo_pdf(pdf_path: str, adiar_deepseek: bool = False) -> Dict[str, Any]:
+    texto_documento = "" 
+    tipo_documento_detectado = "DESCONHECIDO" 
+    truncado = False
+
+    try:
+        # 1. Pré-classificar pela primeira página: cheques saem antes da extração completa e do OCR
+        # 2. Extrair o texto com pdfplumber (o PDF é aberto uma única vez)
+        #    e aplicar OCR apenas nas páginas sem camada de texto suficiente
+        with abrir_documento_pdf(pdf_path) as documento:
+            tipo_documento_detectado = pre_classificar_documento(documento)
+            if tipo_documento_detectado != "CHEQUE":
+                texto_documento, paginas_ocr, truncado = extrair_texto_documento(documento)
+
+        contar_metrica("caracteres_texto", len(texto_documento))
+        if tipo_documento_detectado == "CHEQUE":
+            print("Primeira página identificada como CHEQUE; extração completa dispensada.")
+        else:
+            if paginas_ocr and not texto_documento:
+                print(f"OCR não extraiu texto significativo de {os.path.basename(pdf_path)}. Documento pode ser ilegível ou vazio.")
+
+            # 3. Classificar o tipo de documento com base no texto completo
+            tipo_documento_detectado = classificar_tipo_documento(texto_documento)
+        print(f"Tipo de documento detectado: {tipo_documento_detectado}")
+
+        # 4. Tratar documentos não suportados (ex: cheques)
+        if tipo_documento_detectado == "CHEQUE":
+            print("Documento identificado como CHEQUE. Registrando em 'documentos_nao_suportados.csv' e pulando extração de NF.")
+            return {"destino": "nao_suportado", "linha": {
+                "caminho_arquivo": pdf_path,
+                "tipo_documento": "CHEQUE",
+                "detalhes": "Documento identificado como cheque. Não suportado para extração de Nota Fiscal."
+            }}
+
+        # 5. Notas repetidas: o regex dá a chave fiscal (CNPJ + número) e o texto dá a impressão;
+        #    uma nota já extraída é reaproveitada sem chamar a DeepSeek
+        with medir_etapa("regex"):
+            dados_regex = extrair_campos(texto_documento)
+        indice = indice_duplicatas()
+        if indice is not None:
+            with medir_etapa("duplicatas"):
+                impressao = impressao_documento(texto_documento)
+                chave = chave_fiscal(dados_regex)
+                encontrada = indice.procurar(impressao, chave, pdf_path)
+            if encontrada is not None:
+                return _resultado_duplicata(pdf_path, *encontrada)
+
+        duplicata = (impressao, chave) if indice is not None else None
+
+        # Documentos curtos que precisam da DeepSeek podem esperar por um lote no processo principal
+        if adiar_deepseek and precisa_deepseek(dados_regex):
+            adiado = _adiar_para_lote(pdf_path, texto_documento, tipo_documento_detectado, truncado, dados_regex, duplicata)
+            if adiado is not None:
+                return adiado
+
+        return _concluir_extracao(pdf_path, texto_documento, tipo_documento_detectado, truncado, dados_regex,
+                                  duplicata, lambda: documento.hash_conteudo)
+        
+    except OrcamentoExcedido as e:
+        # Libera as páginas e imagens do documento antes de seguir para o próximo
+        gc.collect()
+        error_message = f"Documento acima do orçamento: {str(e)}"
+        logger.error(f"Documento acima do orçamento {pdf_path}: {str(e)}")
+        print(f"Documento {os.path.basename(pdf_path)} ignorado: {error_message}")
+        contar_metrica("acima_orcamento")
+        # `acima_orcamento` pede a reciclagem do worker (ver `iterar_resultados`)
+        return {"destino": "erro", "acima_orcamento": True, "linha": {
+            "caminho_arquivo": pdf_path,
+            "erro_detalhes": error_message,
+            "tipo_documento": tipo_documento_detectado
+        }}
+
+    except Exception as e:
+        error_message = f"Erro inesperado no processamento do arquivo: {str(e)}"
+        logger.error(f"Erro ao processar {pdf_path}: {str(e)}")
+        print(f"Erro ao processar {os.path.basename(pdf_path)}: {error_message}")
+        return {"destino": "erro", "linha": {
+            "caminho_arquivo": pdf_path, 
+            "erro_detalhes": error_message,
+            "tipo_documento": tipo_documento_detectado
+        }}
+
+def _concluir_extracao(
+    pdf_path: str,
+    texto_documento: str,
+    tipo_documento_detectado: str,
+    truncado: bool,
+    dados_regex: Dict[str, Any],
+    duplicata: Optional[Tuple[ImpressaoDocumento, Optional[Tuple[str, str]]]],
+    hash_arquivo: Callable[[], str],
+    extrair_deepseek: Callable[[str], Optional[Dict[str, Any]]] = extrair_com_deepseek
+) -> Dict[str, Any]:
+    """
+    Etapas depois da busca por duplicatas: extração em camadas, validação e linha de sucesso.
+    `duplicata` é a impressão e a chave fiscal para registrar a nota no índice (None sem o índice).
+    """
+    # 6. Extração em camadas: regex validado primeiro, DeepSeek só quando a confiança é baixa
+    dados_finais, metodo_usado = extrair_campos_em_camadas(texto_documento, dados_regex, extrair_deepseek)
+
+    # 7. Se ainda não houver dados significativos (prestador OU numero_nota vazios), registre como erro.
+    if dados_finais is None or not (dados_finais.get("prestador") and dados_finais.get("numero_nota")):
+        print(f"Falha crítica: Não foi possível extrair dados significativos de {os.path.basename(pdf_path)}")
+        erro_detalhes = f"Falha na extração de dados após todas as tentativas ({metodo_usado}). Tipo: {tipo_documento_detectado}."
+        if truncado:
+            erro_detalhes += " Texto truncado pelo orçamento do documento (MAX_PAGINAS, MAX_PAGINAS_OCR ou MAX_CARACTERES)."
+        return {"destino": "erro", "metodo": metodo_usado, "truncado": truncado, "linha": {
+            "caminho_arquivo": pdf_path,
+            "erro_detalhes": erro_detalhes,
+            "tipo_documento": tipo_documento_detectado
+        }}
+
+    # 8. Processar e formatar dados extraídos com sucesso para o CSV
+    nome_fornecedor = str(dados_finais.get("prestador", "")).strip()
+    numero_nf = str(dados_finais.get("numero_nota", "")).strip()
+    
+    # Fallback final para número da nota do nome do arquivo
+    if not numero_nf:
+        numero_nf = str(extrair_numero_nf_do_arquivo(os.path.basename(pdf_path)))
+        if numero_nf:
+            print(f" Número da nota extraído do nome do arquivo: NF {numero_nf}")
+    
+    valor_total_float = parse_valor(dados_finais.get("valor_total", "0"))
+    irrf_float = parse_valor(dados_finais.get("irrf", "0"))
+    valor_final_float = round(valor_total_float - irrf_float, 2)
+    valor_formatado = formatar_valor_csv(valor_final_float)
+    
+    forma_pagamento = dados_finais.get("forma_pagamento", "") or detectar_forma_pagamento(texto_documento)
+    
+    data_emissao_nf = str(dados_finais.get("data_emissao_nf", "")).strip()
+    operacao = str(dados_finais.get("operacao", "")).strip()
+    observacoes = str(dados_finais.get("observacoes", "")).strip()
+
+    # NOVA LÓGICA: Se data_emissao_nf estiver vazia, tenta extrair do texto
+    if not data_emissao_nf:
+        data_match = re.search(r"(\d{2}/\d{2}/\d{4})", texto_documento)
+        if data_match:
+            data_emissao_nf = data_match.group(1)
+            print(f" Data de emissão obtida por fallback: {data_emissao_nf}")
+
+    # Exibir resultados no console
+    print(f" Dados extraídos via {metodo_usado}:")
+    print(f"   - NOME FORNECEDOR: {nome_fornecedor}")
+    print(f"   - NÚMERO NF: {numero_nf}")
+    print(f"   - VALOR: R${valor_formatado}")
+    print(f"   - FORMA PAGAMENTO: {forma_pagamento}")
+    print(f"   - DATA EMISSÃO NF: {data_emissao_nf}")
+    print(f"   - OPERAÇÃO: {operacao}")
+    print(f"   - OBSERVAÇÕES: {observacoes}")
+    print(f"   - Caminho do Arquivo: {pdf_path}")
+    if truncado:
+        print("   ⚠️ Texto truncado pelo orçamento do documento (MAX_PAGINAS, MAX_PAGINAS_OCR ou MAX_CARACTERES); confira os campos.")
+        observacoes = f"{observacoes} [texto truncado]".strip()
+    
+    # Linha para o CSV de sucesso, e os campos sem formatação para quem usa o pacote
+    dados = {
+        "numero_nota": numero_nf,
+        "prestador": nome_fornecedor,
+        "cnpj": str(dados_finais.get("cnpj", "")).strip(),
+        "pagador": str(dados_finais.get("pagador", "")).strip(),
+        "cnpj_pagador": str(dados_finais.get("cnpj_pagador", "")).strip(),
+        "valor_total": valor_total_float,
+        "irrf": irrf_float,
+        "valor_liquido": valor_final_float,
+        "forma_pagamento": forma_pagamento,
+        "data_emissao_nf": data_emissao_nf,
+        "operacao": operacao,
+        "observacoes": observacoes,
+    }
+    resultado = {"destino": "sucesso", "metodo": metodo_usado, "tipo_documento": tipo_documento_detectado, "dados": dados, "truncado": truncado, "linha": {
+        "DATA EMISSÃO NF": data_emissao_nf,
+        "NOME FORNECEDOR": nome_fornecedor,
+        "NÚMERO NF": numero_nf,
+        "OPERAÇÃO": operacao,
+        "VALOR": valor_formatado,
+        "FORMA PAGAMENTO": forma_pagamento,
+        "OBSERVAÇÕES": observacoes,
+        "Caminho do Arquivo": pdf_path,
+        "MÉTODO EXTRAÇÃO": metodo_usado
+    }}
+    # Texto truncado daria uma impressão parcial do documento
+    if duplicata is not None and not truncado:
+        indice_duplicatas().registrar(*duplicata, pdf_path, hash_arquivo(),
+                                      {k: resultado[k] for k in ("metodo", "tipo_documento", "dados", "linha")})
+    return resultado
+
+def _resultado_duplicata(pdf_path: str, caminho_original: str, original: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado de uma nota repetida: os campos da nota original, com o caminho deste arquivo."""
+    linha = dict(original["linha"])
+    linha["Caminho do Arquivo"] = pdf_path
+    linha["MÉTODO EXTRAÇÃO"] = METODO_DUPLICATA
+    linha["OBSERVAÇÕES"] = f"{linha.get('OBSERVAÇÕES', '')} [duplicata de {caminho_original}]".strip()
+    print(f" Duplicata de {caminho_original} (extraída via {original.get('metodo', '')}); resultado reaproveitado:")
+    print(f"   - NOME FORNECEDOR: {linha.get('NOME FORNECEDOR', '')}")
+    print(f"   - NÚMERO NF: {linha.get('NÚMERO NF', '')}")
+    print(f"   - VALOR: R${linha.get('VALOR', '')}")
+    logger.info(f"{pdf_path} é duplicata de {caminho_original}")
+    contar_metrica("duplicatas")
+    return {"destino": "sucesso", "metodo": METODO_DUPLICATA, "tipo_documento": original.get("tipo_documento", ""),
+            "dados": original.get("dados", {}), "duplicata_de": caminho_original, "linha": linha}
+
+def _adiar_para_lote(
+    pdf_path: str,
+    texto_documento: str,
+    tipo_documento_detectado: str,
+    truncado: bool,
+    dados_regex: Dict[str, Any],
+    duplicata: Optional[Tuple[ImpressaoDocumento, Optional[Tuple[str, str]]]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Resultado adiado com o necessário para `_concluir_extracao` rodar no processo principal, ou
+    None se os lotes estão desativados ou o texto enviado passaria de metade do orçamento do lote.
+    """
+    max_tokens = config.atual().deepseek_lote_tokens
+    texto_llm = reduzir_texto_para_llm(texto_documento)
+    tokens = estimar_tokens(texto_llm)
+    if max_tokens <= 0 or tokens > max_tokens // 2:
+        return None
+    print("Extração local com confiança baixa; documento aguardando um lote da DeepSeek.")
+    return {"destino": DESTINO_ADIADO, "tipo_documento": tipo_documento_detectado, "adiado": {
+        "texto": texto_documento,
+        "texto_llm": texto_llm,
+        "tokens": tokens,
+        "tipo_documento": tipo_documento_detectado,
+        "truncado": truncado,
+        "dados_regex": dados_regex,
+        "duplicata": duplicata,
+    }}
+
+def _somar_metricas(anteriores: Dict[str, Any], novas: Dict[str, Any], segundos_lote: float,
+                    contadores: Dict[str, int]) -> Dict[str, Any]:
+    """Métricas do documento adiado (worker) somadas às da conclusão e ao tempo de espera pela resposta do lote."""
+    etapas = dict(anteriores["etapas"])
+    for etapa, segundos in list(novas["etapas"].items()) + [("api_deepseek", segundos_lote)]:
+        etapas[etapa] = round(etapas.get(etapa, 0.0) + segundos, 6)
+    somadas = {**anteriores, "etapas": etapas, "total": round(anteriores["total"] + novas["total"] + segundos_lote, 6)}
+    for nome, quantidade in list(novas.items()) + list(contadores.items()):
+        if nome not in ("arquivo", "total", "etapas", "ocr_por_pagina"):
+            somadas[nome] = somadas.get(nome, 0) + quantidade
+    return somadas
+
+def concluir_documento_adiado(
+    pdf_path: str,
+    resultado: Dict[str, Any],
+    dados_deepseek: Optional[Dict[str, Any]],
+    segundos_lote: float = 0.0,
+    contadores: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """
+    Conclui um documento adiado com a resposta do lote; sem ela (`dados_deepseek` None), a
+    DeepSeek é consultada só para este documento. `segundos_lote` é o tempo de espera pela
+    resposta do lote, somado à duração e às métricas do documento.
+    """
+    adiado = resultado["adiado"]
+    extrair_deepseek = extrair_com_deepseek if dados_deepseek is None else (lambda _texto: dados_deepseek)
+    inicio = time.perf_counter()
+    with medindo_documento(pdf_path) if "metricas" in resultado else contextlib.nullcontext() as metricas:
+        try:
+            concluido = _concluir_extracao(pdf_path, adiado["texto"], adiado["tipo_documento"], adiado["truncado"],
+                                           adiado["dados_regex"], adiado["duplicata"],
+                                           functools.partial(calcular_hash_arquivo, pdf_path), extrair_deepseek)
+        except Exception as e:
+            error_message = f"Erro inesperado no processamento do arquivo: {str(e)}"
+            logger.error(f"Erro ao processar {pdf_path}: {str(e)}")
+            print(f"Erro ao processar {os.path.basename(pdf_path)}: {error_message}")
+            concluido = {"destino": "erro", "linha": {
+                "caminho_arquivo": pdf_path,
+                "erro_detalhes": error_message,
+                "tipo_documento": adiado["tipo_documento"]
+            }}
+    concluido["segundos"] = round(resultado["segundos"] + segundos_lote + time.perf_counter() - inicio, 6)
+    if metricas is not None:
+        concluido["metricas"] = {
+            **_somar_metricas(resultado["metricas"], metricas.como_dict(), segundos_lote, contadores or {}),
+            "destino": concluido["destino"], "metodo": concluido.get("metodo", "")
+        }
+    return concluido
+
+def _inicializar_worker(fila_log, nivel_log: int, extractor: config.Extractor, workers: int) -> None:
+    """
+    Redireciona o logging do processo worker para a fila lida pelo processo principal
+    e ativa a mesma configuração do processo principal.
+    """
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(logging.handlers.QueueHandler(fila_log))
+    raiz.setLevel(nivel_log)
+    config.ativar(extractor)
+    definir_processos_compartilhando_limite(workers)
+
+def _processar_arquivo_em_worker(pdf_path: str, adiar_deepseek: bool = False) -> Dict[str, Any]:
+    """
+    Executa `processar_arquivo_pdf` num processo worker, capturando o que seria
+    impresso no console para que o processo principal o exiba sem intercalar linhas.
+    """
+    saida = io.StringIO()
+    antes = estatisticas_caches()
+    with contextlib.redirect_stdout(saida):
+        resultado = processar_arquivo_pdf(pdf_path, adiar_deepseek)
+    resultado["saida"] = saida.getvalue()
+    # Contadores dos caches deste documento, somados pelo processo principal
+    resultado["caches"] = {
+        nome: {k: v - antes[nome][k] for k, v in contadores.items()}
+        for nome, contadores in estatisticas_caches().items()
+    }
+    return resultado
+
+def _exibir_progresso(idx: int, total_arquivos: Optional[int], pdf_path: str) -> None:
+    posicao = f"{idx}/{total_arquivos}" if total_arquivos is not None else str(idx)
+    print(f"\n[{posicao}] Processando: {os.path.basename(pdf_path)}")
+    logger.info(f"[{posicao}] Processando arquivo: {pdf_path}")
+
+class PoolReciclavel(concurrent.futures.Executor):
+    """
+    Pool de processos substituído por um novo a cada `documentos_por_geracao` envios
+    (0 mantém o mesmo pool), devolvendo ao sistema a memória que o pdfplumber e o Poppler
+    deixam retida nos workers. A troca espera os documentos já enviados terminarem.
+    """
+
+    def __init__(self, criar_pool: Callable[[], concurrent.futures.ProcessPoolExecutor], documentos_por_geracao: int):
+        self._criar_pool = criar_pool
+        self._documentos_por_geracao = documentos_por_geracao
+        self._pool = criar_pool()
+        self._enviados = 0
+        self._reciclar = False
+
+    def reciclar(self) -> None:
+        """Troca o pool no próximo envio, qualquer que seja a contagem (ex.: depois de um documento acima do orçamento)."""
+        self._reciclar = True
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        if self._reciclar or (self._documentos_por_geracao > 0 and self._enviados >= self._documentos_por_geracao):
+            logger.info(f"Reciclando os workers após {self._enviados} documento(s)")
+            self._reciclar = False
+            self._pool.shutdown(wait=True)
+            self._pool = self._criar_pool()
+            self._enviados = 0
+        self._enviados += 1
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+@contextlib.contextmanager
+def pool_de_processos(workers: int) -> Iterator[concurrent.futures.Executor]:
+    """
+    Pool de workers com o log deles encaminhado para os handlers do processo principal.
+    Os workers são recriados a cada `worker_max_documentos` documentos por worker.
+    """
+    cfg = config.atual()
+    fila_log = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(fila_log, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+
+    def criar_pool() -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_inicializar_worker,
+            initargs=(fila_log, logging.getLogger().level, cfg, workers)
+        )
+
+    try:
+        with PoolReciclavel(criar_pool, workers * max(0, cfg.worker_max_documentos)) as executor:
+            yield executor
+    finally:
+        listener.stop()
+
+def iterar_resultados(
+    pdf_files: Iterable[str],
+    workers: int,
+    executor: Optional[concurrent.futures.Executor] = None,
+    adiar_deepseek: bool = False
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Gera (caminho, resultado) na mesma ordem de `pdf_files`, exibindo o progresso.
+
+    Com `workers` <= 1 tudo roda no processo atual; caso contrário os PDFs são
+    distribuídos num pool de processos e o chamador continua sendo o único a escrever nos CSVs.
+    O pool é criado para a chamada, a menos que `executor` (de `pool_de_processos`) seja informado.
+    `pdf_files` pode ser um iterador (ex.: trabalhos reivindicados da fila), consumido só à medida
+    que há espaço no pool. `adiar_deepseek` é repassado a `processar_arquivo_pdf`.
+    """
+    total_arquivos = len(pdf_files) if isinstance(pdf_files, collections.abc.Sized) else None
+    if workers <= 1:
+        for idx, pdf_path in enumerate(pdf_files, 1):
+            _exibir_progresso(idx, total_arquivos, pdf_path)
+            resultado = processar_arquivo_pdf(pdf_path, adiar_deepseek)
+            if resultado.pop("acima_orcamento", False):
+                # Sem workers não há processo para reciclar: a memória retida fica para os próximos documentos
+                logger.warning(f"Memória retida por {pdf_path} continua no processo; com --workers 2 ou mais, "
+                               "o worker seria recriado após um documento acima do orçamento")
+            yield pdf_path, resultado
+        return
+
+    if executor is None:
+        with pool_de_processos(workers) as executor:
+            yield from iterar_resultados(pdf_files, workers, executor, adiar_deepseek)
+        return
+
+    # Só uma janela de documentos fica enviada ao pool, para que os resultados não se acumulem
+    # na memória e a reciclagem dos workers não precise esperar a lista inteira
+    a_enviar = iter(pdf_files)
+    futuros: Deque[Tuple[str, concurrent.futures.Future]] = collections.deque(
+        (pdf_path, executor.submit(_processar_arquivo_em_worker, pdf_path, adiar_deepseek))
+        for pdf_path in itertools.islice(a_enviar, workers * 2)
+    )
+    idx = 0
+    while futuros:
+        idx += 1
+        pdf_path, futuro = futuros.popleft()
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            # Worker morreu (ex.: crash do Poppler) ou o resultado não pôde ser serializado
+            error_message = f"Erro inesperado no processamento do arquivo: {str(e)}"
+            logger.error(f"Erro ao processar {pdf_path}: {str(e)}")
+            resultado = {"destino": "erro", "saida": f"Erro ao processar {os.path.basename(pdf_path)}: {error_message}\n", "linha": {
+                "caminho_arquivo": pdf_path,
+                "erro_detalhes": error_message,
+                "tipo_documento": "DESCONHECIDO"
+            }}
+        if resultado.pop("acima_orcamento", False) and isinstance(executor, PoolReciclavel):
+            # O worker pode ter ficado com a memória do documento: os próximos vão para workers novos
+            executor.reciclar()
+        futuros.extend((proximo, executor.submit(_processar_arquivo_em_worker, proximo, adiar_deepseek)) for proximo in itertools.islice(a_enviar, 1))
+        # O progresso é exibido quando o resultado chega, seguido da saída do worker
+        _exibir_progresso(idx, total_arquivos, pdf_path)
+        sys.stdout.write(resultado.pop("saida", ""))
+        acumular_estatisticas_caches(resultado.pop("caches", {}))
+        yield pdf_path, resultado
+
+class LotesDeepSeek:
+    """
+    Junta, no processo principal, os documentos adiados pelos workers (curtos e com a extração
+    local pouco confiável) e consulta a DeepSeek uma vez por lote: até `deepseek_lote_tokens`
+    tokens estimados ou `deepseek_lote_documentos` documentos, ou quando o mais antigo espera há
+    `deepseek_lote_espera_segundos` (conferido a cada resultado que chega). Documentos cuja
+    resposta no lote não passa na validação são consultados de novo, um a um.
+    """
+
+    def __init__(self):
+        cfg = config.atual()
+        self.max_tokens = cfg.deepseek_lote_tokens
+        self.max_documentos = max(1, cfg.deepseek_lote_documentos)
+        self.espera = cfg.deepseek_lote_espera_segundos
+        self._pendentes: List[Tuple[str, Dict[str, Any]]] = []
+        self._tokens = 0
+        self._desde = 0.0
+
+    def adicionar(self, pdf_path: str, resultado: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Guarda um documento adiado; retorna os documentos concluídos se algum lote foi enviado."""
+        concluidos = []
+        tokens = resultado["adiado"]["tokens"]
+        if self._pendentes and self._tokens + tokens > self.max_tokens:
+            concluidos = self.enviar()
+        if not self._pendentes:
+            self._desde = time.monotonic()
+        self._pendentes.append((pdf_path, resultado))
+        self._tokens += tokens
+        if len(self._pendentes) >= self.max_documentos:
+            concluidos += self.enviar()
+        return concluidos
+
+    def vencidos(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Envia o lote incompleto se o documento mais antigo já espera há `deepseek_lote_espera_segundos`."""
+        if self._pendentes and time.monotonic() - self._desde >= self.espera:
+            return self.enviar()
+        return []
+
+    def enviar(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Consulta a DeepSeek com os documentos pendentes e retorna (caminho, resultado) de cada um, concluído."""
+        pendentes, self._pendentes, self._tokens = self._pendentes, [], 0
+        if not pendentes:
+            return []
+        print(f"\nConsultando a DeepSeek em lote para {len(pendentes)} documento(s)...")
+        logger.info(f"Lote da DeepSeek com {len(pendentes)} documento(s): {', '.join(caminho for caminho, _ in pendentes)}")
+        cliente = obter_cliente_deepseek()
+        requisicoes, retentativas = cliente.requisicoes, cliente.retentativas
+        inicio = time.perf_counter()
+        respostas = extrair_lote_com_deepseek([resultado["adiado"]["texto_llm"] for _, resultado in pendentes])
+        segundos_lote = time.perf_counter() - inicio
+        concluidos = []
+        for posicao, ((pdf_path, resultado), resposta) in enumerate(zip(pendentes, respostas)):
+            print(f"\nConcluindo {os.path.basename(pdf_path)} "
+                  f"({'resposta do lote' if resposta is not None else 'resposta do lote recusada; consultando sozinho'})")
+            # A requisição do lote conta uma vez, no primeiro documento
+            contadores = {"documentos_lote_llm": 1, "caracteres_llm": len(resultado["adiado"]["texto_llm"])}
+            if posicao == 0:
+                contadores["requisicoes_llm"] = cliente.requisicoes - requisicoes
+                contadores["retentativas_llm"] = cliente.retentativas - retentativas
+            concluidos.append((pdf_path, concluir_documento_adiado(pdf_path, resultado, resposta, segundos_lote, contadores)))
+        return concluidos
+
+def entregar_resultado(
+    pdf_path: str,
+    resultado: Dict[str, Any],
+    identificacoes: Dict[str, Dict[str, Any]],
+    gravador: GravadorResultados,
+    documentos_por_metodo: Dict[str, int],
+    coletor: Optional[ColetorMetricas]
+) -> None:
+    """Entrega o resultado de um documento ao gravador, com o registro do armazém e as métricas."""
+    metricas = resultado.pop("metricas", None)
+    inicio_gravacao = time.perf_counter()
+    # O manifesto só registra um arquivo depois que a linha dele foi gravada
+    contexto = (pdf_path, identificacoes[pdf_path], resultado["destino"]) if pdf_path in identificacoes else None
+    registro = None
+    if gravador.armazem is not None:
+        hash_arquivo = identificacoes.get(pdf_path, {}).get("hash", "")
+        if not hash_arquivo:
+            try:
+                hash_arquivo = calcular_hash_arquivo(pdf_path)
+            except OSError:
+                pass  # arquivo removido depois de processado: o registro fica sem hash
+        registro = registro_do_resultado(pdf_path, resultado, hash_arquivo, metricas)
+    gravador.adicionar(resultado["destino"], resultado["linha"], contexto, registro)
+    if coletor is not None:
+        metricas = metricas or {"arquivo": pdf_path, "total": 0.0, "etapas": {}, "destino": resultado["destino"]}
+        metricas["etapas"]["gravacao"] = round(time.perf_counter() - inicio_gravacao, 6)
+        coletor.adicionar(metricas)
+    if resultado.get("metodo"):
+        documentos_por_metodo[resultado["metodo"]] = documentos_por_metodo.get(resultado["metodo"], 0) + 1
+
+def processar_arquivos(
+    pdf_files: Iterable[str],
+    identificacoes: Dict[str, Dict[str, Any]],
+    workers: int,
+    gravador: GravadorResultados,
+    documentos_por_metodo: Dict[str, int],
+    executor: Optional[concurrent.futures.Executor] = None,
+    coletor: Optional[ColetorMetricas] = None
+) -> None:
+    """
+    Processa os PDFs e entrega cada resultado ao gravador, contando os documentos por método.
+    Com `deepseek_lote_tokens` configurado, os documentos adiados para um lote da DeepSeek são
+    entregues quando o lote volta, e os lotes incompletos são enviados ao final.
+    """
+    lotes = LotesDeepSeek() if config.atual().deepseek_lote_tokens > 0 else None
+    for pdf_path, resultado in iterar_resultados(pdf_files, workers, executor, adiar_deepseek=lotes is not None):
+        if resultado["destino"] == DESTINO_ADIADO:
+            concluidos = lotes.adicionar(pdf_path, resultado)
+        else:
+            entregar_resultado(pdf_path, resultado, identificacoes, gravador, documentos_por_metodo, coletor)
+            concluidos = []
+        if lotes is not None:
+            concluidos += lotes.vencidos()
+        for pdf_concluido, concluido in concluidos:
+            entregar_resultado(pdf_concluido, concluido, identificacoes, gravador, documentos_por_metodo, coletor)
+    if lotes is not None:
+        for pdf_concluido, concluido in lotes.enviar():
+            entregar_resultado(pdf_concluido, concluido, identificacoes, gravador, documentos_por_metodo, coletor)
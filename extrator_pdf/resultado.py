@@ -0,0 +1,47 @@
+"""Resultado de `process_pdf` para quem usa o pacote como biblioteca."""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+@dataclass
+class Result:
+    """
+    Destino do documento ("sucesso", "erro" ou "nao_suportado"), a linha que a linha de comando
+    gravaria na saída correspondente e, em caso de sucesso, os campos extraídos em `dados`
+    (valores numéricos em float). `truncado` indica que só parte do texto foi usada (orçamento
+    de páginas, de páginas com OCR ou de caracteres). `duplicata_de` traz o caminho da nota já extraída de que este documento é cópia
+    (os campos vêm dela). `metricas` só vem preenchido com as métricas ativadas.
+    """
+
+    caminho: str
+    destino: str
+    tipo_documento: str = "DESCONHECIDO"
+    metodo: str = ""
+    dados: Dict[str, Any] = field(default_factory=dict)
+    linha: Dict[str, Any] = field(default_factory=dict)
+    truncado: bool = False
+    duplicata_de: str = ""
+    metricas: Optional[Dict[str, Any]] = None
+
+    @property
+    def sucesso(self) -> bool:
+        return self.destino == "sucesso"
+
+    @property
+    def erro(self) -> str:
+        return str(self.linha.get("erro_detalhes", ""))
+
+    @classmethod
+    def do_resultado(cls, caminho_pdf: str, resultado: Dict[str, Any]) -> "Result":
+        """Converte o dicionário devolvido por `processar_arquivo_pdf`."""
+        linha = resultado.get("linha", {})
+        return cls(
+            caminho=caminho_pdf,
+            destino=resultado["destino"],
+            tipo_documento=resultado.get("tipo_documento") or linha.get("tipo_documento", "DESCONHECIDO"),
+            metodo=resultado.get("metodo", ""),
+            dados=resultado.get("dados", {}),
+            linha=linha,
+            truncado=resultado.get("truncado", False),
+            duplicata_de=resultado.get("duplicata_de", ""),
+            metricas=resultado.get("metricas"),
+        )
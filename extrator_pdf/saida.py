@@ -0,0 +1,254 @@
+"""Saída dos resultados: CSV, JSONL e Parquet gravados em lotes pelo GravadorResultados."""
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+def escrever_cabecalho_csv(caminho_csv: str, fieldnames: List[str], delimiter: str = ';') -> List[str]:
+    """
+    Escreve o cabeçalho no CSV se o arquivo não existir ou estiver vazio. Devolve as colunas
+    a gravar no arquivo (ver `colunas_csv_existente`).
+    """
+    file_exists = os.path.exists(caminho_csv) and os.path.getsize(caminho_csv) > 0
+    if file_exists:
+        return colunas_csv_existente(caminho_csv, fieldnames, delimiter)
+    with open(caminho_csv, "a", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=delimiter)
+        writer.writeheader()
+        logger.info(f"Cabecalho escrito no CSV: {caminho_csv}")
+    return fieldnames
+
+def colunas_csv_existente(caminho_csv: str, fieldnames: List[str], delimiter: str = ';') -> List[str]:
+    """
+    Colunas a gravar num CSV que já existe. O arquivo nunca é reescrito: se o cabeçalho for de
+    uma versão anterior (um prefixo do atual), as linhas novas seguem esse cabeçalho e as colunas
+    acrescentadas depois só aparecem em CSVs novos. Qualquer outro cabeçalho fica com `fieldnames`.
+    """
+    with open(caminho_csv, newline="", encoding="utf-8-sig") as f:
+        cabecalho = next(csv.reader(f, delimiter=delimiter), [])
+    if not cabecalho or cabecalho == fieldnames or cabecalho != fieldnames[:len(cabecalho)]:
+        return fieldnames
+    novas = fieldnames[len(cabecalho):]
+    logger.info(f"CSV {caminho_csv} de uma versão anterior: colunas {novas} não serão gravadas nele")
+    print(f"CSV {caminho_csv} sem as colunas {', '.join(novas)}; elas só são gravadas em CSVs novos.")
+    return cabecalho
+
+def reparar_final_truncado(caminho: str, terminador: bytes, bloco: int = 64 * 1024) -> None:
+    """Descarta o que vier depois do último `terminador` (registro pela metade de uma execução interrompida)."""
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        return
+    with open(caminho, "r+b") as f:
+        tamanho = f.seek(0, os.SEEK_END)
+        inicio = max(0, tamanho - bloco)
+        f.seek(inicio)
+        final = f.read()
+        if final.endswith(terminador):
+            return
+        posicao = final.rfind(terminador)
+        if posicao == -1 and inicio > 0:
+            return  # registro maior que o bloco lido: não há como saber onde ele começa
+        f.truncate(inicio + posicao + len(terminador) if posicao != -1 else 0)
+    logger.warning(f"Registro incompleto de uma execução interrompida removido do final de {caminho}")
+
+def _acrescentar_e_sincronizar(caminho: str, conteudo: bytes) -> None:
+    """Acrescenta o lote com uma única escrita e só retorna depois que ele chegou ao disco."""
+    with open(caminho, "ab") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+
+def posicao_saida(caminho: str) -> Any:
+    """Estado atual de uma saída, para `restaurar_saida`: o tamanho do arquivo ou as partes da pasta (Parquet)."""
+    if os.path.isdir(caminho):
+        return sorted(os.listdir(caminho))
+    return os.path.getsize(caminho) if os.path.exists(caminho) else 0
+
+def restaurar_saida(caminho: str, posicao: Any) -> None:
+    """Desfaz o que foi acrescentado à saída depois de `posicao_saida`."""
+    if isinstance(posicao, list):
+        anteriores = set(posicao)
+        for nome in os.listdir(caminho) if os.path.isdir(caminho) else []:
+            if nome not in anteriores:
+                os.remove(os.path.join(caminho, nome))
+        return
+    if os.path.exists(caminho) and os.path.getsize(caminho) > posicao:
+        with open(caminho, "r+b") as f:
+            f.truncate(posicao)
+            f.flush()
+            os.fsync(f.fileno())
+
+class SaidaCSV:
+    """CSV com ';' (o formato original), gravado lote a lote."""
+
+    def __init__(self, caminho: str, fieldnames: List[str], delimiter: str = ';'):
+        self.caminho = caminho
+        self.fieldnames = fieldnames
+        self.delimiter = delimiter
+        reparar_final_truncado(caminho, b"\r\n")
+        self.fieldnames = escrever_cabecalho_csv(caminho, fieldnames, delimiter)
+
+    def gravar_lote(self, linhas: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        # Num CSV de uma versão anterior as colunas acrescentadas depois ficam de fora
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, delimiter=self.delimiter, extrasaction="ignore")
+        writer.writerows(linhas)
+        _acrescentar_e_sincronizar(self.caminho, buffer.getvalue().encode("utf-8"))
+
+class SaidaJSONL:
+    """Um objeto JSON por linha, com as mesmas colunas do CSV."""
+
+    def __init__(self, caminho: str, fieldnames: List[str]):
+        self.caminho = caminho
+        self.fieldnames = fieldnames
+        reparar_final_truncado(caminho, b"\n")
+
+    def gravar_lote(self, linhas: List[Dict[str, Any]]) -> None:
+        conteudo = "".join(
+            json.dumps({campo: linha.get(campo, "") for campo in self.fieldnames}, ensure_ascii=False) + "\n"
+            for linha in linhas
+        )
+        _acrescentar_e_sincronizar(self.caminho, conteudo.encode("utf-8"))
+
+class SaidaParquet:
+    """
+    Pasta com um arquivo Parquet por lote (Parquet não permite acrescentar linhas), legível como
+    um único dataset. Cada parte é escrita num temporário oculto e renomeada ao final.
+    Requer pyarrow.
+    """
+
+    def __init__(self, caminho: str, fieldnames: List[str]):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.caminho = caminho
+        self.fieldnames = fieldnames
+        self.schema = pyarrow.schema([(campo, pyarrow.string()) for campo in fieldnames])
+        self._partes = 0
+        os.makedirs(caminho, exist_ok=True)
+
+    def gravar_lote(self, linhas: List[Dict[str, Any]]) -> None:
+        tabela = self._pyarrow.Table.from_pylist(
+            [{campo: str(linha.get(campo, "")) for campo in self.fieldnames} for linha in linhas],
+            schema=self.schema
+        )
+        self._partes += 1
+        nome = f"parte-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{self._partes:05d}.parquet"
+        temporario = os.path.join(self.caminho, f".{nome}.tmp")
+        self._parquet.write_table(tabela, temporario)
+        os.replace(temporario, os.path.join(self.caminho, nome))
+
+FORMATOS_DISPONIVEIS = {"csv": (".csv", SaidaCSV), "jsonl": (".jsonl", SaidaJSONL), "parquet": (".parquet", SaidaParquet)}
+
+def criar_saidas(caminho_base: str, fieldnames: List[str], formatos: List[str]) -> List[Any]:
+    """Uma saída por formato pedido (`caminho_base` sem extensão); formatos indisponíveis são avisados e ignorados."""
+    saidas = []
+    for formato in formatos:
+        if formato not in FORMATOS_DISPONIVEIS:
+            print(f"Formato de saída desconhecido ignorado: {formato}")
+            continue
+        extensao, classe = FORMATOS_DISPONIVEIS[formato]
+        try:
+            saidas.append(classe(caminho_base + extensao, fieldnames))
+        except ImportError:
+            print(f"Formato {formato} ignorado: instale o pyarrow para gerar Parquet.")
+            logger.warning(f"pyarrow não instalado; saída {caminho_base + extensao} desativada")
+    return saidas
+
+class GravadorResultados:
+    """
+    Acumula as linhas de cada destino ("sucesso", "erro", "nao_suportado") e as grava em lotes
+    em todas as saídas do destino: a cada `max_linhas` linhas, quando `intervalo` segundos
+    se passaram desde a última gravação (verificado a cada linha) e sempre ao sair, inclusive
+    por exceção. `apos_gravar` recebe os contextos das linhas já gravadas (ex.: para o manifesto
+    só registrar arquivos cujas linhas estão no disco).
+
+    `trava`, se informada, envolve cada gravação: recebe os contextos pendentes e devolve um
+    gerenciador de contexto que entrega os contextos cujas linhas podem ser gravadas (ex.: a fila
+    compartilhada, que serializa as gravações entre máquinas e descarta trabalhos cujo lease foi perdido).
+
+    `armazem`, se informado, recebe os registros das linhas gravadas (os de `adicionar`), depois da trava.
+    """
+
+    def __init__(
+        self,
+        saidas_por_destino: Dict[str, List[Any]],
+        max_linhas: Optional[int] = None,
+        intervalo: Optional[float] = None,
+        apos_gravar: Optional[Any] = None,
+        trava: Optional[Callable[[List[Any]], ContextManager[List[Any]]]] = None,
+        armazem: Optional[Any] = None
+    ):
+        cfg = config.atual()
+        self.saidas_por_destino = saidas_por_destino
+        self.max_linhas = max(1, cfg.saida_lote_linhas if max_linhas is None else max_linhas)
+        self.intervalo = cfg.saida_intervalo_segundos if intervalo is None else intervalo
+        self.apos_gravar = apos_gravar
+        self.trava = trava
+        self.armazem = armazem
+        # Cada linha guarda o contexto do arquivo, para que a trava possa descartá-la, e o registro do armazém
+        self._linhas: Dict[str, List[Tuple[Dict[str, Any], Any, Optional[Dict[str, Any]]]]] = {
+            destino: [] for destino in saidas_por_destino
+        }
+        self._pendentes = 0
+        self._ultima_gravacao = time.monotonic()
+
+    def adicionar(self, destino: str, linha: Dict[str, Any], contexto: Any = None,
+                  registro: Optional[Dict[str, Any]] = None) -> None:
+        self._linhas[destino].append((linha, contexto, registro))
+        self._pendentes += 1
+        if self._pendentes >= self.max_linhas or time.monotonic() - self._ultima_gravacao >= self.intervalo:
+            self.gravar()
+
+    def gravar(self) -> None:
+        pendentes, self._linhas = self._linhas, {destino: [] for destino in self.saidas_por_destino}
+        self._pendentes = 0
+        self._ultima_gravacao = time.monotonic()
+        if not any(pendentes.values()):
+            return
+        contextos = [contexto for linhas in pendentes.values() for _, contexto, _ in linhas if contexto is not None]
+        registros = []
+        with (self.trava(contextos) if self.trava is not None else contextlib.nullcontext(contextos)) as aceitos:
+            for destino, linhas in pendentes.items():
+                linhas = [(linha, registro) for linha, contexto, registro in linhas if contexto is None or contexto in aceitos]
+                if not linhas:
+                    continue
+                for saida in self.saidas_por_destino[destino]:
+                    saida.gravar_lote([linha for linha, _ in linhas])
+                    logger.info(f"{len(linhas)} linha(s) gravadas em {saida.caminho}")
+                registros.extend(registro for _, registro in linhas if registro is not None)
+            if aceitos and self.apos_gravar is not None:
+                self.apos_gravar(aceitos)
+        # Depois da trava: com a fila, o lote só fica confirmado ao sair dela (antes disso, uma
+        # gravação interrompida é desfeita nas saídas e repetiria os registros no armazém)
+        if registros and self.armazem is not None:
+            # As saídas já foram gravadas: uma falha no armazém não deve desfazer o lote
+            try:
+                self.armazem.gravar_lote(registros)
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao gravar {len(registros)} registro(s) em {self.armazem.caminho}: {str(e)}")
+
+    def __enter__(self) -> "GravadorResultados":
+        return self
+
+    def __exit__(self, tipo_excecao, excecao, rastreamento) -> None:
+        if tipo_excecao is None:
+            self.gravar()
+            return
+        # Interrompido: grava o que já estava pronto sem mascarar a exceção original
+        try:
+            self.gravar()
+        except Exception as e:
+            logger.error(f"Falha ao gravar os resultados pendentes: {str(e)}")
+
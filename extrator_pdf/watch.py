@@ -0,0 +1,192 @@
+"""Modo --watch: acompanha a pasta de PDFs e processa os arquivos à medida que chegam."""
+import concurrent.futures
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from .fila import FilaTrabalhos, processar_fila
+from .manifesto import ManifestoProcessamento, filtrar_pendentes
+from .metricas import ColetorMetricas
+from .pipeline import processar_arquivos
+from .saida import GravadorResultados
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre as verificações de arquivos estáveis
+WATCH_INTERVALO_SEGUNDOS = 0.5
+
+def listar_pdfs(pasta: str) -> List[str]:
+    return glob.glob(os.path.join(pasta, "**", "*.pdf"), recursive=True)
+
+def _eh_pdf(caminho: str) -> bool:
+    return caminho.lower().endswith(".pdf")
+
+class ObservadorPasta:
+    """
+    Acompanha a pasta de PDFs no modo --watch.
+
+    Eventos do sistema de arquivos (pacote opcional `watchdog`: inotify no Linux,
+    ReadDirectoryChangesW no Windows) ou, sem ele, varreduras periódicas da pasta apontam
+    arquivos candidatos. Um candidato só é liberado depois que tamanho e mtime ficam
+    estáveis por `estabilidade` segundos (cópia concluída), e cada versão (tamanho, mtime)
+    de um arquivo é liberada uma única vez.
+    """
+
+    def __init__(
+        self,
+        pasta: str,
+        estabilidade: Optional[float] = None,
+        varredura: Optional[float] = None,
+        forcar_polling: bool = False
+    ):
+        cfg = config.atual()
+        self.pasta = pasta
+        self.estabilidade = cfg.watch_estabilidade_segundos if estabilidade is None else estabilidade
+        self.varredura = cfg.watch_varredura_segundos if varredura is None else varredura
+        self.forcar_polling = forcar_polling
+        self.modo = "polling"
+        self._observer = None
+        self._lock = threading.Lock()
+        self._candidatos: Dict[str, Tuple[Optional[Tuple[int, int]], float]] = {}  # caminho -> (assinatura, desde)
+        self._liberados: Dict[str, Tuple[int, int]] = {}
+        self._proxima_varredura = 0.0
+
+    def iniciar(self) -> None:
+        if not self.forcar_polling:
+            try:
+                self._observer = self._criar_observer_watchdog()
+                self._observer.start()
+                self.modo = "eventos"
+            except ImportError:
+                logger.info("watchdog não instalado; modo --watch usará varreduras periódicas")
+            except Exception as e:
+                logger.warning(f"Não foi possível observar eventos em {self.pasta} ({str(e)}); usando varreduras periódicas")
+                self._observer = None
+        self._proxima_varredura = time.monotonic() + self.varredura
+        logger.info(f"Observando {self.pasta} (modo: {self.modo})")
+
+    def parar(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def __enter__(self) -> "ObservadorPasta":
+        self.iniciar()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.parar()
+
+    def _criar_observer_watchdog(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        observador = self
+
+        class TratadorEventos(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                if evento.is_directory:
+                    return
+                for caminho in (getattr(evento, "dest_path", ""), evento.src_path):
+                    if caminho and _eh_pdf(caminho):
+                        observador.notificar(caminho)
+
+        observer = Observer()
+        observer.schedule(TratadorEventos(), self.pasta, recursive=True)
+        return observer
+
+    def marcar_liberados(self, caminhos: List[str]) -> None:
+        """Registra a versão atual de arquivos já entregues por outro caminho (ex.: a varredura inicial)."""
+        with self._lock:
+            for caminho in caminhos:
+                try:
+                    estado = os.stat(caminho)
+                except OSError:
+                    continue
+                self._liberados[caminho] = (estado.st_size, estado.st_mtime_ns)
+
+    def notificar(self, caminho: str) -> None:
+        """Marca o arquivo como candidato; a estabilidade é conferida em `estaveis`."""
+        with self._lock:
+            if caminho not in self._candidatos:
+                self._candidatos[caminho] = (None, time.monotonic())
+
+    def _varrer(self) -> None:
+        for caminho in listar_pdfs(self.pasta):
+            try:
+                estado = os.stat(caminho)
+            except OSError:
+                continue
+            if self._liberados.get(caminho) != (estado.st_size, estado.st_mtime_ns):
+                self.notificar(caminho)
+
+    def estaveis(self) -> List[str]:
+        """Candidatos cujo tamanho e mtime não mudaram na janela de estabilidade (cada versão uma vez)."""
+        agora = time.monotonic()
+        if self._observer is None and agora >= self._proxima_varredura:
+            self._varrer()
+            self._proxima_varredura = agora + self.varredura
+        prontos = []
+        with self._lock:
+            for caminho, (assinatura, desde) in list(self._candidatos.items()):
+                try:
+                    estado = os.stat(caminho)
+                except OSError:
+                    del self._candidatos[caminho]  # removido ou renomeado antes de estabilizar
+                    continue
+                atual = (estado.st_size, estado.st_mtime_ns)
+                if atual != assinatura:
+                    self._candidatos[caminho] = (atual, agora)
+                    continue
+                if agora - desde < self.estabilidade or estado.st_size == 0:
+                    continue
+                del self._candidatos[caminho]
+                if self._liberados.get(caminho) != atual:
+                    self._liberados[caminho] = atual
+                    prontos.append(caminho)
+        return sorted(prontos)
+
+def observar_pasta(
+    observador: ObservadorPasta,
+    manifesto: Optional[ManifestoProcessamento],
+    workers: int,
+    gravador: GravadorResultados,
+    documentos_por_metodo: Dict[str, int],
+    forcar: bool = False,
+    refazer_erros: bool = False,
+    executor: Optional[concurrent.futures.Executor] = None,
+    intervalo: float = WATCH_INTERVALO_SEGUNDOS,
+    coletor: Optional[ColetorMetricas] = None,
+    fila: Optional[FilaTrabalhos] = None,
+    dono: str = ""
+) -> None:
+    """
+    Processa os PDFs à medida que ficam estáveis, até Ctrl+C ou SIGTERM. Com `fila`, os PDFs
+    novos vão para a fila compartilhada (em vez do manifesto), e a fila também é conferida a
+    cada varredura, para pegar trabalhos enfileirados ou abandonados por outros processos.
+    """
+    print(f"\nObservando {observador.pasta} por novos PDFs (modo: {observador.modo}). Ctrl+C para encerrar.")
+    proxima_consulta_fila = time.monotonic() + observador.varredura
+    while True:
+        novos = observador.estaveis()
+        if fila is not None and (novos or time.monotonic() >= proxima_consulta_fila):
+            if novos:
+                logger.info(f"{len(novos)} PDF(s) novo(s) ou alterado(s) detectado(s)")
+                fila.enfileirar(novos, forcar=forcar, refazer_erros=refazer_erros)
+            processar_fila(fila, dono, workers, gravador, documentos_por_metodo, executor, coletor, aguardar_outros=False)
+            proxima_consulta_fila = time.monotonic() + observador.varredura
+            continue
+        if not novos:
+            time.sleep(intervalo)
+            continue
+        logger.info(f"{len(novos)} PDF(s) novo(s) ou alterado(s) detectado(s)")
+        pendentes, identificacoes = filtrar_pendentes(novos, manifesto, forcar=forcar, refazer_erros=refazer_erros)
+        processar_arquivos(pendentes, identificacoes, workers, gravador, documentos_por_metodo, executor, coletor)
+        # Sem esperar o lote encher: no modo contínuo cada arquivo deve aparecer logo na saída
+        gravador.gravar()
+
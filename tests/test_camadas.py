@@ -0,0 +1,38 @@
+"""Extração em camadas: com o regex confiável, a DeepSeek só é consultada por operação e observações."""
+import pytest
+
+from extrator_pdf import config
+from extrator_pdf.camadas import METODO_LOCAL, METODO_LOCAL_COMPLETADO, extrair_campos_em_camadas
+
+DADOS_REGEX = {
+    "numero_nota": "00001234", "prestador": "EMPRESA TESTE LTDA", "cnpj_prestador": "11.222.333/0001-81",
+    "valor_total": "1500,00", "data_emissao": "01/02/2024", "irrf": "0", "operacao": "", "observacoes": "",
+}
+
+def nao_chamar(texto):
+    raise AssertionError("a extração completa pela DeepSeek não deveria ser chamada")
+
+@pytest.fixture
+def regex_confiavel():
+    anterior = config.atual()
+    cfg = config.Extractor.do_ambiente().substituir(confianca_minima_local=0.0)
+    config.ativar(cfg)
+    yield cfg
+    config.ativar(anterior)
+
+def test_campos_descritivos_completam_o_regex(regex_confiavel):
+    dados, metodo = extrair_campos_em_camadas(
+        "texto", dict(DADOS_REGEX), nao_chamar,
+        lambda texto: {"operacao": "SERVICO", "observacoes": "Retenção de ISS"}
+    )
+    assert metodo == METODO_LOCAL_COMPLETADO
+    assert dados == {**DADOS_REGEX, "operacao": "SERVICO", "observacoes": "Retenção de ISS"}
+
+def test_falha_nos_campos_descritivos_mantem_o_regex(regex_confiavel):
+    dados, metodo = extrair_campos_em_camadas("texto", dict(DADOS_REGEX), nao_chamar, lambda texto: None)
+    assert (dados, metodo) == (DADOS_REGEX, METODO_LOCAL)
+
+def test_campos_descritivos_desativados(regex_confiavel):
+    config.ativar(regex_confiavel.substituir(deepseek_campos_descritivos=False))
+    dados, metodo = extrair_campos_em_camadas("texto", dict(DADOS_REGEX), nao_chamar, nao_chamar)
+    assert (dados, metodo) == (DADOS_REGEX, METODO_LOCAL)
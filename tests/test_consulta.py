@@ -0,0 +1,22 @@
+"""Argumentos do `consulta totals`: mês e datas inválidos são recusados pelo argparse."""
+import pytest
+
+from extrator_pdf.consulta import criar_parser, periodo_do_mes
+
+@pytest.mark.parametrize("mes", ["2024-13", "2024/09", "2024-00", "setembro"])
+def test_mes_invalido_e_recusado(mes, capsys):
+    with pytest.raises(SystemExit) as saida:
+        criar_parser().parse_args(["totals", "--month", mes])
+    assert saida.value.code == 2
+    assert "mês inválido" in capsys.readouterr().err
+
+@pytest.mark.parametrize("data", ["2024-02-30", "30/09/2024"])
+def test_data_invalida_e_recusada(data, capsys):
+    with pytest.raises(SystemExit):
+        criar_parser().parse_args(["totals", "--from", data])
+    assert "data inválida" in capsys.readouterr().err
+
+def test_mes_valido_vira_periodo():
+    args = criar_parser().parse_args(["totals", "--month", "2024-2"])
+    assert args.month == "2024-02"
+    assert periodo_do_mes(args.month) == ["2024-02-01", "2024-02-29"]
@@ -0,0 +1,54 @@
+"""Orçamento de memória: conta o crescimento durante cada documento, não a memória do processo."""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from corpus_pdf import escrever_pdf, gerar_documento  # noqa: E402
+
+from extrator_pdf import config, memoria  # noqa: E402
+from extrator_pdf.pipeline import processar_arquivo_pdf  # noqa: E402
+
+@pytest.fixture
+def memoria_crescente(monkeypatch, tmp_path):
+    """RSS falso que cresce 30 MB a cada medição e nunca volta (como a memória retida pelo Python)."""
+    estado = {"rss": 200.0}
+
+    def rss_atual_mb():
+        estado["rss"] += 30
+        return estado["rss"]
+
+    monkeypatch.setattr(memoria, "rss_atual_mb", rss_atual_mb)
+    anterior = config.atual()
+    config.ativar(config.Extractor.do_ambiente().substituir(
+        limite_memoria_mb=100.0, pasta_cache=str(tmp_path / "cache"), cache_ocr_max_mb=0, cache_llm_max_mb=0,
+        detectar_duplicatas=False, deepseek_api_key="", confianca_minima_local=0.0,
+        deepseek_campos_descritivos=False, metricas=False
+    ))
+    yield estado
+    config.ativar(anterior)
+
+def test_documento_pequeno_depois_de_um_acima_do_orcamento(memoria_crescente, tmp_path):
+    rnd = random.Random(1)
+    longo, _ = gerar_documento("longo", rnd, 12)
+    pequeno, _ = gerar_documento("digital_nfse", rnd, 1)
+    escrever_pdf(str(tmp_path / "longo.pdf"), longo)
+    escrever_pdf(str(tmp_path / "pequeno.pdf"), pequeno)
+
+    acima = processar_arquivo_pdf(str(tmp_path / "longo.pdf"))
+    assert acima["destino"] == "erro"
+    assert "Documento acima do orçamento" in acima["linha"]["erro_detalhes"]
+
+    # O processo continua com a memória alta, mas o documento seguinte cabe no orçamento dele
+    assert memoria_crescente["rss"] > 300
+    resultado = processar_arquivo_pdf(str(tmp_path / "pequeno.pdf"))
+    assert resultado["destino"] == "sucesso"
+
+def test_verificar_memoria_fora_de_um_documento(memoria_crescente):
+    with memoria.orcamento_memoria():
+        memoria.verificar_memoria("teste")
+    with pytest.raises(memoria.OrcamentoExcedido):
+        memoria.verificar_memoria("teste")
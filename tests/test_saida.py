@@ -0,0 +1,51 @@
+"""CSVs que já existem: o cabeçalho decide as colunas gravadas e o arquivo nunca é reescrito."""
+import csv
+
+from extrator_pdf.saida import SaidaCSV, colunas_csv_existente
+
+COLUNAS = ["NF", "PRESTADOR", "MÉTODO EXTRAÇÃO"]
+
+def criar_csv(caminho, conteudo: str, encoding: str = "utf-8-sig") -> bytes:
+    caminho.write_bytes(conteudo.encode(encoding))
+    return caminho.read_bytes()
+
+def test_cabecalho_anterior_e_mantido(tmp_path):
+    caminho = tmp_path / "sucesso.csv"
+    original = criar_csv(caminho, "NF;PRESTADOR\r\n00000001;EMPRESA A\r\n")
+    assert colunas_csv_existente(str(caminho), COLUNAS) == ["NF", "PRESTADOR"]
+
+    saida = SaidaCSV(str(caminho), COLUNAS)
+    saida.gravar_lote([{"NF": "00000002", "PRESTADOR": "EMPRESA B", "MÉTODO EXTRAÇÃO": "Regex"}])
+    conteudo = caminho.read_bytes()
+    assert conteudo.startswith(original)
+    assert conteudo[len(original):] == "00000002;EMPRESA B\r\n".encode("utf-8")
+
+def test_cabecalho_identico(tmp_path):
+    caminho = tmp_path / "sucesso.csv"
+    original = criar_csv(caminho, "NF;PRESTADOR;MÉTODO EXTRAÇÃO\r\n00000001;EMPRESA A;Regex\r\n")
+    assert colunas_csv_existente(str(caminho), COLUNAS) == COLUNAS
+    SaidaCSV(str(caminho), COLUNAS)
+    assert caminho.read_bytes() == original
+
+def test_cabecalho_sem_relacao_nao_e_alterado(tmp_path):
+    caminho = tmp_path / "sucesso.csv"
+    original = criar_csv(caminho, "A;B\r\n1;2\r\n")
+    assert colunas_csv_existente(str(caminho), COLUNAS) == COLUNAS
+    SaidaCSV(str(caminho), COLUNAS)
+    assert caminho.read_bytes() == original
+
+def test_cabecalho_com_e_sem_bom(tmp_path):
+    com_bom = tmp_path / "com_bom.csv"
+    sem_bom = tmp_path / "sem_bom.csv"
+    criar_csv(com_bom, "NF;PRESTADOR\r\n")
+    criar_csv(sem_bom, "NF;PRESTADOR\r\n", encoding="utf-8")
+    assert com_bom.read_bytes().startswith(b"\xef\xbb\xbf")
+    assert colunas_csv_existente(str(com_bom), COLUNAS) == ["NF", "PRESTADOR"]
+    assert colunas_csv_existente(str(sem_bom), COLUNAS) == ["NF", "PRESTADOR"]
+
+def test_csv_novo_recebe_todas_as_colunas(tmp_path):
+    caminho = tmp_path / "sucesso.csv"
+    saida = SaidaCSV(str(caminho), COLUNAS)
+    saida.gravar_lote([{"NF": "00000001", "PRESTADOR": "EMPRESA A", "MÉTODO EXTRAÇÃO": "Regex"}])
+    with open(caminho, newline="", encoding="utf-8-sig") as f:
+        assert list(csv.reader(f, delimiter=";")) == [COLUNAS, ["00000001", "EMPRESA A", "Regex"]]
@@ -0,0 +1,75 @@
+"""Modo --watch: cada versão estável de um PDF é liberada uma única vez, e nunca durante a cópia."""
+import os
+import threading
+import time
+
+from extrator_pdf.watch import ObservadorPasta
+
+ESTABILIDADE = 0.3
+
+def coletar(observador: ObservadorPasta, segundos: float) -> list:
+    """Chama `estaveis` como o laço do --watch durante `segundos`; (instante, caminho) de cada liberação."""
+    liberados = []
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        liberados.extend((time.monotonic(), caminho) for caminho in observador.estaveis())
+        time.sleep(0.02)
+    return liberados
+
+def observador_polling(pasta) -> ObservadorPasta:
+    observador = ObservadorPasta(str(pasta), estabilidade=ESTABILIDADE, varredura=0.05, forcar_polling=True)
+    observador.iniciar()
+    return observador
+
+def test_copia_lenta_so_e_liberada_depois_de_terminar(tmp_path):
+    observador = observador_polling(tmp_path)
+    caminho = str(tmp_path / "nota.pdf")
+    ultima_escrita = []
+
+    def copiar_em_partes():
+        with open(caminho, "wb") as f:
+            for _ in range(12):
+                f.write(b"x" * 4096)
+                f.flush()
+                ultima_escrita[:] = [time.monotonic()]
+                time.sleep(ESTABILIDADE / 3)
+
+    copia = threading.Thread(target=copiar_em_partes)
+    copia.start()
+    liberados = coletar(observador, 12 * ESTABILIDADE / 3 + 3 * ESTABILIDADE)
+    copia.join()
+
+    assert [liberado for _, liberado in liberados] == [caminho]
+    # Só depois de uma janela de estabilidade inteira sem escritas
+    assert liberados[0][0] >= ultima_escrita[0] + ESTABILIDADE
+    assert os.path.getsize(caminho) == 12 * 4096
+
+def test_arquivo_renomeado_para_o_lugar_e_liberado_uma_vez(tmp_path):
+    observador = observador_polling(tmp_path)
+    temporario = tmp_path / "nota.pdf.part"
+    temporario.write_bytes(b"%PDF-1.4\n" * 100)
+    assert coletar(observador, 2 * ESTABILIDADE) == []
+
+    os.replace(temporario, tmp_path / "nota.pdf")
+    liberados = coletar(observador, 3 * ESTABILIDADE)
+    assert [liberado for _, liberado in liberados] == [str(tmp_path / "nota.pdf")]
+    assert coletar(observador, 2 * ESTABILIDADE) == []
+
+def test_cada_versao_e_liberada_uma_vez(tmp_path):
+    caminho = tmp_path / "nota.pdf"
+    caminho.write_bytes(b"%PDF-1.4\n" * 100)
+    observador = observador_polling(tmp_path)
+    # Já entregue pela varredura inicial: não volta a ser liberado sem mudar
+    observador.marcar_liberados([str(caminho)])
+    assert coletar(observador, 3 * ESTABILIDADE) == []
+
+    # Tocar o arquivo muda o mtime: é uma versão nova, liberada uma única vez
+    os.utime(caminho)
+    liberados = coletar(observador, 3 * ESTABILIDADE)
+    assert [liberado for _, liberado in liberados] == [str(caminho)]
+    assert coletar(observador, 3 * ESTABILIDADE) == []
+
+def test_arquivo_vazio_nao_e_liberado(tmp_path):
+    observador = observador_polling(tmp_path)
+    (tmp_path / "nota.pdf").write_bytes(b"")
+    assert coletar(observador, 3 * ESTABILIDADE) == []